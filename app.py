@@ -1,37 +1,251 @@
-from flask import Flask, request, jsonify
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import numpy as np
 import os
+import sys
+import json
+import logging
+import tempfile
+import threading
+import time
+import uuid
+from importlib import metadata
+from typing import NamedTuple
 from dotenv import load_dotenv
-import spacy
-from spacy.matcher import Matcher
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+from archive_ingest import count_archive_members, iter_archive_texts
+from chunked_embeddings import ChunkedEmbeddings, chunk_texts
+from embedding_backends import load_embedding_backend
+from embedding_batcher import EmbeddingBatcher
+from feature_cache import FeatureCache
+from jobs import JobQueue
+from metrics import DURATION_BUCKETS, SIZE_BUCKETS, TEXT_LENGTH_BUCKETS, Metrics, start_timings, stop_timings
+from model_registry import ModelRegistry
+from ranking import TopK, rank_indices, top_k_indices
+from resume_corpus import ResumeCorpus, StaleFeaturesError, check_features_version
+from score_components import (
+    COLUMNS, ComponentStore, as_component_matrix, component_matrix, rank_weight_sets, resolve_weights
+)
+from sparse_scoring import TermMatrix
+from taxonomy import Taxonomy, TaxonomyMatcher
 
 # Load environment variables
 load_dotenv()
 
+PORT = int(os.getenv('PORT', 5000))
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Sentence encoder inference: torch, onnx or onnx-int8. EMBEDDING_MODEL_PATH is a
+# local directory written by `python embedding_backends.py export` (required
+# for the ONNX backends; loads the torch backend offline)
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')
+EMBEDDING_MODEL_PATH = os.getenv('EMBEDDING_MODEL_PATH')
+EMBEDDING_ONNX_THREADS = int(os.getenv('EMBEDDING_ONNX_THREADS', 0))
+SPACY_MODEL_NAME = "en_core_web_sm"
+# Number of texts sent to the sentence encoder per forward pass
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 32))
+# "chunked" embeds long resumes as chunks of at most CHUNK_MAX_TOKENS tokens
+# (0 = the encoder's input limit) instead of only their first ~256 tokens; the
+# semantic score is the max (CHUNK_AGGREGATION=max) or the mean of the
+# CHUNK_TOP_N best (CHUNK_AGGREGATION=mean) chunk similarities
+EMBEDDING_MODE = os.getenv('EMBEDDING_MODE', 'single')
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', 0))
+CHUNK_AGGREGATION = os.getenv('CHUNK_AGGREGATION', 'max')
+CHUNK_TOP_N = int(os.getenv('CHUNK_TOP_N', 3))
+# Micro-batching of small concurrent encode calls (0 ms disables it): calls
+# are held this long for others to join, up to the max batch size in texts
+EMBEDDING_MICRO_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_MICRO_BATCH_WAIT_MS', 0))
+EMBEDDING_MICRO_BATCH_MAX_SIZE = int(os.getenv('EMBEDDING_MICRO_BATCH_MAX_SIZE', 64))
+# nlp.pipe settings for bulk resume analysis
+NLP_BATCH_SIZE = int(os.getenv('NLP_BATCH_SIZE', 64))
+NLP_N_PROCESS = int(os.getenv('NLP_N_PROCESS', 1))
+# Below this many documents worker start-up costs more than it saves
+NLP_MULTIPROCESS_MIN_DOCS = int(os.getenv('NLP_MULTIPROCESS_MIN_DOCS', 256))
+
+# Pipeline components none of the extractors use (they need tagger, parser
+# and attribute_ruler for POS tags, dependencies and noun chunks)
+NLP_EXCLUDED_COMPONENTS = ["ner", "lemmatizer"]
+
+# Resume feature cache: in-memory LRU entries (0 disables) and optional SQLite file
+FEATURE_CACHE_SIZE = int(os.getenv('FEATURE_CACHE_SIZE', 10000))
+FEATURE_CACHE_PATH = os.getenv('FEATURE_CACHE_PATH')
+FEATURE_CACHE_DISK_SIZE = int(os.getenv('FEATURE_CACHE_DISK_SIZE', 1000000))
+# Bump when the extractors change so cached features are not reused
+FEATURE_EXTRACTION_VERSION = 2
+# Skill and role taxonomy (canonical names with aliases) matched by the extractors;
+# cached features are keyed by its content, so editing it invalidates them
+TAXONOMY_PATH = os.getenv('TAXONOMY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'taxonomy.json'))
+# Batches at least this large score keywords/roles with sparse matrix products
+VECTORIZED_SCORING_MIN_BATCH = int(os.getenv('VECTORIZED_SCORING_MIN_BATCH', 32))
+
+# Persistent resume corpus used by /resumes and /search
+CORPUS_PATH = os.getenv('CORPUS_PATH', 'corpus')
+# Resumes kept by the semantic prefilter for hybrid rescoring in /search
+SEARCH_SHORTLIST_SIZE = int(os.getenv('SEARCH_SHORTLIST_SIZE', 200))
+# Corpus vector index: brute (exact scan), ivf (built-in) or hnsw (needs hnswlib)
+VECTOR_INDEX_BACKEND = os.getenv('VECTOR_INDEX_BACKEND', 'brute')
+IVF_NPROBE = int(os.getenv('IVF_NPROBE', 8))
+HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', 64))
+
+# Resume archives uploaded to /match: resumes extracted and scored per chunk.
+# The PDF limits (extraction processes and per-file pages, size and time) also
+# apply to the frontend's uploads
+ARCHIVE_CHUNK_SIZE = int(os.getenv('ARCHIVE_CHUNK_SIZE', 64))
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', os.cpu_count() or 1))
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 50))
+PDF_MAX_MB = float(os.getenv('PDF_MAX_MB', 20))
+PDF_TIMEOUT = float(os.getenv('PDF_TIMEOUT', 30))
+
+# Streaming /match (Accept: application/x-ndjson or ?stream=1): resumes scored
+# per emitted chunk, and matches repeated in the final summary record
+MATCH_STREAM_CHUNK_SIZE = int(os.getenv('MATCH_STREAM_CHUNK_SIZE', 256))
+MATCH_STREAM_TOP_K = int(os.getenv('MATCH_STREAM_TOP_K', 10))
+
+# Component matrices kept in memory for /rescore (one per /match or JD in
+# /match/matrix requested with "return_components"), least recently used evicted
+COMPONENT_STORE_SIZE = int(os.getenv('COMPONENT_STORE_SIZE', 64))
+
+# Background match jobs (/jobs): SQLite queue and uploaded archives under
+# JOBS_PATH, jobs run concurrently, and resumes scored per progress update
+JOBS_PATH = os.getenv('JOBS_PATH', 'jobs')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+JOB_CHUNK_SIZE = int(os.getenv('JOB_CHUNK_SIZE', 1000))
+# A running job whose worker process sent no heartbeat for this long (it
+# stopped or hung) is re-queued by another process sharing JOBS_PATH
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 60))
+
+# Prometheus-style metrics at /metrics (request latency, per-stage durations,
+# batch sizes, cache hits); 0 turns recording off. Independently of this, a
+# request with the X-Debug-Timings: 1 header gets its per-stage "timings"
+# added to the JSON response
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+DEBUG_TIMINGS_HEADER = 'X-Debug-Timings'
+
+# Load models when the app module is imported (e.g. by each gunicorn worker)
+# instead of on the first request; `python app.py` always warms up
+MODEL_WARM_UP = os.getenv('MODEL_WARM_UP', '0').lower() in ('1', 'true', 'yes')
+
+DEFAULT_WEIGHTS = {
+    "semantic_weight_with_role": 0.1,
+    "keyword_weight_with_role": 0.7,
+    "role_weight": 0.2,
+    "semantic_weight_no_role": 0.2,
+    "keyword_weight_no_role": 0.8
+}
+
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
-# Initialize the models
-import spacy
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    import spacy.cli
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-nlp = spacy.load("en_core_web_sm")
-
-def extract_keywords(text):
-    """Extract all technical terms, tools, languages, and frameworks from the text."""
-    doc = nlp(text)
+# Models are loaded lazily, exactly once per process, on first use or warm-up
+def _load_nlp():
+    import spacy
+    try:
+        return spacy.load(SPACY_MODEL_NAME, exclude=NLP_EXCLUDED_COMPONENTS)
+    except OSError:
+        import spacy.cli
+        spacy.cli.download(SPACY_MODEL_NAME)
+        return spacy.load(SPACY_MODEL_NAME, exclude=NLP_EXCLUDED_COMPONENTS)
+
+def _load_embedding_model():
+    return load_embedding_backend(
+        EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, EMBEDDING_MODEL_PATH, threads=EMBEDDING_ONNX_THREADS or None
+    )
+
+taxonomy = Taxonomy.load(TAXONOMY_PATH)
+
+def _load_taxonomy_matcher():
+    return TaxonomyMatcher(get_nlp(), taxonomy)
+
+models = ModelRegistry()
+models.register("nlp", _load_nlp)
+models.register("embedding", _load_embedding_model)
+models.register("taxonomy", _load_taxonomy_matcher)
+
+def get_nlp():
+    return models.get("nlp")
+
+def get_embedding_model():
+    return models.get("embedding")
+
+def get_taxonomy_matcher():
+    return models.get("taxonomy")
+
+def _package_version(name):
+    """Installed version of a package, read from metadata without importing it."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+component_store = ComponentStore(COMPONENT_STORE_SIZE)
+
+# How resume features are extracted; the stored corpus records it, and the
+# feature cache keys entries by it
+FEATURES_VERSION = "|".join([
+    f"{SPACY_MODEL_NAME}@{_package_version(SPACY_MODEL_NAME)}",
+    f"features-v{FEATURE_EXTRACTION_VERSION}",
+    f"taxonomy-{taxonomy.digest}"
+])
+
+metrics = Metrics("resume_matcher", enabled=METRICS_ENABLED)
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status")
+)
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time to produce each HTTP response", DURATION_BUCKETS, ("endpoint",)
+)
+scoring_batch_sizes = metrics.histogram(
+    "scoring_batch_size", "Resumes per feature computation (cache lookup, embedding and parsing)", SIZE_BUCKETS
+)
+embedding_batch_sizes = metrics.histogram(
+    "embedding_batch_size", "Texts per sentence encoder call", SIZE_BUCKETS
+)
+resume_text_chars = metrics.histogram(
+    "resume_text_chars", "Length of scored resume texts in characters", TEXT_LENGTH_BUCKETS
+)
+
+feature_cache = FeatureCache(
+    namespace="|".join([
+        # Backends produce slightly different embeddings, so each has its own entries
+        f"{EMBEDDING_MODEL_NAME}@{_package_version('sentence-transformers')}"
+        + ("" if EMBEDDING_BACKEND == "torch" else f"+{EMBEDDING_BACKEND}")
+        + (f"+chunked{CHUNK_MAX_TOKENS}" if EMBEDDING_MODE == "chunked" else ""),
+        FEATURES_VERSION
+    ]),
+    max_entries=FEATURE_CACHE_SIZE,
+    db_path=FEATURE_CACHE_PATH,
+    max_disk_entries=FEATURE_CACHE_DISK_SIZE
+)
+
+class DocumentFeatures(NamedTuple):
+    """Keywords, skills and roles extracted from a single spaCy parse of a text."""
+    keywords: set
+    skills: set
+    roles: set
+
+def _as_doc(text):
+    """Return a parsed spaCy Doc, running the pipeline only if given raw text."""
+    if not isinstance(text, str):
+        return text
+    return get_nlp()(text)
+
+def _taxonomy_matches(doc, matches):
+    """Taxonomy matches of a Doc, unless already computed by the caller."""
+    return matches if matches is not None else get_taxonomy_matcher().match(doc)
+
+def _has_role_mention(span, matches):
+    return any(i in matches.role_tokens for i in range(span.start, span.end))
+
+def extract_keywords(text, matches=None):
+    """Extract all technical terms, tools, languages, and frameworks from the text.
+
+    Accepts raw text or an already parsed spaCy Doc, and optionally its
+    TaxonomyMatches.
+    """
+    doc = _as_doc(text)
+    matches = _taxonomy_matches(doc, matches)
     keywords = set()
     
-    # Extract role-specific terms
-    role_indicators = ['developer', 'engineer', 'analyst', 'architect', 'manager', 
-                      'specialist', 'consultant', 'lead', 'director', 'expert','scientist']
-    
     # Extract all technical terms and proper nouns
     for token in doc:
         # Skip stop words, punctuation, and very short words
@@ -54,8 +268,8 @@ def extract_keywords(text):
             # Add the phrase if it contains technical-looking terms
             if any(word.istitle() for word in chunk.text.split()):
                 keywords.add(chunk.text.lower())
-            # Add role-specific phrases
-            if any(role in chunk.text.lower() for role in role_indicators):
+            # Add role-specific phrases (ones mentioning a taxonomy role)
+            if _has_role_mention(chunk, matches):
                 keywords.add(chunk.text.lower())
     
     # Extract compound technical terms (e.g., "machine learning", "data analysis")
@@ -69,9 +283,14 @@ def extract_keywords(text):
     
     return keywords
 
-def extract_skills(text):
-    """Extract specific skills and requirements from the text."""
-    doc = nlp(text)
+def extract_skills(text, matches=None):
+    """Extract specific skills and requirements from the text.
+
+    Accepts raw text or an already parsed spaCy Doc, and optionally its
+    TaxonomyMatches.
+    """
+    doc = _as_doc(text)
+    matches = _taxonomy_matches(doc, matches)
     skills = set()
     
     # Common skill indicators
@@ -86,27 +305,19 @@ def extract_skills(text):
                 if child.dep_ in ['dobj', 'attr', 'nsubj']:
                     skills.add(child.text.lower())
     
-    # Extract specific technical skills
-    tech_skills = ['sql', 'python', 'r', 'qlikview', 'powerbi', 'google analytics', 
-                  'firebase', 'bi tools', 'analytics']
-    
-    # Extract compound skills
-    for i in range(len(doc) - 1):
-        if doc[i].text.lower() + ' ' + doc[i + 1].text.lower() in tech_skills:
-            skills.add(doc[i].text.lower() + ' ' + doc[i + 1].text.lower())
-        elif doc[i].text.lower() in tech_skills:
-            skills.add(doc[i].text.lower())
+    # Add taxonomy skills under their canonical names ("Power BI" -> "powerbi")
+    skills.update(matches.skills)
     
     return skills
 
-def calculate_keyword_score(resume_text, jd_text):
-    """Calculate the keyword matching score between resume and job description."""
-    resume_keywords = extract_keywords(resume_text)
-    jd_keywords = extract_keywords(jd_text)
+def keyword_score_from_features(resume_features, jd_features):
+    """Calculate the keyword matching score from pre-extracted DocumentFeatures."""
+    resume_keywords = resume_features.keywords
+    jd_keywords = jd_features.keywords
     
-    # Extract specific skills
-    resume_skills = extract_skills(resume_text)
-    jd_skills = extract_skills(jd_text)
+    # Specific skills
+    resume_skills = resume_features.skills
+    jd_skills = jd_features.skills
     
     if not jd_keywords and not jd_skills:
         return 0.0
@@ -125,39 +336,71 @@ def calculate_keyword_score(resume_text, jd_text):
     total_score = (0.3 * keyword_score + 0.7 * skill_score)
     return min(total_score, 1.0)
 
-def extract_role_keywords(text):
-    """Extract role-specific keywords from the text."""
-    doc = nlp(text)
+def calculate_keyword_score(resume_text, jd_text):
+    """Calculate the keyword matching score between resume and job description."""
+    return keyword_score_from_features(analyze_document(resume_text), analyze_document(jd_text))
+
+def extract_role_keywords(text, matches=None):
+    """Extract role-specific keywords from the text.
+
+    Accepts raw text or an already parsed spaCy Doc, and optionally its
+    TaxonomyMatches.
+    """
+    doc = _as_doc(text)
+    matches = _taxonomy_matches(doc, matches)
     role_keywords = set()
     
-    # Common role indicators
-    role_indicators = ['developer', 'engineer', 'analyst', 'architect', 'manager', 
-                      'specialist', 'consultant', 'lead', 'director', 'expert',
-                      'scientist', 'programmer', 'designer', 'administrator', 'coordinator']
-    
     # Extract complete role phrases
     for chunk in doc.noun_chunks:
-        # Convert to lowercase for comparison
-        chunk_text = chunk.text.lower()
-        
-        # Check if the phrase contains a role indicator
-        if any(role in chunk_text for role in role_indicators):
+        # Check if the phrase mentions a taxonomy role
+        if _has_role_mention(chunk, matches):
             # Add the complete phrase (e.g., "data analyst", "system engineer")
-            role_keywords.add(chunk_text)
+            role_keywords.add(chunk.text.lower())
     
-    # Also extract individual role words for single-word roles
-    for token in doc:
-        token_text = token.text.lower()
-        if token_text in role_indicators:
-            role_keywords.add(token_text)
+    # Also add the canonical names of the roles mentioned ("engineers" -> "engineer")
+    role_keywords.update(matches.roles)
     
     return role_keywords
 
-def calculate_role_score(resume_text, jd_text):
-    """Calculate the role matching score between resume and job description."""
-    resume_roles = extract_role_keywords(resume_text)
-    jd_roles = extract_role_keywords(jd_text)
-    
+def analyze_document(text):
+    """Parse text once and extract keywords, skills and roles from the shared Doc."""
+    with metrics.stage("nlp"):
+        return features_from_doc(get_nlp()(text))
+
+def analyze_documents(texts, batch_size=None, n_process=None):
+    """Analyze many texts with nlp.pipe, returning DocumentFeatures in input order.
+
+    Args:
+        texts (list[str]): The texts to analyze
+        batch_size (int, optional): Texts per nlp.pipe batch. Defaults to
+            the NLP_BATCH_SIZE environment setting.
+        n_process (int, optional): Worker processes for nlp.pipe. Defaults
+            to the NLP_N_PROCESS environment setting; small inputs are
+            always processed in-process.
+    """
+    texts = list(texts)
+    if batch_size is None:
+        batch_size = NLP_BATCH_SIZE
+    if n_process is None:
+        n_process = NLP_N_PROCESS
+    if len(texts) < NLP_MULTIPROCESS_MIN_DOCS:
+        n_process = 1
+
+    with metrics.stage("nlp"):
+        docs = get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process)
+        return [features_from_doc(doc) for doc in docs]
+
+def features_from_doc(doc):
+    """Build DocumentFeatures from an already parsed spaCy Doc, matching the taxonomy once."""
+    matches = get_taxonomy_matcher().match(doc)
+    return DocumentFeatures(
+        keywords=extract_keywords(doc, matches),
+        skills=extract_skills(doc, matches),
+        roles=extract_role_keywords(doc, matches)
+    )
+
+def role_score_from_roles(resume_roles, jd_roles):
+    """Calculate the role matching score from pre-extracted role sets."""
     if not jd_roles:
         return 0.0
     
@@ -180,44 +423,50 @@ def calculate_role_score(resume_text, jd_text):
     # Return the higher of exact or partial score
     return max(exact_score, partial_score)
 
-def calculate_hybrid_score(resume_text, jd_text, weights=None):
-    """Calculate hybrid score combining semantic similarity, keyword matching, and role matching.
-    
-    Args:
-        resume_text (str): The resume text to analyze
-        jd_text (str): The job description text to match against
-        weights (dict, optional): Custom weights for scoring. Format:
-            {
-                "semantic_weight_with_role": 0.1,
-                "keyword_weight_with_role": 0.7,
-                "role_weight": 0.2,
-                "semantic_weight_no_role": 0.2,
-                "keyword_weight_no_role": 0.8
-            }
-            If None, default weights will be used.
+def calculate_role_score(resume_text, jd_text):
+    """Calculate the role matching score between resume and job description."""
+    return role_score_from_roles(extract_role_keywords(resume_text), extract_role_keywords(jd_text))
+
+def _encode_batch(texts, batch_size=None):
+    if batch_size is None:
+        batch_size = EMBEDDING_BATCH_SIZE
+    texts = list(texts)
+    embedding_batch_sizes.observe(len(texts))
+    embeddings = get_embedding_model().encode(
+        texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        normalize_embeddings=True
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+embedding_batcher = None
+if EMBEDDING_MICRO_BATCH_WAIT_MS > 0:
+    embedding_batcher = EmbeddingBatcher(
+        _encode_batch,
+        max_batch_size=EMBEDDING_MICRO_BATCH_MAX_SIZE,
+        max_wait=EMBEDDING_MICRO_BATCH_WAIT_MS / 1000
+    )
+
+def encode_texts(texts, batch_size=None):
+    """Encode texts into L2-normalized embeddings, batch_size texts per forward pass.
+
+    With micro-batching enabled, small calls are coalesced with concurrent
+    ones into a single encoder call; batches already as large as
+    EMBEDDING_MICRO_BATCH_MAX_SIZE go straight to the model.
     """
-    # Set default weights if none provided
+    texts = list(texts)
+    with metrics.stage("encode"):
+        if embedding_batcher is not None and 0 < len(texts) < embedding_batcher.max_batch_size:
+            return embedding_batcher.encode(texts)
+        return _encode_batch(texts, batch_size)
+
+def combine_scores(semantic_score, keyword_score, role_score, has_role_requirement, weights=None):
+    """Combine the component scores into the final hybrid score dictionary."""
     if weights is None:
-        weights = {
-            "semantic_weight_with_role": 0.1,
-            "keyword_weight_with_role": 0.7,
-            "role_weight": 0.2,
-            "semantic_weight_no_role": 0.2,
-            "keyword_weight_no_role": 0.8
-        }
-    
-    # Calculate semantic similarity score
-    resume_embedding = model.encode([resume_text])[0]
-    jd_embedding = model.encode([jd_text])[0]
-    semantic_score = cosine_similarity([resume_embedding], [jd_embedding])[0][0]
-    
-    # Calculate keyword and skill matching score
-    keyword_score = calculate_keyword_score(resume_text, jd_text)
-    
-    # Calculate role matching score only if roles are mentioned in JD
-    jd_roles = extract_role_keywords(jd_text)
-    if jd_roles:
-        role_score = calculate_role_score(resume_text, jd_text)
+        weights = DEFAULT_WEIGHTS
+
+    if has_role_requirement:
         # Use role score in final calculation with custom weights
         final_score = (
             weights["semantic_weight_with_role"] * semantic_score + 
@@ -225,29 +474,461 @@ def calculate_hybrid_score(resume_text, jd_text, weights=None):
             weights["role_weight"] * role_score
         )
     else:
-        role_score = 0.0
         # Skip role score in final calculation
         final_score = (
             weights["semantic_weight_no_role"] * semantic_score + 
             weights["keyword_weight_no_role"] * keyword_score
         )
-    
+
     return {
         "final_score": final_score,
         "semantic_score": semantic_score,
         "keyword_score": keyword_score,
         "role_score": role_score,
-        "has_role_requirement": bool(jd_roles)
+        "has_role_requirement": has_role_requirement
+    }
+
+def _chunk_token_limit(model):
+    if CHUNK_MAX_TOKENS:
+        return CHUNK_MAX_TOKENS
+    # Leave room for the [CLS] and [SEP] tokens the encoder adds
+    return getattr(model, "max_seq_length", 256) - 2
+
+def _count_tokens(model, texts):
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        # Rough subword estimate for encoders without an exposed tokenizer
+        return [len(text.split()) * 4 // 3 for text in texts]
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]]
+
+def encode_resume_chunks(texts, batch_size=None):
+    """Embed texts chunk by chunk (EMBEDDING_MODE=chunked).
+
+    All chunks of all texts go to the encoder in one call; the encoder
+    sorts them by length, and chunks are packed close to the token
+    limit, so batches carry little padding.
+
+    Returns:
+        list[np.ndarray]: One (chunks x dims) normalized matrix per text.
+    """
+    model = get_embedding_model()
+    chunks = chunk_texts(list(texts), lambda pieces: _count_tokens(model, pieces), _chunk_token_limit(model))
+    embeddings = encode_texts([chunk for text_chunks in chunks for chunk in text_chunks], batch_size=batch_size)
+    matrices = []
+    start = 0
+    for text_chunks in chunks:
+        matrices.append(embeddings[start:start + len(text_chunks)])
+        start += len(text_chunks)
+    return matrices
+
+def compute_resume_features(resume_texts, batch_size=None):
+    """Return (embedding matrix, DocumentFeatures list) for resumes, using the feature cache.
+
+    Only cache misses are embedded and parsed, each distinct text once.
+    With EMBEDDING_MODE=chunked the embeddings are a ChunkedEmbeddings,
+    which scores against a JD embedding like the matrix does.
+    """
+    resume_texts = list(resume_texts)
+    scoring_batch_sizes.observe(len(resume_texts))
+    resume_text_chars.observe_many([len(text) for text in resume_texts])
+    with metrics.stage("feature_cache"):
+        cached = feature_cache.get_many(resume_texts)
+
+    missing_texts = list(dict.fromkeys(
+        text for text, entry in zip(resume_texts, cached) if entry is None
+    ))
+    computed = {}
+    if missing_texts:
+        if EMBEDDING_MODE == "chunked":
+            embeddings = encode_resume_chunks(missing_texts, batch_size=batch_size)
+        else:
+            embeddings = encode_texts(missing_texts, batch_size=batch_size)
+        features = analyze_documents(missing_texts)
+        with metrics.stage("feature_cache"):
+            feature_cache.put_many(missing_texts, embeddings, features)
+        computed = dict(zip(missing_texts, zip(embeddings, features)))
+
+    resume_embeddings = []
+    resume_features = []
+    for text, entry in zip(resume_texts, cached):
+        embedding, features = entry if entry is not None else computed[text]
+        resume_embeddings.append(embedding)
+        resume_features.append(DocumentFeatures(*features))
+    if EMBEDDING_MODE == "chunked":
+        return ChunkedEmbeddings.from_list(resume_embeddings, CHUNK_AGGREGATION, CHUNK_TOP_N), resume_features
+    return np.vstack(resume_embeddings), resume_features
+
+class JobProfile(NamedTuple):
+    """Everything about a job description that resume scoring needs, computed once."""
+    embedding: np.ndarray
+    keywords: set
+    skills: set
+    roles: set
+    has_role_requirement: bool
+
+def build_job_profile(jd_text):
+    """Embed and analyze a job description once so it can be reused for every resume."""
+    with metrics.stage("jd_profile"):
+        jd_features = analyze_document(jd_text)
+        return JobProfile(
+            embedding=encode_texts([jd_text])[0],
+            keywords=jd_features.keywords,
+            skills=jd_features.skills,
+            roles=jd_features.roles,
+            # Role matching only counts if roles are mentioned in JD
+            has_role_requirement=bool(jd_features.roles)
+        )
+
+def build_job_profiles(jd_texts):
+    """build_job_profile for many job descriptions: one encoder batch and one nlp.pipe pass."""
+    jd_texts = list(jd_texts)
+    if not jd_texts:
+        return []
+    with metrics.stage("jd_profile"):
+        embeddings = encode_texts(jd_texts)
+        return [
+            JobProfile(
+                embedding=embedding,
+                keywords=jd_features.keywords,
+                skills=jd_features.skills,
+                roles=jd_features.roles,
+                has_role_requirement=bool(jd_features.roles)
+            )
+            for embedding, jd_features in zip(embeddings, analyze_documents(jd_texts))
+        ]
+
+def score_features(profile, semantic_score, resume_features, weights=None):
+    """Score one resume's pre-computed semantic score and DocumentFeatures against a JobProfile."""
+    # Calculate keyword and skill matching score
+    with metrics.stage("keyword_scoring"):
+        keyword_score = keyword_score_from_features(resume_features, profile)
+    with metrics.stage("role_scoring"):
+        role_score = (
+            role_score_from_roles(resume_features.roles, profile.roles)
+            if profile.has_role_requirement else 0.0
+        )
+    return combine_scores(
+        semantic_score, keyword_score, role_score, profile.has_role_requirement, weights
+    )
+
+def scores_at(combined, i):
+    """Score dictionary of resume i from a combine_scores result over arrays."""
+    return {
+        "final_score": combined["final_score"][i],
+        "semantic_score": combined["semantic_score"][i],
+        "keyword_score": combined["keyword_score"][i],
+        "role_score": combined["role_score"][i],
+        "has_role_requirement": combined["has_role_requirement"]
     }
 
+def score_resume_arrays(profile, resume_texts, weights=None, batch_size=None):
+    """Like score_resumes, but as one array per score component.
+
+    Returns:
+        dict: combine_scores output whose scores are arrays in input
+        order, for ranking without building a dictionary per resume.
+    """
+    resume_texts = list(resume_texts)
+    if len(resume_texts) < VECTORIZED_SCORING_MIN_BATCH:
+        all_scores = score_resumes(profile, resume_texts, weights=weights, batch_size=batch_size)
+        combined = {
+            key: np.array([scores[key] for scores in all_scores], dtype=np.float64)
+            for key in ("final_score", "semantic_score", "keyword_score", "role_score")
+        }
+        combined["has_role_requirement"] = profile.has_role_requirement
+        return combined
+
+    resume_embeddings, resume_features = compute_resume_features(resume_texts, batch_size=batch_size)
+    with metrics.stage("semantic_scoring"):
+        semantic_scores = resume_embeddings @ profile.embedding
+    with metrics.stage("keyword_scoring"):
+        terms = TermMatrix(resume_features)
+        keyword_scores = terms.keyword_scores(profile)
+    with metrics.stage("role_scoring"):
+        role_scores = (
+            terms.role_scores(profile) if profile.has_role_requirement else np.zeros(len(resume_texts))
+        )
+    return combine_scores(semantic_scores, keyword_scores, role_scores, profile.has_role_requirement, weights)
+
+def score_matrix(profiles, resume_texts, weights=None, batch_size=None):
+    """Score every resume against every job profile.
+
+    Each resume is embedded and parsed once (or read from the feature
+    cache), the semantic scores for all pairs are a single (resumes x
+    dims) @ (dims x JDs) product, and keyword/role scores for each JD are
+    sparse products over one shared TermMatrix. J job descriptions and R
+    resumes cost R model calls rather than J x R.
+
+    Returns:
+        list[dict]: combine_scores output over arrays (one entry per
+        resume) for each profile, in profile order.
+    """
+    resume_texts = list(resume_texts)
+    resume_embeddings, resume_features = compute_resume_features(resume_texts, batch_size=batch_size)
+    semantic_matrix = resume_embeddings @ np.stack([profile.embedding for profile in profiles], axis=1)
+    terms = TermMatrix(resume_features)
+
+    all_scores = []
+    for j, profile in enumerate(profiles):
+        keyword_scores = terms.keyword_scores(profile)
+        role_scores = (
+            terms.role_scores(profile) if profile.has_role_requirement else np.zeros(len(resume_texts))
+        )
+        all_scores.append(combine_scores(
+            semantic_matrix[:, j], keyword_scores, role_scores, profile.has_role_requirement, weights
+        ))
+    return all_scores
+
+def score_components(profile, resume_texts, batch_size=None):
+    """Score resumes once into a (resumes x 4) component matrix (see score_components.COLUMNS).
+
+    The matrix does not depend on weights: rescore_components ranks it
+    under any number of weight sets without running the models again.
+    """
+    return component_matrix(score_resume_arrays(profile, resume_texts, batch_size=batch_size))
+
+def rescore_components(components, weight_sets, top_k=None):
+    """Rank a component matrix under each weight set with vectorized NumPy.
+
+    Args:
+        components (np.ndarray): Matrix from score_components
+        weight_sets (list[dict]): Weights as for calculate_hybrid_score;
+            missing keys take the default weights
+        top_k (int, optional): Keep only the top_k best per weight set
+
+    Raises:
+        ValueError: If a weight set has unknown or non-numeric weights.
+
+    Returns:
+        list[tuple]: (complete weights, indices best first, final scores)
+        per weight set.
+    """
+    weight_sets = [resolve_weights(weights, DEFAULT_WEIGHTS) for weights in weight_sets]
+    rankings = rank_weight_sets(as_component_matrix(components), weight_sets, top_k)
+    return [(weights, indices, finals) for weights, (indices, finals) in zip(weight_sets, rankings)]
+
+def score_resumes(profile, resume_texts, weights=None, batch_size=None):
+    """Score many resumes against a pre-built JobProfile.
+
+    Resumes are embedded in batches of ``batch_size`` and semantic
+    similarity for the whole batch is a single matrix-vector product of
+    normalized embeddings; each resume is parsed by spaCy exactly once,
+    in bulk through nlp.pipe. Resumes already in the feature cache skip
+    both models entirely. Batches of VECTORIZED_SCORING_MIN_BATCH or more
+    resumes compute keyword and role scores with sparse matrix products
+    (same results as the per-resume functions).
+
+    Returns:
+        list[dict]: One score dictionary per resume, in input order.
+    """
+    resume_texts = list(resume_texts)
+    if not resume_texts:
+        return []
+
+    if len(resume_texts) >= VECTORIZED_SCORING_MIN_BATCH:
+        combined = score_resume_arrays(profile, resume_texts, weights=weights, batch_size=batch_size)
+        return [scores_at(combined, i) for i in range(len(resume_texts))]
+
+    resume_embeddings, resume_features = compute_resume_features(resume_texts, batch_size=batch_size)
+    with metrics.stage("semantic_scoring"):
+        semantic_scores = resume_embeddings @ profile.embedding
+    return [
+        score_features(profile, semantic_score, features, weights)
+        for semantic_score, features in zip(semantic_scores, resume_features)
+    ]
+
+def score_resume(profile, resume_text, weights=None):
+    """Score a single resume against a pre-built JobProfile."""
+    return score_resumes(profile, [resume_text], weights=weights)[0]
+
+def calculate_hybrid_scores(resume_texts, jd_text, weights=None, batch_size=None):
+    """Calculate hybrid scores for many resumes against one job description.
+
+    Args:
+        resume_texts (list[str]): The resume texts to analyze
+        jd_text (str): The job description text to match against
+        weights (dict, optional): Custom weights for scoring, see
+            calculate_hybrid_score. If None, default weights will be used.
+        batch_size (int, optional): Resumes per encoder call. Defaults to
+            the EMBEDDING_BATCH_SIZE environment setting.
+
+    Returns:
+        list[dict]: One score dictionary per resume, in input order.
+    """
+    resume_texts = list(resume_texts)
+    if not resume_texts:
+        return []
+    return score_resumes(build_job_profile(jd_text), resume_texts, weights=weights, batch_size=batch_size)
+
+def calculate_hybrid_score(resume_text, jd_text, weights=None):
+    """Calculate hybrid score combining semantic similarity, keyword matching, and role matching.
+    
+    Args:
+        resume_text (str): The resume text to analyze
+        jd_text (str): The job description text to match against
+        weights (dict, optional): Custom weights for scoring. Format:
+            {
+                "semantic_weight_with_role": 0.1,
+                "keyword_weight_with_role": 0.7,
+                "role_weight": 0.2,
+                "semantic_weight_no_role": 0.2,
+                "keyword_weight_no_role": 0.8
+            }
+            If None, default weights will be used.
+    """
+    return calculate_hybrid_scores([resume_text], jd_text, weights=weights)[0]
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+def _open_corpus(features_version):
+    index_options = {
+        "ivf": {"nprobe": IVF_NPROBE},
+        "hnsw": {"ef_search": HNSW_EF_SEARCH}
+    }.get(VECTOR_INDEX_BACKEND, {})
+    return ResumeCorpus(
+        CORPUS_PATH,
+        dim=get_embedding_model().get_sentence_embedding_dimension(),
+        index_backend=VECTOR_INDEX_BACKEND,
+        index_options=index_options,
+        features_version=features_version
+    )
+
+def _stale_corpus_error(e):
+    return RuntimeError(f"{e}. Stop the server and run `python app.py reextract-corpus` to re-extract them.")
+
+def check_corpus_features():
+    """Refuse to start on a stored corpus whose features were extracted with
+    other extractors or another taxonomy than this app's.
+
+    Raises:
+        RuntimeError: With the command that re-extracts the features.
+    """
+    try:
+        check_features_version(CORPUS_PATH, FEATURES_VERSION)
+    except StaleFeaturesError as e:
+        raise _stale_corpus_error(e) from e
+
+def get_corpus():
+    """Open the persistent resume corpus on first use.
+
+    Raises:
+        RuntimeError: If the stored features are stale (see check_corpus_features).
+    """
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            try:
+                _corpus = _open_corpus(FEATURES_VERSION)
+            except StaleFeaturesError as e:
+                raise _stale_corpus_error(e) from e
+    return _corpus
+
+def reextract_corpus():
+    """Re-extract the features of every stored resume with the current extractors and taxonomy."""
+    corpus = _open_corpus(None)
+    return corpus.reextract_features(analyze_documents, FEATURES_VERSION)
+
+def add_resumes_to_corpus(resumes):
+    """Embed, analyze and store resumes in the corpus; returns their ids.
+
+    Each resume is a dict with "text" and optional "id" and "name"; a
+    missing id is generated, an existing id is replaced.
+    """
+    ids = [str(resume.get("id") or uuid.uuid4().hex) for resume in resumes]
+    texts = [resume.get("text", "") for resume in resumes]
+    embeddings, features = compute_resume_features(texts)
+    if isinstance(embeddings, ChunkedEmbeddings):
+        # The corpus index holds one vector per resume
+        embeddings = embeddings.pooled()
+    get_corpus().add(ids, [resume.get("name") for resume in resumes], texts, embeddings, features)
+    return ids
+
+def search_corpus(jd_text, top_k=10, shortlist_size=None, weights=None, must_have=None, exhaustive=False):
+    """Return the top_k corpus resumes for a job description.
+
+    By default a semantic prefilter over the normalized embedding matrix
+    (exact or approximate, per VECTOR_INDEX_BACKEND) keeps the
+    shortlist_size closest resumes, which are then rescored with the
+    hybrid keyword/role scoring using their stored features.
+
+    Args:
+        must_have (list[str], optional): Terms every returned resume must
+            list as a skill or keyword. Resolved with the inverted index
+            before any embedding scoring.
+        exhaustive (bool): Score every (matching) resume with the full
+            hybrid score instead of a semantic shortlist; keyword and role
+            scores come from inverted-index posting merges.
+
+    Raises:
+        ValueError: If must_have is not a list of strings.
+
+    Returns:
+        tuple: (profile, ranked list of (record, scores) pairs)
+    """
+    # A bare string would be iterated as single characters and silently match nothing
+    if must_have is not None and (
+        not isinstance(must_have, list) or not all(isinstance(term, str) for term in must_have)
+    ):
+        raise ValueError("must_have must be a list of strings")
+    if shortlist_size is None:
+        shortlist_size = SEARCH_SHORTLIST_SIZE
+    corpus = get_corpus()
+    profile = build_job_profile(jd_text)
+
+    candidates = None
+    if must_have:
+        # Stored features hold taxonomy terms under their canonical names
+        candidates = corpus.rows_with_terms(get_taxonomy_matcher().normalize(must_have))
+
+    if exhaustive:
+        rows = candidates if candidates is not None else corpus.live_rows()
+        semantic_scores = corpus.semantic_scores(profile.embedding, rows)
+        keyword_scores, role_scores = corpus.lexical_scores(profile, rows)
+        combined = combine_scores(
+            semantic_scores, keyword_scores, role_scores, profile.has_role_requirement, weights
+        )
+        best = top_k_indices(combined["final_score"], top_k)
+        records = corpus.get_rows(rows[best])
+        ranked = [(records[int(rows[i])], scores_at(combined, i)) for i in best]
+        return profile, ranked
+
+    shortlist_size = max(shortlist_size, top_k)
+    if candidates is not None:
+        semantic_scores = corpus.semantic_scores(profile.embedding, candidates)
+        best = top_k_indices(semantic_scores, shortlist_size)
+        rows, semantic_scores = candidates[best], semantic_scores[best]
+    else:
+        rows, semantic_scores = corpus.search(profile.embedding, shortlist_size)
+
+    records = corpus.get_rows(rows)
+    shortlist = [
+        score_features(profile, semantic_score, DocumentFeatures(*records[int(row)]["features"]), weights)
+        for row, semantic_score in zip(rows, semantic_scores)
+    ]
+    final_scores = np.array([scores["final_score"] for scores in shortlist], dtype=np.float64)
+    ranked = [(records[int(rows[i])], shortlist[i]) for i in top_k_indices(final_scores, top_k)]
+    return profile, ranked
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint with API documentation"""
     return jsonify({
         "message": "Resume Matching API",
         "endpoints": {
-            "/health": "GET - Health check endpoint",
-            "/match": "POST - Match resumes against job description"
+            "/health": "GET - Liveness check endpoint",
+            "/ready": "GET - Readiness check, 200 once models are loaded",
+            "/stats": "GET - Feature cache statistics",
+            "/metrics": "GET - Prometheus metrics (request latency, stage durations, batch sizes)",
+            "/match": "POST - Match resumes against job description",
+            "/match/matrix": "POST - Match resumes against many job descriptions at once",
+            "/rescore": "POST - Re-rank returned score components under new weight sets",
+            "/resumes": "POST - Add resumes to the stored corpus",
+            "/resumes/<id>": "DELETE - Remove a resume from the stored corpus",
+            "/search": "POST - Find the top-k stored resumes for a job description",
+            "/jobs": "POST - Queue a background match job for a large batch",
+            "/jobs/<id>": "GET - Job status, progress and ETA",
+            "/jobs/<id>/results": "GET - Page of a job's ranked matches"
         },
         "example_request": {
             "url": "/match",
@@ -261,55 +942,712 @@ def index():
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Liveness check endpoint: the process is up, models may still be loading"""
     return jsonify({"status": "healthy"})
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check endpoint: 200 only once every model is loaded"""
+    if not models.ready:
+        return jsonify({"status": "loading", "models": models.status()}), 503
+    return jsonify({"status": "ready", "models": models.status()})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Feature cache hit/miss counters and embedding micro-batch sizes"""
+    result = {"feature_cache": feature_cache.stats()}
+    if embedding_batcher is not None:
+        result["embedding_batcher"] = embedding_batcher.stats()
+    return jsonify(result)
+
+@metrics.collector
+def _cache_and_model_metrics():
+    cache = feature_cache.stats()
+    return [
+        ("feature_cache_lookups_total", "counter", "Feature cache lookups by result", {
+            (("result", "memory_hit"),): cache["memory_hits"],
+            (("result", "disk_hit"),): cache["disk_hits"],
+            (("result", "miss"),): cache["misses"]
+        }),
+        ("feature_cache_entries", "gauge", "Feature cache entries by tier", {
+            (("tier", "memory"),): cache["memory_entries"],
+            (("tier", "disk"),): cache["disk_entries"]
+        }),
+        ("model_load_seconds", "gauge", "Time taken to load each model", {
+            (("model", name),): seconds for name, seconds in models.load_seconds.items()
+        })
+    ]
+
+def wants_debug_timings(headers):
+    return headers.get(DEBUG_TIMINGS_HEADER, "").lower() in ("1", "true", "yes")
+
+def timings_field(timings, total_seconds):
+    """The "timings" object of a debug response: seconds per stage plus the total."""
+    fields = {stage: round(seconds, 6) for stage, seconds in sorted(timings.items())}
+    fields["total"] = round(total_seconds, 6)
+    return fields
+
+@app.before_request
+def _start_request_metrics():
+    g.request_started = time.perf_counter()
+    if wants_debug_timings(request.headers):
+        g.timings, g.timings_token = start_timings()
+
+@app.after_request
+def _record_request_metrics(response):
+    """Count the request and, for debug requests, add the stage timings to a JSON body.
+    Streamed responses are timed until streaming starts."""
+    seconds = time.perf_counter() - g.request_started
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    http_requests.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    http_request_seconds.observe(seconds, endpoint=endpoint)
+
+    timings = g.get("timings")
+    if timings is not None and response.is_json and not response.is_streamed:
+        body = response.get_json()
+        if isinstance(body, dict):
+            body["timings"] = timings_field(timings, seconds)
+            response.set_data(json.dumps(body))
+    return response
+
+@app.teardown_request
+def _stop_request_timings(exc):
+    token = g.pop("timings_token", None)
+    if token is not None:
+        stop_timings(token)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics: request counts and latency, per-stage durations, batch sizes, cache hits"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+def _match_result(index, scores, resume_id, name):
+    return {
+        "index": index,
+        "similarity": float(scores["final_score"]),
+        "semantic_score": float(scores["semantic_score"]),
+        "keyword_score": float(scores["keyword_score"]),
+        "role_score": float(scores["role_score"]),
+        "id": resume_id,
+        "name": name
+    }
+
+def iter_archive_scores(profile, fileobj, weights=None):
+    """Score the resumes in a ZIP/tar archive ARCHIVE_CHUNK_SIZE members at a time.
+
+    Yields:
+        tuple: (results as returned by /match, list of {"name", "error"} for
+        skipped files) for each chunk; result indexes count across chunks.
+    """
+    scored = 0
+    chunks = iter_archive_texts(
+        fileobj,
+        chunk_size=ARCHIVE_CHUNK_SIZE,
+        max_member_bytes=int(PDF_MAX_MB * 1e6),
+        max_workers=PDF_WORKERS,
+        max_pages=PDF_MAX_PAGES,
+        timeout=PDF_TIMEOUT
+    )
+    for chunk in chunks:
+        extracted = []
+        errors = []
+        for member in chunk:
+            if member.error or not member.text:
+                errors.append({"name": member.name, "error": member.error or "No text found"})
+            else:
+                extracted.append(member)
+        all_scores = score_resumes(profile, [member.text for member in extracted], weights=weights)
+        results = []
+        for member, scores in zip(extracted, all_scores):
+            results.append(_match_result(scored, scores, member.name, os.path.basename(member.name)))
+            scored += 1
+        yield results, errors
+
+def score_archive(profile, fileobj, weights=None, top_k=None):
+    """Score every resume in a ZIP/tar archive, streaming it ARCHIVE_CHUNK_SIZE members at a time.
+
+    Returns:
+        tuple: (results as returned by /match, best first, and only the
+        top_k best if given; list of {"name", "error"} for skipped files;
+        number of resumes scored)
+    """
+    best = TopK(top_k) if top_k is not None else None
+    results = []
+    errors = []
+    total = 0
+    for chunk_results, chunk_errors in iter_archive_scores(profile, fileobj, weights):
+        errors.extend(chunk_errors)
+        total += len(chunk_results)
+        if best is None:
+            results.extend(chunk_results)
+            continue
+        for result in chunk_results:
+            best.push(result["similarity"], result)
+    if best is not None:
+        return best.items(), errors, total
+    results.sort(key=lambda x: x["similarity"], reverse=True)
+    return results, errors, total
+
+def _corpus_result(record, scores):
+    return {
+        "similarity": float(scores["final_score"]),
+        "semantic_score": float(scores["semantic_score"]),
+        "keyword_score": float(scores["keyword_score"]),
+        "role_score": float(scores["role_score"]),
+        "id": record["id"],
+        "name": record["name"]
+    }
+
+def iter_corpus_scores(profile, resume_ids=None, chunk_size=None):
+    """Score stored corpus resumes (all of them if resume_ids is None) JOB_CHUNK_SIZE at a time.
+
+    Embeddings and features come from the corpus, so no model runs per
+    resume. Yields (results, skipped) per chunk; ids that are not in the
+    corpus are reported as skipped.
+    """
+    chunk_size = chunk_size or JOB_CHUNK_SIZE
+    corpus = get_corpus()
+    skipped = []
+    if resume_ids is None:
+        rows = corpus.live_rows()
+    else:
+        found = corpus.rows_for_ids(resume_ids)
+        rows = np.array(sorted(found.values()), dtype=np.int64)
+        skipped = [
+            {"name": resume_id, "error": "Not in the resume corpus"}
+            for resume_id in resume_ids if resume_id not in found
+        ]
+    yield [], skipped
+
+    # Keyword and role scores for every requested row cost one set of posting merges
+    keyword_scores, role_scores = corpus.lexical_scores(profile, rows)
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        combined = combine_scores(
+            corpus.semantic_scores(profile.embedding, chunk),
+            keyword_scores[start:start + chunk_size],
+            role_scores[start:start + chunk_size],
+            profile.has_role_requirement
+        )
+        records = corpus.get_rows(chunk)
+        yield [_corpus_result(records[int(row)], scores_at(combined, i)) for i, row in enumerate(chunk)], []
+
+def iter_resume_scores(profile, resumes, chunk_size=None):
+    """Score /match resume dicts MATCH_STREAM_CHUNK_SIZE at a time, yielding (results, no errors) per chunk."""
+    chunk_size = chunk_size or MATCH_STREAM_CHUNK_SIZE
+    for start in range(0, len(resumes), chunk_size):
+        chunk = resumes[start:start + chunk_size]
+        all_scores = score_resumes(profile, [resume.get("text", "") for resume in chunk])
+        yield [
+            _match_result(start + i, scores, resume.get("id"), resume.get("name"))
+            for i, (resume, scores) in enumerate(zip(chunk, all_scores))
+        ], []
+
+def run_match_job(payload, set_total):
+    """JobQueue runner: score a job's resumes chunk by chunk.
+
+    The payload holds "jd" and one of "archive_path" (an uploaded archive,
+    deleted by finish_match_job), "resumes" (resume dicts as for /match) or
+    "resume_ids" (stored corpus resumes; null means the whole corpus).
+    """
+    profile = build_job_profile(payload["jd"])
+    if "archive_path" in payload:
+        with open(payload["archive_path"], "rb") as f:
+            set_total(count_archive_members(f))
+            yield from iter_archive_scores(profile, f)
+    elif "resumes" in payload:
+        set_total(len(payload["resumes"]))
+        yield from iter_resume_scores(profile, payload["resumes"], JOB_CHUNK_SIZE)
+    else:
+        resume_ids = payload.get("resume_ids")
+        set_total(len(resume_ids) if resume_ids is not None else len(get_corpus()))
+        yield from iter_corpus_scores(profile, resume_ids)
+
+def finish_match_job(payload):
+    """JobQueue on_finish hook: delete a finished job's uploaded archive.
+
+    Only called for jobs marked done or failed by the worker holding their
+    lease, so a job re-queued after its lease expired keeps its archive.
+    """
+    if "archive_path" in payload:
+        try:
+            os.remove(payload["archive_path"])
+        except FileNotFoundError:
+            pass
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """The background job queue, opened (and its workers started) on first use."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                os.makedirs(os.path.join(JOBS_PATH, "uploads"), exist_ok=True)
+                queue = JobQueue(
+                    os.path.join(JOBS_PATH, "jobs.sqlite3"),
+                    run_match_job,
+                    workers=JOB_WORKERS,
+                    lease_seconds=JOB_LEASE_SECONDS,
+                    on_finish=finish_match_job
+                )
+                queue.start()
+                _job_queue = queue
+    return _job_queue
+
+def _top_k_param(value, default=None):
+    """Parse an optional top_k request value; None means rank everything."""
+    if value is None or value == "":
+        return default
+    top_k = int(value)
+    if top_k < 0:
+        raise ValueError("top_k must not be negative")
+    return top_k
+
+def wants_stream(stream_param, accept_header):
+    """Whether a /match request asks for NDJSON: ?stream=1, or an Accept header
+    preferring application/x-ndjson to application/json by q-value (shared by
+    the Flask and ASGI apps so both negotiate alike)."""
+    if (stream_param or "").lower() in ("1", "true", "yes"):
+        return True
+    best = parse_accept_header(accept_header, MIMEAccept).best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+def _wants_stream():
+    return wants_stream(request.args.get("stream"), request.headers.get("Accept"))
+
+def _ndjson(record):
+    return json.dumps(record) + "\n"
+
+def ndjson_lines(profile, chunks, top_k):
+    """Streamed /match body: one {"type": "match"} line per resume as its
+    chunk is scored, then a {"type": "summary"} line with the top_k matches.
+
+    Only the current chunk and a top_k heap are held in memory. A failure
+    after the first line is reported as a final {"type": "error"} line,
+    since the status code has already been sent.
+    """
+    best = TopK(top_k)
+    total = 0
+    skipped = []
+    try:
+        for results, errors in chunks:
+            skipped.extend(errors)
+            lines = []
+            for result in results:
+                total += 1
+                lines.append(_ndjson({"type": "match", **result}))
+                best.push(result["similarity"], result)
+            yield "".join(lines)
+    except Exception as e:
+        logger.exception("Streaming /match failed")
+        yield _ndjson({"type": "error", "error": str(e)})
+        return
+
+    summary = {
+        "type": "summary",
+        "matches": best.items(),
+        "total_resumes": total,
+        "has_role_requirement": profile.has_role_requirement
+    }
+    if skipped:
+        summary["skipped"] = skipped
+    yield _ndjson(summary)
+
+def _stream_matches(profile, chunks, top_k):
+    return Response(stream_with_context(ndjson_lines(profile, chunks, top_k)), mimetype="application/x-ndjson")
+
+def _store_components(combined, resumes):
+    """Keep a scored batch's component matrix for /rescore; returns the response field."""
+    components_id = component_store.put(
+        component_matrix(combined),
+        [{"id": resume.get("id"), "name": resume.get("name")} for resume in resumes]
+    )
+    return {"id": components_id, "columns": list(COLUMNS)}
+
+def _job_profile_for_match(data):
+    jd_text = data.get("jd")
+    if not jd_text or not data.get("resumes"):
+        raise ValueError("Missing required fields: jd and resumes")
+    return build_job_profile(jd_text)
+
+def match_resumes(data):
+    """/match for a parsed JSON body, shared by the Flask and ASGI apps.
+
+    Raises:
+        ValueError: If the body is missing fields or has a bad top_k.
+
+    Returns:
+        dict: The /match response body.
+    """
+    # Analyze the JD once and score all resumes against it in one batched pass
+    profile = _job_profile_for_match(data)
+    resumes = data["resumes"]
+    resume_texts = [resume.get("text", "") for resume in resumes]
+    combined = score_resume_arrays(profile, resume_texts)
+
+    # Rank on the score array; result objects are built for the top_k only
+    results = []
+    with metrics.stage("ranking"):
+        for i in rank_indices(combined["final_score"], _top_k_param(data.get("top_k"))):
+            resume = resumes[i]
+            results.append(_match_result(int(i), scores_at(combined, i), resume.get("id"), resume.get("name")))
+
+    response = {
+        "matches": results,
+        "total_resumes": len(resumes),
+        "has_role_requirement": profile.has_role_requirement
+    }
+    if data.get("return_components"):
+        response["components"] = _store_components(combined, resumes)
+    return response
+
+def match_resumes_stream(data):
+    """Streamed /match for a parsed JSON body: validates and analyzes the JD
+    up front (so bad input raises before streaming), then returns the
+    generator of NDJSON lines."""
+    profile = _job_profile_for_match(data)
+    top_k = _top_k_param(data.get("top_k"), MATCH_STREAM_TOP_K)
+    return ndjson_lines(profile, iter_resume_scores(profile, data["resumes"]), top_k)
+
+def _match_archive(jd_text, archive):
+    """/match for a multipart upload with a "jd" field and an "archive" file"""
+    if not jd_text:
+        return jsonify({"error": "Missing required fields: jd and archive"}), 400
+
+    profile = build_job_profile(jd_text)
+    if _wants_stream():
+        top_k = _top_k_param(request.form.get("top_k"), MATCH_STREAM_TOP_K)
+        # Flask closes uploaded files when the view returns, before a streamed
+        # body is generated, so the response keeps its own temporary copy
+        upload = tempfile.TemporaryFile()
+        archive.save(upload)
+        upload.seek(0)
+        response = _stream_matches(profile, iter_archive_scores(profile, upload), top_k)
+        response.call_on_close(upload.close)
+        return response
+    # Werkzeug spools large uploads to a temporary file, so this streams from disk
+    top_k = _top_k_param(request.form.get("top_k"))
+    results, errors, total = score_archive(profile, archive.stream, top_k=top_k)
+
+    with metrics.stage("serialize"):
+        return jsonify({
+            "matches": results,
+            "total_resumes": total,
+            "skipped": errors,
+            "has_role_requirement": profile.has_role_requirement
+        })
+
 @app.route('/match', methods=['POST'])
 def match():
     """
-    Match resumes against a job description using hybrid scoring
+    Match resumes against a job description using hybrid scoring.
+    Accepts either a JSON body or a multipart upload of a ZIP/tar archive
+    of resumes ("archive" file plus "jd" form field). With
+    "Accept: application/x-ndjson" or ?stream=1 the scores are streamed
+    as NDJSON while they are computed.
     """
     try:
+        if "archive" in request.files:
+            return _match_archive(request.form.get("jd"), request.files["archive"])
+
         data = request.get_json()
-        jd_text = data.get("jd")
+        if _wants_stream():
+            lines = match_resumes_stream(data)
+            return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+        result = match_resumes(data)
+        with metrics.stage("serialize"):
+            return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/match/matrix', methods=['POST'])
+def match_matrix():
+    """
+    Match one pool of resumes against many job descriptions at once,
+    returning a ranking (optionally only the top_k) per job description
+    """
+    try:
+        data = request.get_json()
+        jds = data.get("jds", [])
         resumes = data.get("resumes", [])
 
-        if not jd_text or not resumes:
-            return jsonify({"error": "Missing required fields: jd and resumes"}), 400
+        if not jds or not resumes:
+            return jsonify({"error": "Missing required fields: jds and resumes"}), 400
 
-        # Extract roles from JD once
-        jd_roles = extract_role_keywords(jd_text)
-        has_role_requirement = bool(jd_roles)
+        # Job descriptions may be plain strings or {"id", "text"} objects
+        jds = [jd if isinstance(jd, dict) else {"text": jd} for jd in jds]
+        if not all(jd.get("text") for jd in jds):
+            return jsonify({"error": "Every job description needs a non-empty text"}), 400
+        top_k = _top_k_param(data.get("top_k"))
 
-        results = []
-        for i, resume in enumerate(resumes):
-            resume_text = resume.get("text", "")
-            scores = calculate_hybrid_score(resume_text, jd_text)
-            
-            results.append({
-                "index": i,
-                "similarity": float(scores["final_score"]),
-                "semantic_score": float(scores["semantic_score"]),
-                "keyword_score": float(scores["keyword_score"]),
-                "role_score": float(scores["role_score"]),
-                "id": resume.get("id"),
-                "name": resume.get("name")
+        profiles = build_job_profiles([jd["text"] for jd in jds])
+        all_scores = score_matrix(profiles, [resume.get("text", "") for resume in resumes])
+
+        rankings = []
+        for j, (jd, profile, combined) in enumerate(zip(jds, profiles, all_scores)):
+            matches = []
+            for i in rank_indices(combined["final_score"], top_k):
+                resume = resumes[i]
+                matches.append(_match_result(int(i), scores_at(combined, i), resume.get("id"), resume.get("name")))
+            ranking = {
+                "jd_index": j,
+                "jd_id": jd.get("id"),
+                "has_role_requirement": profile.has_role_requirement,
+                "matches": matches
+            }
+            if data.get("return_components"):
+                ranking["components"] = _store_components(combined, resumes)
+            rankings.append(ranking)
+
+        return jsonify({
+            "rankings": rankings,
+            "total_jds": len(jds),
+            "total_resumes": len(resumes)
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def rescore(data):
+    """/rescore for a parsed JSON body, shared by the Flask and ASGI apps.
+
+    Raises:
+        KeyError: If components_id is unknown or was evicted.
+        ValueError: If the body is missing fields or has bad weights.
+
+    Returns:
+        dict: The /rescore response body.
+    """
+    if data.get("components_id"):
+        entry = component_store.get(data["components_id"])
+        if entry is None:
+            raise KeyError(data["components_id"])
+        components, resumes = entry
+    elif data.get("components") is not None:
+        components = as_component_matrix(data["components"])
+        ids = data.get("ids") or [None] * len(components)
+        if len(ids) != len(components):
+            raise ValueError("ids must have one entry per components row")
+        resumes = [{"id": resume_id, "name": None} for resume_id in ids]
+    else:
+        raise ValueError("Missing required field: components_id or components")
+
+    weight_sets = data.get("weight_sets") or [data.get("weights") or {}]
+    if not isinstance(weight_sets, list) or not all(isinstance(weights, dict) for weights in weight_sets):
+        raise ValueError("weight_sets must be a list of weight objects")
+    top_k = _top_k_param(data.get("top_k"))
+
+    rankings = []
+    for weights, indices, finals in rescore_components(components, weight_sets, top_k):
+        matches = []
+        for i, final_score in zip(indices, finals):
+            semantic_score, keyword_score, role_score, _ = components[i]
+            matches.append({
+                "index": int(i),
+                "similarity": float(final_score),
+                "semantic_score": float(semantic_score),
+                "keyword_score": float(keyword_score),
+                "role_score": float(role_score),
+                "id": resumes[i]["id"],
+                "name": resumes[i]["name"]
             })
+        rankings.append({"weights": weights, "matches": matches})
+    return {"rankings": rankings, "total_resumes": len(components)}
+
+@app.route('/rescore', methods=['POST'])
+def rescore_matches():
+    """
+    Re-rank a scored batch under one or many weight sets from its stored
+    (or posted) component matrix, without running the models again
+    """
+    try:
+        return jsonify(rescore(request.get_json()))
+
+    except KeyError as e:
+        return jsonify({"error": f"Components not found (unknown or evicted): {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/resumes', methods=['POST'])
+def add_resumes():
+    """
+    Add resumes to the stored corpus so they can be searched later
+    """
+    try:
+        data = request.get_json()
+        resumes = data.get("resumes", [])
 
-        # Sort results by final similarity score
-        results.sort(key=lambda x: x["similarity"], reverse=True)
+        if not resumes:
+            return jsonify({"error": "Missing required field: resumes"}), 400
+
+        ids = add_resumes_to_corpus(resumes)
+        return jsonify({"ids": ids, "total_resumes": len(get_corpus())}), 201
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/resumes/<resume_id>', methods=['DELETE'])
+def delete_resume(resume_id):
+    """
+    Remove a resume from the stored corpus
+    """
+    if not get_corpus().delete(resume_id):
+        return jsonify({"error": f"Resume not found: {resume_id}"}), 404
+    return jsonify({"deleted": resume_id, "total_resumes": len(get_corpus())})
+
+@app.route('/search', methods=['POST'])
+def search():
+    """
+    Return the top-k stored resumes for a job description: semantic
+    prefilter over the corpus, then hybrid rescoring of the shortlist.
+    Optional "must_have" terms prune the corpus first; "exhaustive"
+    scores every remaining resume instead of a shortlist.
+    """
+    try:
+        data = request.get_json()
+        jd_text = data.get("jd")
+        top_k = _top_k_param(data.get("top_k"), 10)
+        shortlist_size = data.get("shortlist_size")
+        must_have = data.get("must_have", [])
+
+        if not jd_text:
+            return jsonify({"error": "Missing required field: jd"}), 400
+
+        profile, ranked = search_corpus(
+            jd_text,
+            top_k=top_k,
+            shortlist_size=int(shortlist_size) if shortlist_size is not None else None,
+            must_have=must_have,
+            exhaustive=bool(data.get("exhaustive", False))
+        )
+
+        results = [_corpus_result(record, scores) for record, scores in ranked]
 
         return jsonify({
             "matches": results,
-            "total_resumes": len(resumes),
-            "has_role_requirement": has_role_requirement
+            "total_resumes": len(get_corpus()),
+            "has_role_requirement": profile.has_role_requirement
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a background match job. JSON body with "jd" and either
+    "resumes" (as for /match) or "resume_ids" (stored corpus resumes,
+    omitted for the whole corpus), or a multipart upload of a "jd" field
+    and an "archive" file.
+    """
+    try:
+        if "archive" in request.files:
+            jd_text = request.form.get("jd")
+            if not jd_text:
+                return jsonify({"error": "Missing required fields: jd and archive"}), 400
+            queue = get_job_queue()
+            path = os.path.join(JOBS_PATH, "uploads", uuid.uuid4().hex)
+            request.files["archive"].save(path)
+            payload = {"jd": jd_text, "archive_path": path, "archive_name": request.files["archive"].filename}
+        else:
+            data = request.get_json()
+            jd_text = data.get("jd")
+            if not jd_text:
+                return jsonify({"error": "Missing required field: jd"}), 400
+            payload = {"jd": jd_text}
+            if "resumes" in data:
+                payload["resumes"] = data["resumes"]
+            else:
+                resume_ids = data.get("resume_ids")
+                payload["resume_ids"] = [str(resume_id) for resume_id in resume_ids] if resume_ids is not None else None
+            queue = get_job_queue()
+
+        job_id = queue.submit(payload)
+        return jsonify({
+            "id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "results_url": f"/jobs/{job_id}/results"
+        }), 202
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Job status and progress: resumes processed, throughput and ETA"""
+    try:
+        job = get_job_queue().get(job_id)
+        if job is None:
+            return jsonify({"error": f"Job not found: {job_id}"}), 404
+        return jsonify(job)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """A page of a job's ranked matches (?offset=0&limit=100)"""
+    try:
+        queue = get_job_queue()
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify({"error": f"Job not found: {job_id}"}), 404
+        offset = int(request.args.get("offset", 0))
+        limit = min(int(request.args.get("limit", 100)), 1000)
+        if offset < 0 or limit < 0:
+            raise ValueError("offset and limit must not be negative")
+
+        matches = queue.results(job_id, offset=offset, limit=limit)
+        for rank, result in enumerate(matches, start=offset + 1):
+            result["rank"] = rank
+        return jsonify({
+            "id": job_id,
+            "status": job["status"],
+            "processed": job["processed"],
+            "offset": offset,
+            "limit": limit,
+            "matches": matches
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def resume_pending_jobs():
+    """Start the job workers at start-up if earlier jobs may still be queued."""
+    if os.path.exists(os.path.join(JOBS_PATH, "jobs.sqlite3")):
+        get_job_queue()
+
+# Only when imported as the app module (e.g. by gunicorn): under `python app.py`
+# the PDF extraction processes re-import this file as __mp_main__
+if MODEL_WARM_UP and __name__ == 'app':
+    check_corpus_features()
+    models.warm_up_in_background()
+    resume_pending_jobs()
+
 if __name__ == '__main__':
-    port = int(os.getenv('PORT', 5000))
-    print(f"Starting server on port {port}...")
-    print("API Documentation available at: http://localhost:5000/")
-    app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] == ["reextract-corpus"]:
+        print(f"Re-extracted the features of {reextract_corpus()} stored resumes ({FEATURES_VERSION})")
+        sys.exit(0)
+    check_corpus_features()
+    models.warm_up_in_background()
+    resume_pending_jobs()
+    print(f"Starting server on port {PORT}...")
+    print(f"API Documentation available at: http://localhost:{PORT}/")
+    app.run(host='0.0.0.0', port=PORT, debug=False) 
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""Streaming ingestion of resume archives (ZIP or tar, optionally compressed).
+
+Members are decompressed one at a time and text-extracted in small
+chunks, so a thousand-resume archive is scored without ever holding all
+of its PDFs (or texts) in memory at once.
+"""
+import os
+import tarfile
+import zipfile
+import zlib
+from typing import NamedTuple
+
+from pdf_extraction import ExtractionResult, extract_texts
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+RESUME_EXTENSIONS = (".pdf", ".txt")
+
+
+class ArchiveMember(NamedTuple):
+    """One resume file read from an archive; `error` is set if it was skipped."""
+    name: str
+    data: bytes
+    error: str
+
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_resume(name):
+    base = os.path.basename(name)
+    # Skip macOS resource forks and hidden files that archivers add
+    return (
+        not base.startswith(".")
+        and "__MACOSX/" not in name
+        and base.lower().endswith(RESUME_EXTENSIONS)
+    )
+
+
+def _too_large(name, size, limit):
+    return ArchiveMember(name, b"", f"File is {size / 1e6:.1f} MB, limit is {limit / 1e6:.1f} MB")
+
+
+def _corrupt(name, error):
+    return ArchiveMember(name, b"", f"Corrupt archive member: {error}")
+
+
+def iter_archive_members(fileobj, max_member_bytes=None):
+    """Yield an ArchiveMember for every resume file in a ZIP or tar archive.
+
+    ZIP archives need a seekable file object; tar archives are read as a
+    forward-only stream, so they also work on non-seekable uploads. A
+    member that cannot be decompressed is yielded with an error; in a tar
+    stream nothing after it can be read, so it is the last one.
+    """
+    seekable = hasattr(fileobj, "seekable") and fileobj.seekable()
+    if seekable and zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_resume(info.filename):
+                    continue
+                if max_member_bytes and info.file_size > max_member_bytes:
+                    yield _too_large(info.filename, info.file_size, max_member_bytes)
+                    continue
+                try:
+                    data = archive.read(info)
+                except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+                    yield _corrupt(info.filename, e)
+                    continue
+                yield ArchiveMember(info.filename, data, None)
+        return
+
+    if seekable:
+        fileobj.seek(0)
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode="r|*")
+    except tarfile.TarError as e:
+        raise ValueError(f"Unsupported archive, expected ZIP or tar: {e}")
+    with archive:
+        for member in archive:
+            if not member.isfile() or not _is_resume(member.name):
+                continue
+            if max_member_bytes and member.size > max_member_bytes:
+                yield _too_large(member.name, member.size, max_member_bytes)
+                continue
+            try:
+                data = archive.extractfile(member).read()
+            except (tarfile.TarError, zlib.error, EOFError, OSError) as e:
+                yield _corrupt(member.name, e)
+                return
+            yield ArchiveMember(member.name, data, None)
+
+
+def count_archive_members(fileobj):
+    """Number of resume files in a ZIP archive, from its central directory.
+
+    Returns None for tar archives, which can only be counted by reading
+    them through; the file position is reset either way.
+    """
+    if not zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        return None
+    fileobj.seek(0)
+    with zipfile.ZipFile(fileobj) as archive:
+        count = sum(1 for info in archive.infolist() if not info.is_dir() and _is_resume(info.filename))
+    fileobj.seek(0)
+    return count
+
+
+def iter_archive_texts(fileobj, chunk_size=64, max_member_bytes=None, **extract_options):
+    """Yield lists of up to chunk_size ExtractionResults for the resumes in an archive.
+
+    PDFs go through pdf_extraction.extract_texts (extract_options are passed
+    on, e.g. max_workers, max_pages, timeout); .txt members are decoded as
+    UTF-8. Only one chunk of member bytes is held at a time.
+    """
+    chunk = []
+    for member in iter_archive_members(fileobj, max_member_bytes=max_member_bytes):
+        chunk.append(member)
+        if len(chunk) >= chunk_size:
+            yield _extract_chunk(chunk, extract_options)
+            chunk = []
+    if chunk:
+        yield _extract_chunk(chunk, extract_options)
+
+
+def read_archive_members(fileobj, names):
+    """Return {name: bytes} for the given member names, e.g. to offer top resumes for download."""
+    wanted = set(names)
+    found = {}
+    for member in iter_archive_members(fileobj):
+        if member.name in wanted and member.error is None:
+            found[member.name] = member.data
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def _extract_chunk(members, extract_options):
+    results = [None] * len(members)
+    pdfs = []
+    for i, member in enumerate(members):
+        if member.error:
+            results[i] = ExtractionResult(member.name, "", 0, 0.0, member.error)
+        elif member.name.lower().endswith(".txt"):
+            results[i] = ExtractionResult(member.name, member.data.decode("utf-8", errors="replace"), 0, 0.0, None)
+        else:
+            pdfs.append(i)
+    extracted = extract_texts([(members[i].name, members[i].data) for i in pdfs], **extract_options)
+    for i, result in zip(pdfs, extracted):
+        results[i] = result
+    return results
@@ -0,0 +1,233 @@
+"""Async (ASGI) serving mode for the matching API.
+
+Serves the same /match, /rescore, /health, /ready, /stats and /metrics contract as the Flask app
+from a single process: the event loop only parses requests and writes
+responses, while scoring runs on a bounded thread pool that shares one
+loaded copy of the spaCy and sentence-transformer models. Requests
+beyond the pool size wait in a bounded queue; when that is full the
+server answers 429 instead of piling up work.
+
+Run with:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import contextlib
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app import (
+    MODEL_WARM_UP, embedding_batcher, feature_cache, http_request_seconds, http_requests, match_resumes,
+    match_resumes_stream, metrics, models, rescore, timings_field, wants_debug_timings, wants_stream
+)
+
+# Scoring requests run at the same time (threads sharing the models)
+ASGI_CONCURRENCY = int(os.getenv('ASGI_CONCURRENCY', 4))
+# Further requests allowed to wait for a thread before answering 429
+ASGI_QUEUE_SIZE = int(os.getenv('ASGI_QUEUE_SIZE', 32))
+
+executor = ThreadPoolExecutor(max_workers=ASGI_CONCURRENCY, thread_name_prefix="scoring")
+
+
+class RequestLimiter:
+    """Counts scoring requests admitted (running or queued) on the event loop thread."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+
+    def try_acquire(self):
+        if self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+
+limiter = RequestLimiter(ASGI_CONCURRENCY + ASGI_QUEUE_SIZE)
+
+
+def _observed(handler):
+    """Count requests and their latency in the shared metrics, like the Flask app's hooks."""
+    @functools.wraps(handler)
+    async def observed(request):
+        started = time.perf_counter()
+        response = await handler(request)
+        http_requests.inc(endpoint=request.url.path, method=request.method, status=str(response.status_code))
+        http_request_seconds.observe(time.perf_counter() - started, endpoint=request.url.path)
+        return response
+    return observed
+
+
+def _with_timings(timings, fn, *args):
+    """Run fn on an executor thread, collecting its stage timings if requested."""
+    if timings is None:
+        return fn(*args)
+    with metrics.request_timings(timings):
+        return fn(*args)
+
+
+def _busy():
+    return JSONResponse({"error": "Server busy, retry later"}, status_code=429, headers={"Retry-After": "1"})
+
+
+def _wants_stream(request):
+    return wants_stream(request.query_params.get("stream"), request.headers.get("accept"))
+
+
+async def health_check(request):
+    """Liveness check endpoint: the process is up, models may still be loading"""
+    return JSONResponse({"status": "healthy"})
+
+
+async def readiness_check(request):
+    """Readiness check endpoint: 200 only once every model is loaded"""
+    if not models.ready:
+        return JSONResponse({"status": "loading", "models": models.status()}, status_code=503)
+    return JSONResponse({
+        "status": "ready",
+        "models": models.status(),
+        "scoring": {"in_flight": limiter.in_flight, "limit": limiter.limit, "threads": ASGI_CONCURRENCY}
+    })
+
+
+async def stats(request):
+    """Feature cache hit/miss counters and embedding micro-batch sizes"""
+    result = {"feature_cache": feature_cache.stats()}
+    if embedding_batcher is not None:
+        result["embedding_batcher"] = embedding_batcher.stats()
+    return JSONResponse(result)
+
+
+async def metrics_endpoint(request):
+    """Prometheus metrics: request counts and latency, per-stage durations, batch sizes, cache hits"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+class NDJSONStream:
+    """Advances an NDJSON line generator on the executor, one chunk at a time.
+
+    Holds its request's limiter slot until close() and, if a chunk is
+    still being scored on the executor then, until that chunk is done,
+    so admitted requests keep bounding executor load.
+    """
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._pending = None
+        self._closed = False
+
+    async def chunks(self):
+        while True:
+            self._pending = executor.submit(next, self._lines, None)
+            line = await asyncio.wrap_future(self._pending)
+            if line is None:
+                break
+            yield line
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._pending is not None and not self._pending.done():
+            loop = asyncio.get_running_loop()
+            self._pending.add_done_callback(lambda _: loop.call_soon_threadsafe(self._finish))
+        else:
+            self._finish()
+
+    def _finish(self):
+        self._lines.close()
+        limiter.release()
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streams an NDJSONStream and closes it however sending ends: finished,
+    failed or the client gone, even before the body was started."""
+
+    def __init__(self, stream):
+        super().__init__(stream.chunks(), media_type="application/x-ndjson")
+        self.stream = stream
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.stream.close()
+
+
+async def match(request):
+    """
+    Match resumes against a job description using hybrid scoring (JSON
+    body, optionally streamed as NDJSON), with scoring on the executor
+    """
+    if not limiter.try_acquire():
+        return _busy()
+    streaming = False
+    started = time.perf_counter()
+    try:
+        data = await request.json()
+        loop = asyncio.get_running_loop()
+        if _wants_stream(request):
+            lines = await loop.run_in_executor(executor, match_resumes_stream, data)
+            streaming = True
+            return NDJSONResponse(NDJSONStream(lines))
+        timings = {} if wants_debug_timings(request.headers) else None
+        result = await loop.run_in_executor(executor, _with_timings, timings, match_resumes, data)
+        if timings is not None:
+            result["timings"] = timings_field(timings, time.perf_counter() - started)
+        with metrics.stage("serialize"):
+            return JSONResponse(result)
+
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        # A streamed response releases its slot when its stream is closed
+        if not streaming:
+            limiter.release()
+
+
+async def rescore_matches(request):
+    """Re-rank a scored batch under one or many weight sets from its component matrix"""
+    try:
+        data = await request.json()
+        # Pure NumPy, but large matrices still take a moment: keep the loop free
+        loop = asyncio.get_running_loop()
+        return JSONResponse(await loop.run_in_executor(executor, rescore, data))
+
+    except KeyError as e:
+        return JSONResponse({"error": f"Components not found (unknown or evicted): {e.args[0]}"}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # app.py already started warming up on import when MODEL_WARM_UP is set
+    if not MODEL_WARM_UP:
+        models.warm_up_in_background()
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health_check, methods=["GET"]),
+        Route("/ready", readiness_check, methods=["GET"]),
+        Route("/stats", stats, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/match", _observed(match), methods=["POST"]),
+        Route("/rescore", _observed(rescore_matches), methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
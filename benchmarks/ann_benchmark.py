@@ -0,0 +1,137 @@
+"""Recall and latency of the corpus vector index backends against brute force.
+
+Builds each backend over a synthetic clustered corpus of normalized
+vectors (the shape of MiniLM resume embeddings), then reports build
+time, query latency percentiles and recall@k relative to the exact scan.
+
+    python benchmarks/ann_benchmark.py --size 1000000 --backends brute ivf hnsw
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_index import BruteForceIndex, create_vector_index  # noqa: E402
+
+
+class ArrayStore:
+    """In-memory stand-in for ResumeCorpus exposing what the indexes read."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.dim = matrix.shape[1]
+        self.rows_used = 0
+        self._live = np.zeros(len(matrix), dtype=bool)
+
+    def embeddings(self):
+        return self.matrix[:self.rows_used]
+
+    def live_mask(self):
+        return self._live[:self.rows_used]
+
+    def append(self, count):
+        self._live[self.rows_used:self.rows_used + count] = True
+        self.rows_used += count
+
+
+def synthetic_corpus(size, centres, noise, rng):
+    """Normalized vectors drawn around the given cluster centres."""
+    matrix = np.empty((size, centres.shape[1]), dtype=np.float32)
+    for start in range(0, size, 100000):
+        count = min(100000, size - start)
+        labels = rng.integers(0, len(centres), count)
+        block = centres[labels] + noise * rng.normal(size=(count, centres.shape[1])).astype(np.float32)
+        matrix[start:start + count] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return matrix
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    centres = rng.normal(size=(args.clusters, args.dim)).astype(np.float32)
+    matrix = synthetic_corpus(args.size, centres, args.noise, rng)
+    queries = synthetic_corpus(args.queries, centres, args.noise, rng)
+
+    results = {"size": args.size, "dim": args.dim, "k": args.k, "queries": args.queries, "backends": {}}
+    exact = None
+    for backend in args.backends:
+        store = ArrayStore(matrix)
+        options = {}
+        if backend == "ivf":
+            options = {"nprobe": args.nprobe}
+        elif backend == "hnsw":
+            options = {"ef_search": args.ef_search}
+        index = create_vector_index(backend, store, None, **options)
+
+        # Incremental adds, the way /resumes feeds the corpus
+        add_latencies = []
+        started = time.perf_counter()
+        for start in range(0, args.size, args.add_batch):
+            count = min(args.add_batch, args.size - start)
+            store.append(count)
+            add_started = time.perf_counter()
+            index.add(np.arange(start, start + count), matrix[start:start + count])
+            add_latencies.append((time.perf_counter() - add_started) * 1000)
+        if hasattr(index, "wait_for_training"):
+            # Queries should see the trained index, so training counts towards the build
+            index.wait_for_training()
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            rows, _ = index.search(query, args.k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append(rows)
+
+        if exact is None:
+            exact = [BruteForceIndex(store).search(query, args.k)[0] for query in queries]
+        recall = np.mean([
+            len(set(rows.tolist()) & set(truth.tolist())) / len(truth)
+            for rows, truth in zip(found, exact)
+        ])
+        results["backends"][backend] = {
+            "build_seconds": round(build_seconds, 3),
+            "add_ms_p95": round(float(np.percentile(add_latencies, 95)), 3),
+            "add_ms_max": round(float(max(add_latencies)), 3),
+            f"recall@{args.k}": round(float(recall), 4),
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+            "latency_ms_p99": round(float(np.percentile(latencies, 99)), 3)
+        }
+        print(backend, results["backends"][backend], file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--noise", type=float, default=0.3,
+                        help="Per-dimension spread around cluster centres")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--add-batch", type=int, default=10000)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--backends", nargs="+", default=["brute", "ivf", "hnsw"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Throughput and score drift of the sentence encoder backends.
+
+Encodes a fixed, seeded corpus of synthetic resumes and job descriptions
+with each backend and compares it with the first (reference) backend:
+embedding cosine to the reference, drift of the JD-resume semantic
+scores, and how many of each JD's top-k resumes are unchanged.
+
+    python embedding_backends.py export --model all-MiniLM-L6-v2 --output models/all-MiniLM-L6-v2
+    python benchmarks/embedding_backends.py --model-path models/all-MiniLM-L6-v2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import fixed_corpus  # noqa: E402
+from embedding_backends import BACKENDS, load_embedding_backend  # noqa: E402
+
+
+def encode_timed(model, texts, batch_size, repeat):
+    """(embeddings, best seconds over `repeat` runs)."""
+    best = None
+    embeddings = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        embeddings = np.asarray(
+            model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True),
+            dtype=np.float32
+        )
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return embeddings, best
+
+
+def run(args):
+    resumes = fixed_corpus(args.size, args.seed)
+    jds = fixed_corpus(args.jds, args.seed + 1, min_sentences=2, max_sentences=6)
+    results = {"size": args.size, "jds": args.jds, "k": args.k, "batch_size": args.batch_size, "backends": {}}
+
+    reference = None
+    for backend in args.backends:
+        started = time.perf_counter()
+        model = load_embedding_backend(backend, args.model, args.model_path, threads=args.threads)
+        load_seconds = time.perf_counter() - started
+        # Warm-up pass so one-off initialisation is not timed
+        model.encode(resumes[:args.batch_size], batch_size=args.batch_size)
+
+        resume_embeddings, seconds = encode_timed(model, resumes, args.batch_size, args.repeat)
+        jd_embeddings, _ = encode_timed(model, jds, args.batch_size, 1)
+        scores = jd_embeddings @ resume_embeddings.T
+        report = {
+            "load_seconds": round(load_seconds, 3),
+            "encode_seconds": round(seconds, 3),
+            "texts_per_second": round(len(resumes) / seconds, 1)
+        }
+
+        if reference is None:
+            reference = (backend, resume_embeddings, scores)
+        else:
+            _, reference_embeddings, reference_scores = reference
+            cosine = np.sum(resume_embeddings * reference_embeddings, axis=1)
+            drift = np.abs(scores - reference_scores)
+            k = min(args.k, args.size)
+            overlap = [
+                len(set(np.argsort(-row)[:k]) & set(np.argsort(-reference_row)[:k])) / k
+                for row, reference_row in zip(scores, reference_scores)
+            ]
+            report.update({
+                "reference": reference[0],
+                "embedding_cosine_mean": round(float(cosine.mean()), 6),
+                "embedding_cosine_min": round(float(cosine.min()), 6),
+                "score_drift_mean": round(float(drift.mean()), 6),
+                "score_drift_max": round(float(drift.max()), 6),
+                f"top{k}_overlap": round(float(np.mean(overlap)), 4),
+                "speedup": round(results["backends"][reference[0]]["encode_seconds"] / seconds, 2)
+            })
+        results["backends"][backend] = report
+        print(backend, report, file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--model-path", help="Directory written by 'embedding_backends.py export'")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS,
+                        help="The first backend is the reference for drift")
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--jds", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Latency, throughput and peak memory of the scoring pipeline.
+
+Runs on deterministic synthetic resumes and job descriptions
+(benchmarks/synthetic.py) with the models configured for app.py:
+
+- micro: per-call latency of extract_keywords, extract_skills,
+  extract_role_keywords, single-text embedding and calculate_hybrid_score
+- batch: throughput of score_resumes at several batch sizes
+- load: end-to-end POST /match through the Flask test client, from
+  concurrent client threads
+
+The feature cache is disabled (unless --feature-cache) so repeated
+inputs are not served from it. Results, including p50/p95/p99 latencies
+and peak RSS, are written as JSON; compare two results files, e.g. from
+two commits, with --compare.
+
+    python benchmarks/pipeline_benchmark.py --output results.json
+    python benchmarks/pipeline_benchmark.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import LENGTHS, synthetic_jds, synthetic_resumes  # noqa: E402
+
+
+def latency_summary(seconds):
+    """Mean and p50/p95/p99 of a list of durations, in milliseconds."""
+    ms = np.asarray(seconds) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3)
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (worker processes not included)."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def time_calls(fn, inputs):
+    """Call fn on each input in turn; throughput and latency percentiles."""
+    fn(inputs[0])  # warm-up, so lazy initialisation is not timed
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - call_started)
+    seconds = time.perf_counter() - started
+    return {"calls": len(inputs), "calls_per_second": round(len(inputs) / seconds, 1), **latency_summary(latencies)}
+
+
+def run_micro(app, args):
+    resumes = synthetic_resumes(args.calls, seed=args.seed, length=args.length)
+    jds = synthetic_jds(args.calls, seed=args.seed + 1)
+    benchmarks = {
+        "extract_keywords": (app.extract_keywords, resumes),
+        "extract_skills": (app.extract_skills, resumes),
+        "extract_role_keywords": (app.extract_role_keywords, resumes),
+        "embedding": (lambda text: app.encode_texts([text]), resumes),
+        "calculate_hybrid_score": (lambda pair: app.calculate_hybrid_score(*pair), list(zip(resumes, jds)))
+    }
+    results = {}
+    for name, (fn, inputs) in benchmarks.items():
+        results[name] = time_calls(fn, inputs)
+        print("micro", name, results[name], file=sys.stderr)
+    return results
+
+
+def run_batch(app, args):
+    profile = app.build_job_profile(synthetic_jds(1, seed=args.seed + 2)[0])
+    results = {}
+    for size in args.batch_sizes:
+        resumes = synthetic_resumes(size, seed=args.seed + 3, length=args.length)
+        app.score_resumes(profile, resumes[:min(size, 8)])  # warm-up
+        runs = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            app.score_resumes(profile, resumes)
+            runs.append(time.perf_counter() - started)
+        best = min(runs)
+        results[str(size)] = {
+            "best_seconds": round(best, 4),
+            "median_seconds": round(float(np.median(runs)), 4),
+            "resumes_per_second": round(size / best, 1)
+        }
+        print("batch", size, results[str(size)], file=sys.stderr)
+    return results
+
+
+def run_load(app, args):
+    jds = synthetic_jds(args.requests, seed=args.seed + 4)
+    bodies = [
+        {
+            "jd": jd,
+            "resumes": [
+                {"id": f"resume-{n}-{i}", "text": text}
+                for i, text in enumerate(
+                    synthetic_resumes(args.resumes_per_request, seed=args.seed + 5 + n, length=args.length)
+                )
+            ],
+            "top_k": 10
+        }
+        for n, jd in enumerate(jds)
+    ]
+    local = threading.local()
+
+    def post(body):
+        # The test client keeps per-request state, so each thread gets its own
+        if not hasattr(local, "client"):
+            local.client = app.app.test_client()
+        started = time.perf_counter()
+        response = local.client.post("/match", json=body)
+        return time.perf_counter() - started, response.status_code
+
+    post(bodies[0])  # warm-up
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(post, bodies))
+    seconds = time.perf_counter() - started
+
+    results = {
+        "requests": len(bodies),
+        "resumes_per_request": args.resumes_per_request,
+        "concurrency": args.concurrency,
+        "errors": sum(1 for _, status in outcomes if status != 200),
+        "requests_per_second": round(len(bodies) / seconds, 2),
+        "resumes_per_second": round(len(bodies) * args.resumes_per_request / seconds, 1),
+        **latency_summary([latency for latency, _ in outcomes])
+    }
+    print("load", results, file=sys.stderr)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    # Must be configured before app.py reads its settings on import
+    if not args.feature_cache:
+        os.environ["FEATURE_CACHE_SIZE"] = "0"
+        os.environ.pop("FEATURE_CACHE_PATH", None)
+    import app
+
+    started = time.perf_counter()
+    app.models.warm_up()
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            **{key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "embedding_backend": app.EMBEDDING_BACKEND,
+            "embedding_mode": app.EMBEDDING_MODE
+        },
+        "model_load_seconds": round(time.perf_counter() - started, 3)
+    }
+    for stage, fn in (("micro", run_micro), ("batch", run_batch), ("load", run_load)):
+        if stage in args.stages:
+            results[stage] = fn(app, args)
+            results[stage]["peak_rss_mb"] = peak_rss_mb()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def flatten(results, prefix=""):
+    """Numeric leaves of a results file as {"stage.name.metric": value}."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and key != "config":
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key != "cpus":
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(before, after):
+    """Lines showing every metric of two results files and its relative change."""
+    old, new = flatten(before), flatten(after)
+    lines = [f"{'metric':<50} {before.get('commit') or 'before':>12} {after.get('commit') or 'after':>12} {'change':>8}"]
+    for key in sorted(old.keys() & new.keys()):
+        change = f"{(new[key] - old[key]) / old[key]:+.1%}" if old[key] else ""
+        lines.append(f"{key:<50} {old[key]:>12} {new[key]:>12} {change:>8}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", nargs="+", default=["micro", "batch", "load"], choices=["micro", "batch", "load"])
+    parser.add_argument("--length", default="mixed", choices=LENGTHS, help="Synthetic resume length")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per micro-benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 256, 1024])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per batch size")
+    parser.add_argument("--requests", type=int, default=50, help="/match requests in the load test")
+    parser.add_argument("--resumes-per-request", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4, help="Client threads in the load test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--feature-cache", action="store_true", help="Keep the feature cache enabled")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two results files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+        print("\n".join(compare(before, after)))
+        return
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Deterministic synthetic resumes and job descriptions for the benchmarks.
+
+Texts are built from fixed vocabularies with a seeded RNG, so every run
+(and every commit) benchmarks exactly the same inputs.
+"""
+import random
+
+SKILLS = ["python", "sql", "powerbi", "tableau", "excel", "java", "javascript", "react", "aws", "docker",
+          "kubernetes", "machine learning", "data analysis", "statistics", "flask", "spark", "etl"]
+ROLES = ["data analyst", "software engineer", "data scientist", "team lead", "product manager",
+         "backend developer", "business analyst", "devops engineer"]
+PHRASES = ["built dashboards for", "led a team delivering", "automated reporting for", "designed services for",
+           "migrated legacy systems to", "analyzed customer data for", "mentored junior staff on"]
+DOMAINS = ["retail", "banking", "healthcare", "logistics", "e-commerce", "insurance", "telecom"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Analytics", "Stark Industries", "Wayne Enterprises"]
+
+# Experience sentences per resume for each length preset
+LENGTHS = {"short": (2, 6), "medium": (8, 20), "long": (30, 80), "mixed": (2, 80)}
+
+
+def fixed_corpus(size, seed, min_sentences=4, max_sentences=20):
+    """Deterministic resume-like texts of varying length."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(size):
+        sentences = [f"{rng.choice(ROLES).title()} with {rng.randint(1, 15)} years of experience."]
+        for _ in range(rng.randint(min_sentences, max_sentences)):
+            sentences.append(
+                f"{rng.choice(PHRASES).capitalize()} {rng.choice(DOMAINS)} using "
+                f"{', '.join(rng.sample(SKILLS, rng.randint(1, 4)))}."
+            )
+        texts.append(" ".join(sentences))
+    return texts
+
+
+def synthetic_resumes(count, seed=0, length="mixed"):
+    """Resumes with summary, skills and experience sections.
+
+    Args:
+        count (int): Number of resumes
+        seed (int): RNG seed
+        length (str): One of LENGTHS, the range of experience sentences
+    """
+    low, high = LENGTHS[length]
+    rng = random.Random(seed)
+    resumes = []
+    for _ in range(count):
+        role = rng.choice(ROLES)
+        sections = [
+            f"Summary\n{role.title()} with {rng.randint(1, 15)} years of experience in {rng.choice(DOMAINS)}.",
+            f"Skills\n{', '.join(rng.sample(SKILLS, rng.randint(3, 8)))}"
+        ]
+        experience = []
+        for _ in range(rng.randint(low, high)):
+            if not experience or rng.random() < 0.2:
+                experience.append(f"{rng.choice(ROLES).title()} at {rng.choice(COMPANIES)}")
+            experience.append(
+                f"{rng.choice(PHRASES).capitalize()} {rng.choice(DOMAINS)} using "
+                f"{', '.join(rng.sample(SKILLS, rng.randint(1, 4)))}."
+            )
+        sections.append("Experience\n" + "\n".join(experience))
+        resumes.append("\n\n".join(sections))
+    return resumes
+
+
+def synthetic_jds(count, seed=1):
+    """Job descriptions with a role and required skills; about a third name no role."""
+    rng = random.Random(seed)
+    jds = []
+    for _ in range(count):
+        skills = ", ".join(rng.sample(SKILLS, rng.randint(3, 6)))
+        domain = rng.choice(DOMAINS)
+        if rng.random() < 0.33:
+            jds.append(f"We need someone to work on {domain} projects. Required skills: {skills}.")
+        else:
+            jds.append(
+                f"We are hiring a {rng.choice(ROLES)} for our {domain} team. Required skills: {skills}. "
+                f"You will {rng.choice(PHRASES)} {rng.choice(DOMAINS)} clients."
+            )
+    return jds
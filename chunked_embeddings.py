@@ -0,0 +1,134 @@
+"""Chunked embeddings for resumes longer than the encoder's input window.
+
+MiniLM reads at most ~256 tokens, so a multi-page resume embedded as
+one text is represented by its first section only. Here each resume is
+split into sections, sentences and, as a last resort, word windows,
+which are then packed back together into chunks of at most
+``max_tokens`` tokens (counted with the model's tokenizer), so chunks
+are close to full and little of each batch is padding. All chunks of all
+resumes are embedded in one encoder call, and a resume's similarity to
+a job description is the maximum, or the mean of the top n, of its
+chunks' similarities.
+"""
+import re
+
+import numpy as np
+
+AGGREGATIONS = ("max", "mean")
+
+_SECTION_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def chunk_texts(texts, count_tokens, max_tokens):
+    """Split each text into chunks of at most max_tokens tokens.
+
+    Args:
+        texts (list[str]): Texts to split
+        count_tokens (callable): Maps a list of strings to their token
+            counts; called once per splitting level for all texts together
+        max_tokens (int): Token budget per chunk
+
+    Returns:
+        list[list[str]]: The chunks of each text, in order; every text
+        has at least one chunk.
+    """
+    # (text index, piece) pairs, refined until every piece fits
+    pieces = [
+        (i, section.strip())
+        for i, text in enumerate(texts)
+        for section in _SECTION_BREAK.split(text)
+        if section.strip()
+    ]
+    counts = count_tokens([piece for _, piece in pieces]) if pieces else []
+
+    for split in (_split_sentences, _split_words):
+        if all(count <= max_tokens for count in counts):
+            break
+        refined = []
+        for (i, piece), count in zip(pieces, counts):
+            if count <= max_tokens:
+                refined.append((i, piece))
+            else:
+                refined.extend((i, part) for part in split(piece, count, max_tokens))
+        pieces = refined
+        counts = count_tokens([piece for _, piece in pieces])
+
+    chunks = [[] for _ in texts]
+    sizes = [0] * len(texts)
+    for (i, piece), count in zip(pieces, counts):
+        # Pack consecutive pieces of the same text into as few chunks as fit
+        if chunks[i] and sizes[i] + count <= max_tokens:
+            chunks[i][-1] += "\n" + piece
+            sizes[i] += count
+        else:
+            chunks[i].append(piece)
+            sizes[i] = count
+    return [text_chunks or [text] for text, text_chunks in zip(texts, chunks)]
+
+
+def _split_sentences(piece, count, max_tokens):
+    return [sentence for sentence in _SENTENCE_BREAK.split(piece) if sentence.strip()]
+
+
+def _split_words(piece, count, max_tokens):
+    words = piece.split()
+    # Words per window, scaled from this piece's tokens-per-word ratio
+    size = max(1, len(words) * max_tokens // max(count, 1))
+    return [" ".join(words[start:start + size]) for start in range(0, len(words), size)]
+
+
+def aggregate_chunk_scores(scores, offsets, aggregation="max", top_n=3):
+    """Reduce per-chunk scores to per-text scores.
+
+    Args:
+        scores (np.ndarray): (chunks,) or (chunks, queries) similarities
+        offsets (np.ndarray): Text i owns chunks offsets[i]:offsets[i + 1]
+        aggregation (str): "max", or "mean" of each text's top_n chunks
+    """
+    if aggregation == "max":
+        return np.maximum.reduceat(scores, offsets[:-1], axis=0)
+    if aggregation != "mean":
+        raise ValueError(f"Unknown chunk aggregation {aggregation!r}, expected one of {', '.join(AGGREGATIONS)}")
+
+    counts = np.diff(offsets)
+    owners = np.repeat(np.arange(len(counts)), counts)
+    positions = np.arange(len(scores)) - np.repeat(offsets[:-1], counts)
+    padded = np.full((len(counts), counts.max()) + scores.shape[1:], -np.inf, dtype=scores.dtype)
+    padded[owners, positions] = scores
+    best = -np.sort(-padded, axis=1)[:, :top_n]
+    used = np.minimum(counts, top_n).reshape((-1,) + (1,) * (scores.ndim - 1))
+    return np.where(np.isfinite(best), best, 0).sum(axis=1) / used
+
+
+class ChunkedEmbeddings:
+    """Normalized chunk embeddings of many texts that score like one embedding matrix.
+
+    ``chunked @ query`` gives one aggregated similarity per text (or a
+    texts x queries matrix for a dims x queries query), so scoring code
+    written for a (texts x dims) matrix works unchanged.
+    """
+
+    def __init__(self, chunks, offsets, aggregation="max", top_n=3):
+        self.chunks = chunks
+        self.offsets = offsets
+        self.aggregation = aggregation
+        self.top_n = top_n
+
+    @classmethod
+    def from_list(cls, matrices, aggregation="max", top_n=3):
+        """Build from one (chunks x dims) matrix per text."""
+        offsets = np.zeros(len(matrices) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(matrix) for matrix in matrices])
+        return cls(np.vstack(matrices), offsets, aggregation, top_n)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __matmul__(self, query):
+        return aggregate_chunk_scores(self.chunks @ query, self.offsets, self.aggregation, self.top_n)
+
+    def pooled(self):
+        """One normalized mean embedding per text, e.g. for a single-vector index."""
+        sums = np.add.reduceat(self.chunks, self.offsets[:-1], axis=0)
+        return sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
@@ -0,0 +1,181 @@
+"""Selectable inference backends for the sentence encoder.
+
+``torch`` is the sentence-transformers model as before. ``onnx`` runs
+the same transformer exported to ONNX under ONNX Runtime, and
+``onnx-int8`` a dynamically quantized (int8 weights) copy of that
+export. All backends expose the subset of the SentenceTransformer API
+the app uses (``encode``, ``get_sentence_embedding_dimension``,
+``max_seq_length``), so they are interchangeable behind the model
+registry.
+
+Export once, with network access, into a directory that is then loaded
+offline by every backend (``EMBEDDING_MODEL_PATH``):
+
+    python embedding_backends.py export --model all-MiniLM-L6-v2 --output models/all-MiniLM-L6-v2
+
+onnxruntime (and onnx, for exporting) are optional dependencies.
+"""
+import argparse
+import inspect
+import json
+import os
+
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model_int8.onnx"}
+ONNX_DIR = "onnx"
+CONFIG_FILE = "embedding_config.json"
+
+
+def load_embedding_backend(backend, model_name, model_path=None, threads=None):
+    """Load the sentence encoder for a backend.
+
+    Args:
+        backend (str): One of BACKENDS
+        model_name (str): sentence-transformers model name, used by the
+            torch backend when no local model_path is given
+        model_path (str, optional): Directory written by export(); loaded
+            without network access. Required by the ONNX backends.
+        threads (int, optional): ONNX Runtime intra-op threads
+    """
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_path or model_name)
+    if backend in ONNX_FILES:
+        if not model_path:
+            raise ValueError(
+                f"Embedding backend {backend} needs EMBEDDING_MODEL_PATH, a directory "
+                "written by 'python embedding_backends.py export'"
+            )
+        return OnnxEncoder(model_path, ONNX_FILES[backend], threads=threads)
+    raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+
+class OnnxEncoder:
+    """Sentence encoder running an exported transformer under ONNX Runtime."""
+
+    def __init__(self, model_path, filename="model.onnx", threads=None):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_path, ONNX_DIR, CONFIG_FILE)) as f:
+            config = json.load(f)
+        self.max_seq_length = config["max_seq_length"]
+        self.pooling = config["pooling"]
+        self._dimension = config["dimension"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_path, ONNX_DIR, filename), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self):
+        return self._dimension
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, normalize_embeddings=False, **kwargs):
+        """Embed sentences like SentenceTransformer.encode, returning a float32 array."""
+        sentences = list(sentences)
+        embeddings = np.zeros((len(sentences), self._dimension), dtype=np.float32)
+        # Batches of similar length waste less time on padding
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        for start in range(0, len(sentences), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([sentences[i] for i in batch])
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings
+
+    def _encode_batch(self, sentences):
+        tokens = self.tokenizer(
+            sentences, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        inputs = {name: tokens[name].astype(np.int64) for name in self._input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+        if self.pooling == "cls":
+            return token_embeddings[:, 0]
+        mask = tokens["attention_mask"][:, :, None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def export(model_name, output_dir, quantize=True, opset=14):
+    """Save a sentence-transformers model, its ONNX export and an int8 copy to output_dir."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    model.save(output_dir)
+    transformer = model[0].auto_model.eval()
+    pooling = model[1].get_config_dict()
+    if not (pooling.get("pooling_mode_mean_tokens") or pooling.get("pooling_mode_cls_token")):
+        raise ValueError("Only mean and CLS pooling models can be exported")
+
+    sample = model.tokenizer(["An example sentence to trace the model"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+    onnx_dir = os.path.join(output_dir, ONNX_DIR)
+    os.makedirs(onnx_dir, exist_ok=True)
+    fp32_path = os.path.join(onnx_dir, ONNX_FILES["onnx"])
+    export_options = {}
+    # Newer torch versions default to the dynamo exporter, which needs onnxscript
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_options["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "token_embeddings": {0: "batch", 1: "sequence"}
+            },
+            opset_version=opset,
+            **export_options
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(onnx_dir, ONNX_FILES["onnx-int8"]), weight_type=QuantType.QInt8)
+
+    with open(os.path.join(onnx_dir, CONFIG_FILE), "w") as f:
+        json.dump({
+            "model": model_name,
+            "max_seq_length": model.max_seq_length,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "pooling": "mean" if pooling.get("pooling_mode_mean_tokens") else "cls"
+        }, f, indent=2)
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the sentence encoder for offline and ONNX use")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Save the model, its ONNX export and an int8 copy")
+    export_parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    export_parser.add_argument("--output", required=True, help="Directory to write (EMBEDDING_MODEL_PATH)")
+    export_parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+    export_parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    export(args.model, args.output, quantize=not args.no_quantize, opset=args.opset)
+    print(f"Exported {args.model} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Micro-batching of embedding requests across concurrent callers.
+
+Many small concurrent requests (a webhook posting one to five resumes
+each) would otherwise run one tiny forward pass apiece. The batcher
+queues their texts, waits at most ``max_wait`` seconds after the first
+one (or until ``max_batch_size`` texts are waiting), runs a single
+encode call for all of them and hands each caller its own rows.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode(texts) calls into batched calls of encode_fn.
+
+    Args:
+        encode_fn (callable): Encodes a list of texts into a (texts x dims) array
+        max_batch_size (int): Texts per coalesced call; larger requests
+            should bypass the batcher
+        max_wait (float): Seconds a batch stays open for more requests
+    """
+
+    def __init__(self, encode_fn, max_batch_size=64, max_wait=0.005):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._texts = 0
+        self._largest_batch = 0
+        # Batch size histogram in power-of-two buckets: 1, 2-3, 4-7, ...
+        self._histogram = {}
+
+    def encode(self, texts):
+        """Encode texts as part of the next batch; blocks until the batch is done."""
+        texts = list(texts)
+        if not texts:
+            return self.encode_fn(texts)
+        self._ensure_started()
+        future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "texts": self._texts,
+                "mean_batch_size": self._texts / self._batches if self._batches else None,
+                "mean_requests_per_batch": self._requests / self._batches if self._batches else None,
+                "largest_batch": self._largest_batch,
+                "batch_sizes": dict(sorted(self._histogram.items(), key=lambda item: int(item[0].split("-")[0]))),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    thread.start()
+                    self._thread = thread
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or max_wait passes."""
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                embeddings = np.asarray(self.encode_fn(texts))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            start = 0
+            for request_texts, future in batch:
+                future.set_result(embeddings[start:start + len(request_texts)])
+                start += len(request_texts)
+            self._record(len(batch), len(texts))
+
+    def _record(self, requests, texts):
+        low = 1 << (texts.bit_length() - 1)
+        bucket = str(low) if low == 1 else f"{low}-{2 * low - 1}"
+        with self._stats_lock:
+            self._requests += requests
+            self._batches += 1
+            self._texts += texts
+            self._largest_batch = max(self._largest_batch, texts)
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
@@ -0,0 +1,184 @@
+"""Content-addressed cache of per-resume embeddings and extracted features.
+
+Entries are keyed by a SHA-256 of the resume text plus a namespace that
+identifies the models that produced them, so a model upgrade never serves
+stale features. Lookups go to an in-memory LRU first and then, if a path
+is configured, to an SQLite file that survives restarts.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def feature_key(text, namespace):
+    """Return the cache key for a text produced under the given model namespace."""
+    return hashlib.sha256(f"{namespace}\0{text}".encode("utf-8")).hexdigest()
+
+
+class FeatureCache:
+    """Two-tier (memory LRU + optional SQLite) cache of (embedding, feature sets).
+
+    Features are stored as a tuple of sets, e.g. (keywords, skills, roles);
+    callers rebuild their own feature objects from the returned tuple.
+    """
+
+    def __init__(self, namespace, max_entries=10000, db_path=None, max_disk_entries=1000000):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                " key TEXT PRIMARY KEY,"
+                " embedding BLOB NOT NULL,"
+                " shape TEXT NOT NULL,"
+                " features TEXT NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS features_last_access ON features (last_access)"
+            )
+            self._db.commit()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self._db is not None
+
+    def key(self, text):
+        return feature_key(text, self.namespace)
+
+    def get(self, text):
+        """Return (embedding, features) for a text, or None on a miss."""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts):
+        """Look up many texts at once; misses are returned as None."""
+        results = [None] * len(texts)
+        if not self.enabled:
+            self.misses += len(texts)
+            return results
+
+        keys = [self.key(text) for text in texts]
+        disk_lookups = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = entry
+                    self.memory_hits += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups and self._db is not None:
+                for key, entry in self._load(list(disk_lookups)).items():
+                    for i in disk_lookups.pop(key):
+                        results[i] = entry
+                        self.disk_hits += 1
+                    self._remember(key, entry)
+
+            self.misses += sum(len(positions) for positions in disk_lookups.values())
+        return results
+
+    def put(self, text, embedding, features):
+        """Store the embedding and feature sets computed for a text."""
+        self.put_many([text], [embedding], [features])
+
+    def put_many(self, texts, embeddings, features):
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, embedding, feature_sets in zip(texts, embeddings, features):
+                key = self.key(text)
+                embedding = np.asarray(embedding, dtype=np.float32)
+                self._remember(key, (embedding, tuple(feature_sets)))
+                if self._db is not None:
+                    rows.append((
+                        key,
+                        embedding.tobytes(),
+                        json.dumps(embedding.shape),
+                        json.dumps([sorted(values) for values in feature_sets]),
+                        now
+                    ))
+            if rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss counters and current sizes of both tiers."""
+        with self._lock:
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_entries": disk_entries
+            }
+
+    def _remember(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, keys):
+        entries = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, embedding, shape, features FROM features WHERE key IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for key, blob, shape, feature_lists in rows:
+                embedding = np.frombuffer(blob, dtype=np.float32).reshape(json.loads(shape))
+                feature_sets = tuple(set(values) for values in json.loads(feature_lists))
+                entries[key] = (embedding, feature_sets)
+        if entries:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE features SET last_access = ? WHERE key = ?",
+                [(now, key) for key in entries]
+            )
+            self._db.commit()
+        return entries
+
+    def _evict_disk(self):
+        if not self.max_disk_entries:
+            return
+        count = self._db.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM features WHERE key IN ("
+                " SELECT key FROM features ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
@@ -1,10 +1,17 @@
 import streamlit as st
 import os
-import fitz  # PyMuPDF for PDF processing
 import tempfile
 import zipfile
+import hashlib
 import io
-from app import calculate_hybrid_score
+import numpy as np
+from app import (
+    PDF_MAX_MB, PDF_MAX_PAGES, PDF_TIMEOUT, PDF_WORKERS,
+    build_job_profile, combine_scores, iter_archive_scores, models, score_resume_arrays
+)
+from archive_ingest import is_archive, read_archive_members
+from pdf_extraction import extract_text_from_pdf_bytes, extract_texts
+from ranking import rank_indices
 import pandas as pd
 from pathlib import Path
 
@@ -62,16 +69,39 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner="Loading models...")
+def load_models():
+    """Load the spaCy and sentence-transformer models once per server process."""
+    models.warm_up()
+    return models
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _pdf_text(pdf_bytes):
+    text, _ = extract_text_from_pdf_bytes(pdf_bytes)
+    return text
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_job_profile(jd_text):
+    """JobProfile of a job description, built once per distinct text."""
+    return build_job_profile(jd_text)
+
+def session_cache(name):
+    """A dictionary kept in this browser session's state across reruns."""
+    return st.session_state.setdefault(name, {})
+
+def file_digest(fileobj):
+    """SHA-256 of an uploaded file's contents; the file is left rewound."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(1 << 20), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
 def extract_text_from_pdf(pdf_bytes):
     """Extract text from PDF file."""
     try:
-        # Create PDF document from bytes
-        doc = fitz.open("pdf", pdf_bytes)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text
+        return _pdf_text(pdf_bytes)
     except Exception as e:
         st.error(f"Error extracting text from PDF: {str(e)}")
         return ""
@@ -89,19 +119,122 @@ def parse_jd(jd_input, is_text=True):
     return ""
 
 def process_resumes(resume_files):
-    """Process resume files."""
-    resume_texts = {}
-    for file in resume_files:
-        try:
-            text = extract_text_from_pdf(file.getvalue())
-            if text:
-                resume_texts[file.name] = text
-        except Exception as e:
-            st.error(f"Error processing {file.name}: {str(e)}")
-    return resume_texts
+    """Process resume files, extracting text across a process pool.
+
+    Text is cached per file content hash for the session, so only files
+    not seen before are extracted; failed files are retried next time.
+
+    Returns:
+        tuple: ({filename: (content hash, text)} of the readable resumes,
+        ExtractionResult of every file)
+    """
+    extracted = session_cache("extracted_texts")
+    digests = [file_digest(file) for file in resume_files]
+    missing = {digest: file for digest, file in zip(digests, resume_files) if digest not in extracted}
+    fresh = {}
+    if missing:
+        fresh = dict(zip(missing, extract_texts(
+            [(file.name, file.getvalue()) for file in missing.values()],
+            max_workers=PDF_WORKERS,
+            max_pages=PDF_MAX_PAGES,
+            max_bytes=int(PDF_MAX_MB * 1e6),
+            timeout=PDF_TIMEOUT
+        )))
+        extracted.update((digest, result) for digest, result in fresh.items() if not result.error)
+
+    results = [
+        (extracted.get(digest) or fresh[digest])._replace(name=file.name)
+        for digest, file in zip(digests, resume_files)
+    ]
+    resume_texts = {
+        result.name: (digest, result.text)
+        for digest, result in zip(digests, results)
+        if not result.error and result.text
+    }
+    return resume_texts, results
+
+def component_scores(jd_key, profile, resumes):
+    """Semantic, keyword and role scores of resumes against a job description.
+
+    Scores are cached per (JD hash, resume hash) for the session, so only
+    resumes not yet scored against this JD go through the models.
+
+    Args:
+        jd_key (str): Hash of the job description text
+        profile (JobProfile): The job description's profile
+        resumes (list[tuple]): (content hash, text) of each resume
+
+    Returns:
+        np.ndarray: (resumes x 3) semantic, keyword and role scores
+    """
+    cache = session_cache("component_scores")
+    missing = dict((digest, text) for digest, text in resumes if (jd_key, digest) not in cache)
+    if missing:
+        combined = score_resume_arrays(profile, list(missing.values()))
+        for i, digest in enumerate(missing):
+            cache[(jd_key, digest)] = (
+                combined["semantic_score"][i], combined["keyword_score"][i], combined["role_score"][i]
+            )
+    return np.array([cache[(jd_key, digest)] for digest, _ in resumes], dtype=np.float64).reshape(-1, 3)
+
+def archive_component_scores(jd_key, profile, archive_file):
+    """Member names, (members x 3) component scores and skipped files of an archive.
+
+    The archive is streamed and scored a chunk at a time, once per
+    (JD hash, archive hash) for the session.
+    """
+    cache = session_cache("archive_scores")
+    key = (jd_key, file_digest(archive_file))
+    if key not in cache:
+        names, scores, skipped = [], [], []
+        for chunk_results, chunk_errors in iter_archive_scores(profile, archive_file):
+            names.extend(result["id"] for result in chunk_results)
+            scores.extend(
+                (result["semantic_score"], result["keyword_score"], result["role_score"])
+                for result in chunk_results
+            )
+            skipped.extend(chunk_errors)
+        cache[key] = (names, np.array(scores, dtype=np.float64).reshape(-1, 3), skipped)
+    return cache[key]
+
+def rank_matches(match, weights, top_k):
+    """Combine a match's cached component scores with the current weights and rank them."""
+    scores = match["scores"]
+    combined = combine_scores(
+        scores[:, 0], scores[:, 1], scores[:, 2], match["has_role_requirement"], weights
+    )
+    return [
+        {
+            "filename": match["filenames"][i],
+            "archive": match["archives"][i],
+            "final_score": combined["final_score"][i],
+            "semantic_score": scores[i, 0],
+            "keyword_score": scores[i, 1],
+            "role_score": scores[i, 2]
+        }
+        for i in rank_indices(combined["final_score"], top_k)
+    ]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_zip(file_data):
+    """ZIP archive bytes of {filename: contents}, rebuilt only when the files change."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for filename, file_content in file_data.items():
+            zip_file.writestr(filename, file_content)
+    return zip_buffer.getvalue()
+
+def input_signature(jd_text, jd_file, resume_files):
+    """Cheap fingerprint of the current inputs, to tell when shown results are stale."""
+    return (
+        jd_text,
+        jd_file and (jd_file.name, jd_file.size),
+        tuple((file.name, file.size) for file in resume_files or [])
+    )
 
 def main():
     st.title("Resume to JD Similarity Matcher")
+    load_models()
     
     # Sidebar for display options
     with st.sidebar:
@@ -227,14 +360,32 @@ def main():
         st.header("Resumes")
         
         resume_files = st.file_uploader(
-            "Upload resumes",
-            type=['pdf'],
+            "Upload resumes (PDFs, or ZIP/tar archives of PDFs)",
+            type=['pdf', 'zip', 'tar', 'gz', 'tgz'],
             accept_multiple_files=True,
             key="resume_uploader"
         )
     
-    # Process button
+    # Prepare weights dictionary from sidebar inputs
+    weights = {
+        "semantic_weight_with_role": semantic_weight_with_role,
+        "keyword_weight_with_role": keyword_weight_with_role,
+        "role_weight": role_weight,
+        "semantic_weight_no_role": semantic_weight_no_role,
+        "keyword_weight_no_role": keyword_weight_no_role
+    }
+
+    # Only the displayed number of results is ranked and built (None = all)
+    top_k = {"Top 5": 5, "Top 10": 10}.get(display_options)
+
+    # Archives are streamed and scored member by member
+    pdf_files = [f for f in resume_files or [] if not is_archive(f.name)]
+    archive_files = [f for f in resume_files or [] if is_archive(f.name)]
+
+    # Process button: extraction and scoring results are cached, so a later
+    # weight or display change only re-combines the stored component scores
     if st.button("Process and Match"):
+        st.session_state.pop("match", None)
         if not jd_text and not jd_file:
             st.error("Please provide a job description either by pasting text or uploading a PDF")
             return
@@ -250,132 +401,158 @@ def main():
             return
             
         # Process resumes
-        resume_texts = process_resumes(resume_files)
-        if not resume_texts:
+        resume_texts, extraction = process_resumes(pdf_files) if pdf_files else ({}, [])
+        if not resume_texts and not archive_files:
+            for result in extraction:
+                st.error(f"Error processing {result.name}: {result.error}")
             st.error("No valid resumes found")
             return
-            
-        # Prepare weights dictionary from sidebar inputs
-        weights = {
-            "semantic_weight_with_role": semantic_weight_with_role,
-            "keyword_weight_with_role": keyword_weight_with_role,
-            "role_weight": role_weight,
-            "semantic_weight_no_role": semantic_weight_no_role,
-            "keyword_weight_no_role": keyword_weight_no_role
+
+        # Analyze the JD once and score the resumes not yet scored against it
+        profile = get_job_profile(jd_content)
+        jd_key = hashlib.sha256(jd_content.encode("utf-8")).hexdigest()
+        filenames = list(resume_texts.keys())
+        archives = [None] * len(filenames)
+        scores = [component_scores(jd_key, profile, list(resume_texts.values()))]
+        skipped = {}
+        for archive_file in archive_files:
+            with st.spinner(f"Scoring resumes in {archive_file.name}..."):
+                try:
+                    names, archive_scores, skipped[archive_file.name] = archive_component_scores(
+                        jd_key, profile, archive_file
+                    )
+                except Exception as e:
+                    st.error(f"Error reading archive {archive_file.name}: {str(e)}")
+                    continue
+            filenames.extend(names)
+            archives.extend([archive_file.name] * len(names))
+            scores.append(archive_scores)
+
+        st.session_state["match"] = {
+            "inputs": input_signature(jd_text, jd_file, resume_files),
+            "has_role_requirement": profile.has_role_requirement,
+            "filenames": filenames,
+            "archives": archives,
+            "scores": np.vstack(scores),
+            "extraction": extraction,
+            "skipped": skipped
         }
-        
-        # Calculate scores
-        results = []
-        for filename, resume_text in resume_texts.items():
-            scores = calculate_hybrid_score(resume_text, jd_content, weights=weights)
-            results.append({
-                "filename": filename,
-                "final_score": scores["final_score"],
-                "semantic_score": scores["semantic_score"],
-                "keyword_score": scores["keyword_score"],
-                "role_score": scores["role_score"]
-            })
-            
-        # Sort results by final score
-        results.sort(key=lambda x: x["final_score"], reverse=True)
-        
-        # Filter results based on display option
-        if display_options == "Top 5":
-            results = results[:5]
-        elif display_options == "Top 10":
-            results = results[:10]
-            
-        # Display results
-        st.header("Matching Results")
-        if results:
-            # Create a custom table with download buttons
-            st.markdown("""
-            <style>
-            .download-btn {
-                background-color: #4CAF50;
-                color: white;
-                padding: 5px 10px;
-                border: none;
-                border-radius: 4px;
-                text-decoration: none;
-                font-size: 12px;
-                cursor: pointer;
-            }
-            .results-table th, .results-table td {
-                padding: 8px 15px;
-                text-align: left;
-                border-bottom: 1px solid #ddd;
-            }
-            .results-table th {
-                background-color: #f2f2f2;
-                font-weight: bold;
-            }
-            .results-table tr:hover {background-color: #f5f5f5;}
-            .stButton button {height: 36px; line-height: 1;}
-            </style>
-            """, unsafe_allow_html=True)
-            
-            # Prepare file data for download buttons
-            file_data = {}
-            for result in results:
-                original_file = next((f for f in resume_files if f.name == result['filename']), None)
-                if original_file:
-                    file_data[result['filename']] = original_file.getvalue()
-            
-            # Option to download all top resumes as a zip file
-            if file_data:
-                # Create a zip file in memory
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for filename, file_content in file_data.items():
-                        zip_file.writestr(filename, file_content)
-                
-                # Create download button for the zip file
+
+    match = st.session_state.get("match")
+    if match is None:
+        return
+    if match["inputs"] != input_signature(jd_text, jd_file, resume_files):
+        st.info("The inputs changed since these results were computed. Click \"Process and Match\" to update them.")
+
+    for result in match["extraction"]:
+        if result.error:
+            st.error(f"Error processing {result.name}: {result.error}")
+    if match["extraction"]:
+        readable = sum(1 for result in match["extraction"] if not result.error and result.text)
+        with st.expander(f"Text extraction: {readable} of {len(match['extraction'])} files"):
+            st.dataframe(pd.DataFrame([{
+                "Filename": result.name,
+                "Pages": result.pages,
+                "Seconds": round(result.seconds, 3),
+                "Status": result.error or "OK"
+            } for result in match["extraction"]]))
+    for archive_name, archive_skipped in match["skipped"].items():
+        if archive_skipped:
+            with st.expander(f"{len(archive_skipped)} files skipped in {archive_name}"):
+                st.dataframe(pd.DataFrame(archive_skipped))
+
+    results = rank_matches(match, weights, top_k)
+    if not results:
+        st.info("No matching resumes found")
+        return
+
+    # Display results
+    st.header("Matching Results")
+    # Create a custom table with download buttons
+    st.markdown("""
+    <style>
+    .download-btn {
+        background-color: #4CAF50;
+        color: white;
+        padding: 5px 10px;
+        border: none;
+        border-radius: 4px;
+        text-decoration: none;
+        font-size: 12px;
+        cursor: pointer;
+    }
+    .results-table th, .results-table td {
+        padding: 8px 15px;
+        text-align: left;
+        border-bottom: 1px solid #ddd;
+    }
+    .results-table th {
+        background-color: #f2f2f2;
+        font-weight: bold;
+    }
+    .results-table tr:hover {background-color: #f5f5f5;}
+    .stButton button {height: 36px; line-height: 1;}
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # Prepare file data for download buttons
+    file_data = {}
+    for result in results:
+        original_file = next((f for f in pdf_files if f.name == result['filename']), None)
+        if original_file:
+            file_data[result['filename']] = original_file.getvalue()
+    # Only the displayed archive members are read back out of their archives
+    for archive_file in archive_files:
+        names = [r['filename'] for r in results if r.get('archive') == archive_file.name]
+        if names:
+            file_data.update(read_archive_members(archive_file, names))
+    
+    # Option to download all top resumes as a zip file
+    if file_data:
+        # Create download button for the zip file
+        st.download_button(
+            label=f"Download All {len(results)} Resumes as ZIP",
+            data=build_zip(file_data),
+            file_name="top_resumes.zip",
+            mime="application/zip",
+            key="download_all_zip"
+        )
+    
+    # Display results in columns with metrics and download buttons
+    # Use a dataframe for better alignment
+    df_data = []
+    for result in results:
+        df_data.append({
+            "Filename": result["filename"],
+            "Final Score": f"{result['final_score']:.2%}",
+            "Semantic Score": f"{result['semantic_score']:.2%}",
+            "Keyword Score": f"{result['keyword_score']:.2%}",
+            "Role Score": f"{result['role_score']:.2%}",
+        })
+    
+    # Create DataFrame
+    df = pd.DataFrame(df_data)
+    st.dataframe(df)
+    
+    # Add download column to the dataframe
+    # Create a new dataframe with download buttons
+    st.markdown("### Download Options")
+    st.markdown("**Individual Resume Downloads:**")
+    
+    # Create a grid layout for download buttons - 3 columns
+    button_cols = st.columns(3)
+    for i, result in enumerate(results):
+        col_idx = i % 3
+        with button_cols[col_idx]:
+            if result['filename'] in file_data:
                 st.download_button(
-                    label=f"Download All {len(results)} Resumes as ZIP",
-                    data=zip_buffer.getvalue(),
-                    file_name="top_resumes.zip",
-                    mime="application/zip",
-                    key="download_all_zip"
+                    label=f"Download {result['filename']}",
+                    data=file_data[result['filename']],
+                    file_name=result["filename"],
+                    mime="application/pdf",
+                    key=f"download_{result['filename']}",
+                    use_container_width=True
                 )
-            
-            # Display results in columns with metrics and download buttons
-            # Use a dataframe for better alignment
-            df_data = []
-            for result in results:
-                df_data.append({
-                    "Filename": result["filename"],
-                    "Final Score": f"{result['final_score']:.2%}",
-                    "Semantic Score": f"{result['semantic_score']:.2%}",
-                    "Keyword Score": f"{result['keyword_score']:.2%}",
-                    "Role Score": f"{result['role_score']:.2%}",
-                })
-            
-            # Create DataFrame
-            df = pd.DataFrame(df_data)
-            st.dataframe(df)
-            
-            # Add download column to the dataframe
-            # Create a new dataframe with download buttons
-            st.markdown("### Download Options")
-            st.markdown("**Individual Resume Downloads:**")
-            
-            # Create a grid layout for download buttons - 3 columns
-            button_cols = st.columns(3)
-            for i, result in enumerate(results):
-                col_idx = i % 3
-                with button_cols[col_idx]:
-                    if result['filename'] in file_data:
-                        st.download_button(
-                            label=f"Download {result['filename']}",
-                            data=file_data[result['filename']],
-                            file_name=result["filename"],
-                            mime="application/pdf",
-                            key=f"download_{result['filename']}",
-                            use_container_width=True
-                        )
-        else:
-            st.info("No matching resumes found")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+"""Inverted index from extracted terms to resume corpus rows.
+
+Postings are kept per field (keywords, skills, roles) as compact
+``array('I')`` lists of matrix rows, appended in ascending row order so
+they are always sorted. Keyword and role scores for a job description
+are computed for the whole corpus at once by concatenating the postings
+of the JD's terms and counting hits per row with ``np.bincount``; the
+results are identical to keyword_score_from_features and
+role_score_from_roles applied row by row.
+
+Rows of deleted resumes stay in their postings until the next rebuild
+and must be filtered with the corpus live mask.
+"""
+from array import array
+
+import numpy as np
+
+FIELDS = ("keywords", "skills", "roles")
+
+
+class InvertedIndex:
+    """Per-field term -> sorted row postings."""
+
+    def __init__(self):
+        self._postings = {field: {} for field in FIELDS}
+        self._compiled = {}
+        # jd role -> corpus role terms that contain it or are contained in it
+        self._related_roles = {}
+
+    def add(self, row, features):
+        """Index one row's (keywords, skills, roles) feature sets."""
+        for field, terms in zip(FIELDS, features):
+            postings = self._postings[field]
+            for term in terms:
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = array("I")
+                    if field == "roles":
+                        self._related_roles.clear()
+                posting.append(row)
+                self._compiled.pop((field, term), None)
+
+    def postings(self, field, term):
+        """Sorted rows whose `field` contains `term`, as an int64 array."""
+        key = (field, term)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            posting = self._postings[field].get(term)
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            compiled = self._compiled[key] = np.frombuffer(posting, dtype=np.uint32).astype(np.int64)
+        return compiled
+
+    def count_matches(self, field, terms, n_rows):
+        """For every row, how many of `terms` appear in its `field`."""
+        postings = [self.postings(field, term) for term in terms]
+        postings = [posting for posting in postings if len(posting)]
+        if not postings:
+            return np.zeros(n_rows, dtype=np.int64)
+        return np.bincount(np.concatenate(postings), minlength=n_rows)[:n_rows]
+
+    def rows_with_all(self, terms):
+        """Rows mentioning every term as a skill or keyword (sorted)."""
+        rows = None
+        for term in terms:
+            term_rows = np.union1d(self.postings("skills", term), self.postings("keywords", term))
+            rows = term_rows if rows is None else np.intersect1d(rows, term_rows, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows if rows is not None else np.empty(0, dtype=np.int64)
+
+    def keyword_scores(self, profile, n_rows):
+        """keyword_score_from_features(row, profile) for rows 0..n_rows-1."""
+        if not profile.keywords and not profile.skills:
+            return np.zeros(n_rows)
+
+        keyword_score = np.zeros(n_rows)
+        if profile.keywords:
+            keyword_score = self.count_matches("keywords", profile.keywords, n_rows) / len(profile.keywords)
+        skill_score = np.zeros(n_rows)
+        if profile.skills:
+            skill_score = self.count_matches("skills", profile.skills, n_rows) / len(profile.skills)
+
+        return np.minimum(0.3 * keyword_score + 0.7 * skill_score, 1.0)
+
+    def role_scores(self, profile, n_rows):
+        """role_score_from_roles(row roles, profile.roles) for rows 0..n_rows-1."""
+        if not profile.roles:
+            return np.zeros(n_rows)
+
+        exact_matches = self.count_matches("roles", profile.roles, n_rows)
+        # Each (jd role, resume role) pair related by containment is one partial match
+        partial_terms = []
+        for jd_role in profile.roles:
+            partial_terms.extend(self._related(jd_role))
+        partial_matches = self.count_matches("roles", partial_terms, n_rows)
+
+        exact_score = exact_matches / len(profile.roles)
+        partial_score = partial_matches / (2 * len(profile.roles))
+        return np.maximum(exact_score, partial_score)
+
+    def _related(self, jd_role):
+        related = self._related_roles.get(jd_role)
+        if related is None:
+            related = self._related_roles[jd_role] = [
+                role for role in self._postings["roles"]
+                if jd_role in role or role in jd_role
+            ]
+        return related
@@ -0,0 +1,294 @@
+"""SQLite-backed queue of long-running match jobs.
+
+Jobs are submitted as JSON payloads, claimed by a small pool of worker
+threads in submission order and executed by a runner callable supplied
+by the application. The runner yields chunks of scored results, which
+are written to SQLite as they arrive, so progress (processed count,
+throughput, ETA) can be polled while a job runs and ranked results can
+be paged afterwards without holding them in memory.
+
+Several processes can share a database. A claimed job is leased to the
+claiming queue, which renews the lease with a heartbeat while the job
+runs; a job whose lease has expired (its process stopped or hung) is
+re-queued by whichever queue notices first and runs again from scratch.
+A worker that has lost its lease stops writing results.
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class LeaseLost(Exception):
+    """The job was re-queued by another queue after this one's lease expired."""
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Persistent job queue with a worker thread pool.
+
+    Args:
+        db_path (str): SQLite database file
+        runner (callable): runner(payload, set_total) returning an iterable
+            of (results, skipped) chunks; results are dicts ranked by their
+            `score_key` value, skipped are dicts describing unusable inputs.
+            set_total(n) reports the number of inputs once it is known.
+        workers (int): Jobs executed concurrently
+        score_key (str): Result field used for ranking
+        poll_interval (float): Seconds between checks for jobs submitted
+            by other processes sharing the database
+        lease_seconds (float): How long a running job may go without a
+            heartbeat before another queue re-queues it
+        on_finish (callable, optional): on_finish(payload), called once the
+            job is done or has failed while this queue held its lease (not
+            when the lease was lost), e.g. to delete the job's input files
+    """
+
+    def __init__(self, db_path, runner, workers=1, score_key="similarity", poll_interval=2.0, lease_seconds=60.0,
+                 on_finish=None):
+        self.runner = runner
+        self.on_finish = on_finish
+        self.workers = workers
+        self.score_key = score_key
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Unique per queue, so two queues in one process hold separate leases
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._threads = []
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " total INTEGER,"
+            " processed INTEGER NOT NULL DEFAULT 0,"
+            " skipped TEXT NOT NULL DEFAULT '[]',"
+            " error TEXT,"
+            " owner TEXT,"
+            " heartbeat REAL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_results ("
+            " job_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " score REAL NOT NULL,"
+            " result TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, seq))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS job_results_rank ON job_results (job_id, score DESC, seq)")
+        self._db.commit()
+
+    def start(self):
+        """Start the worker threads and the lease heartbeat (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, payload):
+        """Queue a job and return its id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), time.time())
+            )
+            self._db.commit()
+            self._wake.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Status and progress of a job, or None if there is no such job."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, created_at, started_at, finished_at, total, processed, skipped, error"
+                " FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, created_at, started_at, finished_at, total, processed, skipped, error = row
+
+        throughput = eta = None
+        if started_at is not None:
+            elapsed = (finished_at or time.time()) - started_at
+            if elapsed > 0 and processed:
+                throughput = processed / elapsed
+            if status == RUNNING and throughput and total is not None:
+                eta = max(total - processed, 0) / throughput
+        return {
+            "id": job_id,
+            "status": status,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "total": total,
+            "processed": processed,
+            "throughput": throughput,
+            "eta_seconds": eta,
+            "skipped": json.loads(skipped),
+            "error": error
+        }
+
+    def results(self, job_id, offset=0, limit=100):
+        """A page of a job's results, best first. Partial while the job is running."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT result FROM job_results WHERE job_id = ? ORDER BY score DESC, seq LIMIT ? OFFSET ?",
+                (job_id, limit, offset)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def requeue_expired(self):
+        """Re-queue running jobs whose lease has expired; returns how many.
+
+        Jobs that were running when their process stopped start again from scratch.
+        """
+        with self._lock:
+            expired = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                (RUNNING, time.time() - self.lease_seconds)
+            )]
+            requeued = 0
+            for job_id in expired:
+                # Conditional, so a lease renewed meanwhile is left alone
+                if self._db.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, heartbeat = NULL, started_at = NULL, total = NULL,"
+                    " processed = 0, skipped = '[]' WHERE id = ? AND status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                    (QUEUED, job_id, RUNNING, time.time() - self.lease_seconds)
+                ).rowcount:
+                    self._db.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                    requeued += 1
+            self._db.commit()
+        if requeued:
+            logger.info("Re-queued %d jobs with expired leases", requeued)
+        return requeued
+
+    def _claim(self):
+        """Lease the oldest queued job to this queue, waiting for one if there is none."""
+        with self._lock:
+            while True:
+                self.requeue_expired()
+                row = self._db.execute(
+                    "SELECT id, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    # Conditional update, so a job is never claimed by two processes
+                    now = time.time()
+                    claimed = self._db.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                        (RUNNING, now, self.owner, now, row[0], QUEUED)
+                    ).rowcount
+                    self._db.commit()
+                    if claimed:
+                        return row[0], json.loads(row[1])
+                    continue
+                self._wake.wait(self.poll_interval)
+
+    def _work(self):
+        while True:
+            job_id, payload = self._claim()
+            try:
+                self._run(job_id, payload)
+            except LeaseLost:
+                # The re-queued copy still needs the job's inputs
+                logger.warning("Job %s was re-queued elsewhere after its lease expired; abandoning it", job_id)
+                continue
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                with self._lock:
+                    failed = self._db.execute(
+                        "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ? AND owner = ? AND status = ?",
+                        (FAILED, time.time(), str(e), job_id, self.owner, RUNNING)
+                    ).rowcount
+                    self._db.commit()
+                if not failed:
+                    logger.warning("Job %s failed after its lease expired; leaving it to its re-queued copy", job_id)
+                    continue
+            self._finish(job_id, payload)
+
+    def _finish(self, job_id, payload):
+        if self.on_finish is None:
+            return
+        try:
+            self.on_finish(payload)
+        except Exception:
+            logger.exception("Clean-up of job %s failed", job_id)
+
+    def _heartbeat(self):
+        """Renew the leases of this queue's running jobs."""
+        while True:
+            time.sleep(self.lease_seconds / 4)
+            with self._lock:
+                self._db.execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?", (time.time(), self.owner, RUNNING)
+                )
+                self._db.commit()
+
+    def _update_owned(self, job_id, assignments, values):
+        """Update a job this queue holds the lease on (inside the caller's transaction)."""
+        if not self._db.execute(
+            f"UPDATE jobs SET {assignments}, heartbeat = ? WHERE id = ? AND owner = ? AND status = ?",
+            (*values, time.time(), job_id, self.owner, RUNNING)
+        ).rowcount:
+            self._db.rollback()
+            raise LeaseLost(job_id)
+
+    def _run(self, job_id, payload):
+        def set_total(total):
+            with self._lock:
+                self._update_owned(job_id, "total = ?", (total,))
+                self._db.commit()
+
+        seq = 0
+        skipped = []
+        for results, chunk_skipped in self.runner(payload, set_total):
+            rows = []
+            for result in results:
+                rows.append((job_id, seq, float(result[self.score_key]), json.dumps(result)))
+                seq += 1
+            skipped.extend(chunk_skipped)
+            with self._lock:
+                # Checked first, so results are only written while the lease is held
+                self._update_owned(
+                    job_id, "processed = ?, skipped = ?", (seq + len(skipped), json.dumps(skipped))
+                )
+                self._db.executemany(
+                    "INSERT INTO job_results (job_id, seq, score, result) VALUES (?, ?, ?, ?)", rows
+                )
+                self._db.commit()
+
+        with self._lock:
+            self._update_owned(
+                job_id, "status = ?, finished_at = ?, total = ?", (DONE, time.time(), seq + len(skipped))
+            )
+            self._db.commit()
+        logger.info("Job %s scored %d resumes", job_id, seq)
@@ -0,0 +1,236 @@
+"""In-process counters and histograms exposed in the Prometheus text format.
+
+Code wraps each pipeline stage in ``with metrics.stage("encode"):``,
+which records the stage's duration in a histogram and, while a request
+collects debug timings (see ``start_timings``), adds it to that
+request's per-stage totals. Stages nest: a stage's time includes the
+stages run inside it.
+
+A disabled ``Metrics`` records nothing: ``stage()`` hands out one shared
+no-op timer unless the current request collects timings, and counters
+and histograms return as soon as they are called.
+"""
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+
+import numpy as np
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+TEXT_LENGTH_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+# Per-stage seconds of the request being handled in this context, or None
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, metrics, name, documentation, labelnames=()):
+        self._metrics = metrics
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not self._metrics.enabled:
+            return
+        key = tuple([labels[name] for name in self.labelnames])
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """Bucketed distribution (cumulative buckets, sum and count) per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, metrics, name, documentation, buckets, labelnames=()):
+        self._metrics = metrics
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(float(bound) for bound in buckets)
+        self.labelnames = tuple(labelnames)
+        # label values -> [per-bucket counts incl. +Inf (a list, cheapest to
+        # increment one at a time), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        return entry
+
+    def observe(self, value, **labels):
+        if not self._metrics.enabled:
+            return
+        key = tuple([labels[name] for name in self.labelnames])
+        # bisect on a tuple is several times cheaper than NumPy for one value
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._entry(key)
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def observe_many(self, values, **labels):
+        """Observe a whole array of values at once."""
+        if not self._metrics.enabled or len(values) == 0:
+            return
+        values = np.asarray(values, dtype=np.float64)
+        key = tuple([labels[name] for name in self.labelnames])
+        counts = np.bincount(np.searchsorted(self.buckets, values), minlength=len(self.buckets) + 1)
+        with self._lock:
+            entry = self._entry(key)
+            entry[0] = [total + int(count) for total, count in zip(entry[0], counts)]
+            entry[1] += float(values.sum())
+            entry[2] += len(values)
+
+    def lines(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = np.cumsum(counts)
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), cumulative):
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {bucket_count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ("_histogram", "_name", "_timings", "_started")
+
+    def __init__(self, histogram, name, timings):
+        self._histogram = histogram
+        self._name = name
+        self._timings = timings
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self._started
+        self._histogram.observe(elapsed, stage=self._name)
+        if self._timings is not None:
+            self._timings[self._name] = self._timings.get(self._name, 0.0) + elapsed
+        return False
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Metrics:
+    """Registry of named counters and histograms plus per-stage timers.
+
+    Args:
+        namespace (str): Prefix of every metric name
+        enabled (bool): Record anything at all; debug timings of a
+            request are collected either way
+    """
+
+    def __init__(self, namespace, enabled=True):
+        self.namespace = namespace
+        self.enabled = enabled
+        self._metrics = []
+        self._collectors = []
+        self._stages = self.histogram(
+            "stage_duration_seconds", "Time spent in each pipeline stage", DURATION_BUCKETS, ("stage",)
+        )
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(self, f"{self.namespace}_{name}", documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, buckets, labelnames=()):
+        metric = Histogram(self, f"{self.namespace}_{name}", documentation, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """Register fn() -> [(name, kind, documentation, {labels: value} or value)] for
+        values kept elsewhere (e.g. cache counters), read at every render."""
+        self._collectors.append(fn)
+        return fn
+
+    def stage(self, name):
+        """Context manager timing one run of a pipeline stage."""
+        timings = _timings.get()
+        if not self.enabled and timings is None:
+            return _NULL_TIMER
+        return _StageTimer(self._stages, name, timings)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def request_timings(timings=None):
+        """Collect the per-stage seconds of the code run inside this block (in
+        this thread or context) into a dictionary, which is yielded."""
+        timings, token = start_timings(timings)
+        try:
+            yield timings
+        finally:
+            stop_timings(token)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        for fn in self._collectors:
+            for name, kind, documentation, value in fn():
+                name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                samples = value if isinstance(value, dict) else {(): value}
+                for labels, sample in samples.items():
+                    if sample is not None:
+                        names, values = zip(*labels) if labels else ((), ())
+                        lines.append(f"{name}{_format_labels(names, values)} {_format_value(sample)}")
+        return "\n".join(lines) + "\n"
+
+
+def start_timings(timings=None):
+    """Start collecting per-stage seconds in the current context.
+
+    Returns:
+        tuple: (the timings dictionary, token for stop_timings)
+    """
+    timings = {} if timings is None else timings
+    return timings, _timings.set(timings)
+
+
+def stop_timings(token):
+    _timings.reset(token)
@@ -0,0 +1,83 @@
+"""Process-wide registry that loads each model once, on first use or on warm-up.
+
+Importing a module that registers models costs nothing; the first
+``get()`` (or an explicit ``warm_up()``) runs the loader under a
+per-model lock, so concurrent callers never load the same model twice.
+Load times are recorded for the readiness endpoint and start-up logs.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Named model loaders whose results are cached for the life of the process."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._errors = {}
+        self.load_seconds = {}
+
+    def register(self, name, loader):
+        """Register a zero-argument callable that builds the model called `name`."""
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        """Return the model, loading it first if this is the first request for it."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                started = time.perf_counter()
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self.load_seconds[name] = time.perf_counter() - started
+                self._errors.pop(name, None)
+                self._models[name] = model
+                logger.info("Loaded model %s in %.2fs", name, self.load_seconds[name])
+        return model
+
+    @property
+    def ready(self):
+        return all(name in self._models for name in self._loaders)
+
+    def warm_up(self, names=None):
+        """Load the given (default: all) models now and log the start-up time breakdown."""
+        started = time.perf_counter()
+        for name in names or list(self._loaders):
+            self.get(name)
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.load_seconds.items())
+        logger.info("Models warmed up in %.2fs (%s)", time.perf_counter() - started, breakdown)
+
+    def warm_up_in_background(self, names=None):
+        """Start warm_up() in a daemon thread so the server can answer liveness checks meanwhile."""
+        def run():
+            try:
+                self.warm_up(names)
+            except Exception:
+                logger.exception("Model warm-up failed")
+
+        thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """Per-model load state for the readiness endpoint."""
+        return {
+            name: {
+                "loaded": name in self._models,
+                "load_seconds": self.load_seconds.get(name),
+                "error": self._errors.get(name)
+            }
+            for name in self._loaders
+        }
@@ -0,0 +1,180 @@
+"""Bulk PDF text extraction with PyMuPDF.
+
+Large uploads are extracted across a pool of worker processes, kept for
+the life of the process and shared by every caller. Each file is subject
+to a size limit, a page limit and a per-file timeout, so one pathological
+PDF cannot stall the batch, and every result carries its own timing for
+reporting.
+"""
+import atexit
+import math
+import multiprocessing
+import signal
+import threading
+import time
+from typing import NamedTuple
+
+import fitz  # PyMuPDF for PDF processing
+
+# Below this many files sending them to the pool costs more than it saves
+MIN_FILES_FOR_POOL = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ExtractionResult(NamedTuple):
+    """Outcome of extracting one file; `error` is None on success."""
+    name: str
+    text: str
+    pages: int
+    seconds: float
+    error: str
+
+
+def extract_text_from_pdf_bytes(pdf_bytes, max_pages=None):
+    """Return (text, total page count) of a PDF, reading at most max_pages pages."""
+    doc = fitz.open("pdf", pdf_bytes)
+    try:
+        page_count = doc.page_count
+        if max_pages:
+            page_count_to_read = min(page_count, max_pages)
+        else:
+            page_count_to_read = page_count
+        text = "".join(doc[i].get_text() for i in range(page_count_to_read))
+    finally:
+        doc.close()
+    return text, page_count
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def _extract_one(name, pdf_bytes, max_pages=None, timeout=None):
+    """Extract one file, converting failures and timeouts into an ExtractionResult."""
+    started = time.perf_counter()
+    # Signals can only be handled on the main thread; extract_texts sends
+    # files from other threads to the pool when there is a timeout
+    use_alarm = (
+        timeout and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    )
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        text, pages = extract_text_from_pdf_bytes(pdf_bytes, max_pages)
+        return ExtractionResult(name, text, pages, time.perf_counter() - started, None)
+    except _Timeout:
+        return ExtractionResult(name, "", 0, time.perf_counter() - started, f"Timed out after {timeout}s")
+    except Exception as e:
+        return ExtractionResult(name, "", 0, time.perf_counter() - started, str(e))
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def _get_pool(workers):
+    """The shared worker pool, started with `workers` processes on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers only import this module, not the caller's (e.g. Streamlit) script
+            _pool = multiprocessing.get_context("spawn").Pool(workers)
+        return _pool
+
+
+def _discard_pool(pool):
+    """Kill a pool with a worker stuck on a file; the next call starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.terminate()
+    pool.join()
+
+
+@atexit.register
+def shutdown_pool():
+    """Stop the shared worker pool (also done at interpreter exit)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+
+
+def extract_texts(files, max_workers=None, max_pages=None, max_bytes=None, timeout=None):
+    """Extract text from many PDFs, in parallel when the batch is large enough.
+
+    Small batches are extracted in the calling process, except on threads
+    other than the main thread when a timeout is given: only the main
+    thread can arm the timeout alarm, so those batches always use the pool.
+
+    Args:
+        files (list[tuple[str, bytes]]): (name, PDF bytes) pairs
+        max_workers (int, optional): Worker processes (default: CPU count)
+        max_pages (int, optional): Pages read per file; the rest are ignored
+        max_bytes (int, optional): Larger files are rejected without parsing
+        timeout (float, optional): Seconds allowed per file
+
+    Returns:
+        list[ExtractionResult]: One result per file, in input order.
+    """
+    files = list(files)
+    results = [None] * len(files)
+    pending = []
+    for i, (name, pdf_bytes) in enumerate(files):
+        if max_bytes and len(pdf_bytes) > max_bytes:
+            results[i] = ExtractionResult(
+                name, "", 0, 0.0, f"File is {len(pdf_bytes) / 1e6:.1f} MB, limit is {max_bytes / 1e6:.1f} MB"
+            )
+        else:
+            pending.append(i)
+    if not pending:
+        return results
+
+    pool_size = max_workers or multiprocessing.cpu_count()
+    workers = min(pool_size, len(pending))
+    needs_pool = timeout and threading.current_thread() is not threading.main_thread()
+    if not needs_pool and (len(pending) < MIN_FILES_FOR_POOL or workers <= 1):
+        for i in pending:
+            results[i] = _extract_one(files[i][0], files[i][1], max_pages, timeout)
+        return results
+
+    pool = _get_pool(pool_size)
+    async_results = {
+        i: pool.apply_async(_extract_one, (files[i][0], files[i][1], max_pages, timeout))
+        for i in pending
+    }
+    # Workers time out individual files themselves; this deadline only
+    # catches a worker stuck inside native code where the alarm cannot fire
+    deadline = None
+    if timeout:
+        deadline = time.monotonic() + timeout * (math.ceil(len(pending) / workers) + 1)
+    stuck = False
+    for i, async_result in async_results.items():
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                # Woken every second to notice another caller discarding the pool
+                results[i] = async_result.get(1.0 if remaining is None else min(remaining, 1.0))
+                break
+            except multiprocessing.TimeoutError:
+                if pool is not _pool:
+                    results[i] = ExtractionResult(files[i][0], "", 0, 0.0, "Extraction worker pool was restarted")
+                    break
+                if remaining is not None and remaining <= 1.0:
+                    results[i] = ExtractionResult(files[i][0], "", 0, float(timeout), f"Timed out after {timeout}s")
+                    stuck = True
+                    break
+    if stuck:
+        # terminate() is the only way to stop a worker stuck on a pathological file
+        _discard_pool(pool)
+    return results
@@ -0,0 +1,56 @@
+"""Top-k selection over score arrays and score streams.
+
+Ranking only ever needs the k best candidates, so scores are kept in a
+compact array (or, when they arrive chunk by chunk, a k-sized heap) and
+result objects are built for the selected candidates only. Ties keep
+input order, matching a stable descending sort.
+"""
+import heapq
+
+import numpy as np
+
+
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, best first, without sorting the rest."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    # The k-th best score; of the candidates tied with it, the earliest are kept
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+    best = np.sort(np.concatenate([above, tied]))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def rank_indices(scores, top_k=None):
+    """Indices of `scores` best first: the top_k best, or all of them if top_k is None."""
+    scores = np.asarray(scores)
+    if top_k is None:
+        return np.argsort(-scores, kind="stable")
+    return top_k_indices(scores, top_k)
+
+
+class TopK:
+    """Keeps the k best (score, item) pairs pushed so far in a min-heap."""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._pushed = 0
+
+    def push(self, score, item):
+        # The push counter breaks ties (earlier wins) and keeps items from being compared
+        entry = (score, -self._pushed, item)
+        self._pushed += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self.k > 0 and entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """The kept items, best first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,406 @@
+"""Persistent resume corpus for search without posting resume texts per request.
+
+Resume metadata and extracted features live in SQLite; normalized
+embeddings live in a memory-mapped float32 matrix with one row per
+resume, so a semantic prefilter over the whole corpus is a single
+matrix-vector product that the OS pages in on demand. Top-k queries go
+through a pluggable vector index (see vector_index), and an inverted
+index over the extracted terms (see inverted_index) answers keyword,
+role and must-have queries for every row at once.
+
+Several processes (e.g. gunicorn workers) can share one corpus
+directory. Rows are allocated inside an SQLite write transaction, and
+every add or delete is appended to a change log that each process
+replays into its in-memory state (live mask, inverted index, vector
+index) before answering a query.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from inverted_index import InvertedIndex
+from vector_index import create_vector_index
+
+
+class StaleFeaturesError(RuntimeError):
+    """The stored features were extracted differently from how the caller extracts them."""
+
+
+def _stale_features_message(db, path, features_version):
+    """Why the corpus in db cannot be used with features_version, or None if it can."""
+    stored = db.execute("SELECT value FROM meta WHERE key = 'features_version'").fetchone()
+    if stored is None and db.execute("SELECT 1 FROM resumes LIMIT 1").fetchone() is None:
+        return None
+    if stored is not None and stored[0] == features_version:
+        return None
+    return (
+        f"Resume corpus at {path} holds features extracted as "
+        f"{stored[0] if stored else 'an earlier, unrecorded version'}, not {features_version}"
+    )
+
+
+def check_features_version(path, features_version):
+    """Raise StaleFeaturesError if a corpus stored at path holds features of another version.
+
+    Only reads SQLite, so it can run at start-up before any model is loaded.
+    """
+    db_path = os.path.join(path, "corpus.sqlite3")
+    if not os.path.exists(db_path):
+        return
+    db = sqlite3.connect(db_path)
+    try:
+        message = _stale_features_message(db, path, features_version)
+    except sqlite3.OperationalError:
+        # Tables not created yet
+        return
+    finally:
+        db.close()
+    if message:
+        raise StaleFeaturesError(message)
+
+
+class ResumeCorpus:
+    """Resumes keyed by caller-supplied id, each stored at a fixed matrix row.
+
+    Deleting a resume tombstones its row (zeroed and masked out of search);
+    re-adding an existing id tombstones the old row and appends a new one.
+
+    ``features_version`` identifies how features are extracted (models,
+    extractor version, taxonomy). A corpus records the version its
+    features were extracted with, and opening it with a different one
+    raises StaleFeaturesError until reextract_features() has run; pass
+    None to skip the check.
+    """
+
+    def __init__(self, path, dim, initial_capacity=1024, index_backend="brute", index_options=None,
+                 features_version=None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._matrix_path = os.path.join(path, "embeddings.f32")
+
+        # Autocommit mode: writes open their own BEGIN IMMEDIATE transactions
+        self._db = sqlite3.connect(
+            os.path.join(path, "corpus.sqlite3"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resumes ("
+            " id TEXT PRIMARY KEY,"
+            " row INTEGER UNIQUE NOT NULL,"
+            " name TEXT,"
+            " text TEXT NOT NULL,"
+            " features TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Every row added (live = 1) or tombstoned (live = 0), in commit order
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " row INTEGER NOT NULL,"
+            " live INTEGER NOT NULL)"
+        )
+
+        with self._write():
+            if not os.path.exists(self._matrix_path):
+                with open(self._matrix_path, "wb") as f:
+                    f.truncate(initial_capacity * dim * 4)
+            if features_version is not None:
+                self._check_features_version(features_version)
+        self._map_matrix()
+
+        # One read transaction, so the snapshot and the change log position agree
+        self._db.execute("BEGIN")
+        try:
+            self._seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            self._next_row = self._stored_next_row()
+            self._map_matrix(self._next_row)
+            self._live = np.zeros(self._matrix.shape[0], dtype=bool)
+            for (row,) in self._db.execute("SELECT row FROM resumes"):
+                self._live[row] = True
+            self._load_terms()
+        finally:
+            self._db.commit()
+
+        self.index = create_vector_index(index_backend, self, path, **(index_options or {}))
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return int(self._live[:self._next_row].sum())
+
+    @property
+    def rows_used(self):
+        """Number of matrix rows handed out so far, live or tombstoned."""
+        return self._next_row
+
+    def embeddings(self):
+        """The used part of the embedding matrix (tombstoned rows are zero)."""
+        return self._matrix[:self._next_row]
+
+    def live_mask(self):
+        return self._live[:self._next_row]
+
+    def add(self, ids, names, texts, embeddings, features):
+        """Store resumes with their normalized embeddings and feature sets.
+
+        Returns the matrix rows assigned to the resumes, in input order.
+        """
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate resume ids in one request")
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            with self._write():
+                replaced = [self._tombstone(resume_id) for resume_id in ids]
+
+                # Rows are handed out under the database write lock, so processes never share one
+                start = self._stored_next_row()
+                rows = list(range(start, start + len(ids)))
+                self._reserve(start + len(ids))
+                self._matrix[start:start + len(ids)] = embeddings
+                self._matrix.flush()
+
+                self._db.executemany(
+                    "INSERT INTO resumes (id, row, name, text, features) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (resume_id, row, name, text, json.dumps([sorted(values) for values in feature_sets]))
+                        for resume_id, row, name, text, feature_sets in zip(ids, rows, names, texts, features)
+                    ]
+                )
+                self._db.executemany("INSERT INTO changes (row, live) VALUES (?, 1)", [(row,) for row in rows])
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_row', ?)", (str(start + len(ids)),)
+                )
+            self._zero_rows(row for row in replaced if row is not None)
+            # Apply the new rows (and any other process's changes before them) here
+            self._sync()
+            return rows
+
+    def delete(self, resume_id):
+        """Remove a resume; returns False if the id is unknown."""
+        with self._lock:
+            with self._write():
+                row = self._tombstone(resume_id)
+            if row is None:
+                return False
+            self._zero_rows([row])
+            self._sync()
+            return True
+
+    def search(self, query_embedding, k):
+        """Return (rows, cosine scores) of the k live resumes closest to a normalized query."""
+        with self._lock:
+            self._sync()
+            return self.index.search(query_embedding, k)
+
+    def live_rows(self):
+        with self._lock:
+            self._sync()
+            return np.flatnonzero(self._live[:self._next_row])
+
+    def rows_with_terms(self, terms):
+        """Live rows whose skills or keywords include every one of the terms."""
+        with self._lock:
+            self._sync()
+            rows = self.terms.rows_with_all(terms)
+            return rows[self._live[rows]]
+
+    def semantic_scores(self, query_embedding, rows):
+        """Exact cosine scores of the given (sorted) rows against a normalized query."""
+        with self._lock:
+            return np.asarray(self._matrix[rows], dtype=np.float32) @ np.asarray(query_embedding, dtype=np.float32)
+
+    def lexical_scores(self, profile, rows):
+        """(keyword scores, role scores) of the given rows, from posting-list merges."""
+        with self._lock:
+            self._sync()
+            keyword_scores = self.terms.keyword_scores(profile, self._next_row)[rows]
+            if not profile.has_role_requirement:
+                return keyword_scores, np.zeros(len(rows))
+            return keyword_scores, self.terms.role_scores(profile, self._next_row)[rows]
+
+    def get_rows(self, rows):
+        """Return {row: {"id", "name", "features"}} for the given matrix rows."""
+        rows = [int(row) for row in rows]
+        records = {}
+        with self._lock:
+            for start in range(0, len(rows), 500):
+                chunk = rows[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row, resume_id, name, features in self._db.execute(
+                    f"SELECT row, id, name, features FROM resumes WHERE row IN ({placeholders})", chunk
+                ):
+                    records[row] = {
+                        "id": resume_id,
+                        "name": name,
+                        "features": tuple(set(values) for values in json.loads(features))
+                    }
+        return records
+
+    def rows_for_ids(self, ids):
+        """Return {id: row} for those of the given resume ids that are in the corpus."""
+        ids = list(ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for resume_id, row in self._db.execute(
+                    f"SELECT id, row FROM resumes WHERE id IN ({placeholders})", chunk
+                ):
+                    found[resume_id] = row
+        return found
+
+    def reextract_features(self, analyze, features_version, batch_size=1000):
+        """Recompute the features of every stored resume and record their version.
+
+        Args:
+            analyze (callable): analyze(texts) -> feature sets per text, as
+                passed to add()
+            features_version (str): Version the new features are extracted with
+
+        Returns:
+            int: Number of resumes processed
+        """
+        with self._lock:
+            rows = [row for (row,) in self._db.execute("SELECT row FROM resumes ORDER BY row")]
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                placeholders = ",".join("?" * len(chunk))
+                records = self._db.execute(
+                    f"SELECT row, text FROM resumes WHERE row IN ({placeholders}) ORDER BY row", chunk
+                ).fetchall()
+                features = analyze([text for _, text in records])
+                with self._write():
+                    self._db.executemany(
+                        "UPDATE resumes SET features = ? WHERE row = ?",
+                        [
+                            (json.dumps([sorted(values) for values in feature_sets]), row)
+                            for (row, _), feature_sets in zip(records, features)
+                        ]
+                    )
+            with self._write():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('features_version', ?)", (features_version,)
+                )
+            self._load_terms()
+            return len(rows)
+
+    def _check_features_version(self, features_version):
+        message = _stale_features_message(self._db, self.path, features_version)
+        if message:
+            raise StaleFeaturesError(message)
+        # A new (or empty) corpus takes the caller's version
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('features_version', ?)", (features_version,)
+        )
+
+    def _load_terms(self):
+        """Rebuild the inverted index from the stored live rows (dropping postings of deleted resumes)."""
+        self.terms = InvertedIndex()
+        for row, features in self._db.execute("SELECT row, features FROM resumes ORDER BY row"):
+            self.terms.add(row, [set(values) for values in json.loads(features)])
+
+    @contextlib.contextmanager
+    def _write(self):
+        """Database write transaction, holding SQLite's write lock across processes."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.rollback()
+            raise
+        self._db.commit()
+
+    def _stored_next_row(self):
+        next_row = self._db.execute("SELECT value FROM meta WHERE key = 'next_row'").fetchone()
+        return int(next_row[0]) if next_row else 0
+
+    def _sync(self):
+        """Apply rows added or tombstoned since the last sync, by this or another process."""
+        changes = self._db.execute(
+            "SELECT seq, row, live FROM changes WHERE seq > ? ORDER BY seq", (self._seq,)
+        ).fetchall()
+        if not changes:
+            return
+        # Consecutive changes of the same kind are applied as one batch
+        start = 0
+        while start < len(changes):
+            live = changes[start][2]
+            end = start
+            while end < len(changes) and changes[end][2] == live:
+                end += 1
+            rows = np.array([row for _, row, _ in changes[start:end]], dtype=np.int64)
+            if live:
+                self._apply_added(rows)
+            else:
+                self._live[rows] = False
+                self.index.remove(rows)
+            start = end
+        self._seq = changes[-1][0]
+
+    def _apply_added(self, rows):
+        self._next_row = max(self._next_row, int(rows.max()) + 1)
+        self._map_matrix(self._next_row)
+        self._live[rows] = True
+        features = {}
+        for start in range(0, len(rows), 500):
+            chunk = [int(row) for row in rows[start:start + 500]]
+            placeholders = ",".join("?" * len(chunk))
+            features.update(self._db.execute(
+                f"SELECT row, features FROM resumes WHERE row IN ({placeholders})", chunk
+            ))
+        # Rows are allocated in change order, so postings stay sorted
+        for row in rows:
+            if int(row) in features:
+                self.terms.add(int(row), [set(values) for values in json.loads(features[int(row)])])
+        self.index.add(rows, np.asarray(self._matrix[rows], dtype=np.float32))
+
+    def _tombstone(self, resume_id):
+        """Delete a resume's record inside a write transaction; returns its row, or None if unknown."""
+        row = self._db.execute("SELECT row FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("DELETE FROM resumes WHERE id = ?", (resume_id,))
+        self._db.execute("INSERT INTO changes (row, live) VALUES (?, 0)", (row[0],))
+        return row[0]
+
+    def _zero_rows(self, rows):
+        """Zero the embeddings of committed tombstones."""
+        rows = list(rows)
+        if not rows:
+            return
+        self._map_matrix(max(rows) + 1)
+        for row in rows:
+            self._matrix[row] = 0.0
+        self._matrix.flush()
+
+    def _map_matrix(self, rows_needed=0):
+        """(Re)map the matrix file if it has grown, e.g. in another process, past the current mapping."""
+        matrix = getattr(self, "_matrix", None)
+        if matrix is not None and rows_needed <= matrix.shape[0]:
+            return
+        capacity = os.path.getsize(self._matrix_path) // (4 * self.dim)
+        if matrix is not None:
+            matrix.flush()
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        if hasattr(self, "_live"):
+            live = np.zeros(capacity, dtype=bool)
+            live[:len(self._live)] = self._live
+            self._live = live
+
+    def _reserve(self, rows_needed):
+        """Grow the matrix file to hold rows_needed rows (called inside a write transaction)."""
+        capacity = os.path.getsize(self._matrix_path) // (4 * self.dim)
+        if rows_needed > capacity:
+            while capacity < rows_needed:
+                capacity *= 2
+            self._matrix.flush()
+            with open(self._matrix_path, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+        self._map_matrix(rows_needed)
@@ -0,0 +1,137 @@
+"""Score components kept apart from the weights that combine them.
+
+A component matrix has one row per resume and the columns in COLUMNS:
+its semantic, keyword and role scores and the job description's
+has-role-requirement flag. Only building the matrix needs the models;
+applying any number of weight sets to it is two small matrix products,
+so weighting schemes can be compared on large batches without
+rescoring. ComponentStore keeps recent matrices in memory so clients
+can refer to them by id.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from ranking import rank_indices
+
+COLUMNS = ("semantic_score", "keyword_score", "role_score", "has_role_requirement")
+WEIGHT_KEYS = (
+    "semantic_weight_with_role",
+    "keyword_weight_with_role",
+    "role_weight",
+    "semantic_weight_no_role",
+    "keyword_weight_no_role"
+)
+
+
+def component_matrix(combined):
+    """(resumes x 4) component matrix from a combine_scores result over arrays."""
+    semantic = np.asarray(combined["semantic_score"], dtype=np.float64)
+    return np.column_stack([
+        semantic,
+        np.asarray(combined["keyword_score"], dtype=np.float64),
+        np.asarray(combined["role_score"], dtype=np.float64),
+        np.full(len(semantic), float(bool(combined["has_role_requirement"])))
+    ])
+
+
+def as_component_matrix(values):
+    """Validate a (resumes x 4) component matrix given as nested lists or an array.
+
+    Raises:
+        ValueError: If the values do not have one row of len(COLUMNS) numbers per resume.
+    """
+    try:
+        components = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("components must be a list of numeric rows")
+    if components.size == 0:
+        return components.reshape(0, len(COLUMNS))
+    if components.ndim != 2 or components.shape[1] != len(COLUMNS):
+        raise ValueError(f"components rows must have {len(COLUMNS)} values: {', '.join(COLUMNS)}")
+    return components
+
+
+def resolve_weights(weights, defaults):
+    """Complete a weights dictionary with defaults, rejecting unknown or non-numeric values."""
+    weights = weights or {}
+    unknown = sorted(set(weights) - set(WEIGHT_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown weights: {', '.join(unknown)}")
+    resolved = {**defaults, **weights}
+    for key in WEIGHT_KEYS:
+        value = resolved[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Weight {key} must be a number")
+    return resolved
+
+
+def weight_matrices(weight_sets):
+    """(sets x 3) coefficients of the semantic, keyword and role columns, with and without a role requirement."""
+    with_role = np.array([
+        [weights["semantic_weight_with_role"], weights["keyword_weight_with_role"], weights["role_weight"]]
+        for weights in weight_sets
+    ], dtype=np.float64).reshape(-1, 3)
+    no_role = np.array([
+        [weights["semantic_weight_no_role"], weights["keyword_weight_no_role"], 0.0]
+        for weights in weight_sets
+    ], dtype=np.float64).reshape(-1, 3)
+    return with_role, no_role
+
+
+def combine_weight_sets(components, weight_sets):
+    """Final score of every resume under every (complete) weight set.
+
+    Returns:
+        np.ndarray: (resumes x sets) final scores, equal to what
+        combine_scores gives for each resume and weight set.
+    """
+    with_role, no_role = weight_matrices(weight_sets)
+    scores = components[:, :3]
+    has_role = components[:, 3:4] > 0
+    return np.where(has_role, scores @ with_role.T, scores @ no_role.T)
+
+
+def rank_weight_sets(components, weight_sets, top_k=None):
+    """Rank the resumes under each weight set.
+
+    Returns:
+        list[tuple]: (indices best first, their final scores) per weight
+        set, holding only the top_k best if top_k is given.
+    """
+    finals = combine_weight_sets(components, weight_sets)
+    rankings = []
+    for j in range(finals.shape[1]):
+        indices = rank_indices(finals[:, j], top_k)
+        rankings.append((indices, finals[indices, j]))
+    return rankings
+
+
+class ComponentStore:
+    """In-memory LRU of component matrices and their resumes' ids and names, by generated id."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, components, resumes):
+        """Store a matrix with one {"id", "name"} per row; returns its id, or None if the store is disabled."""
+        if self.max_entries <= 0:
+            return None
+        components_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[components_id] = (components, resumes)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return components_id
+
+    def get(self, components_id):
+        """(components, resumes) for an id, or None if unknown or evicted."""
+        with self._lock:
+            entry = self._entries.get(components_id)
+            if entry is not None:
+                self._entries.move_to_end(components_id)
+            return entry
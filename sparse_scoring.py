@@ -0,0 +1,103 @@
+"""Vectorized keyword and role scoring over sparse term matrices.
+
+A batch of resumes' DocumentFeatures is mapped into per-field
+vocabularies and stored as binary CSR matrices (resumes x terms). The
+keyword/skill overlap with a job description is then one sparse
+matrix-vector product per field, and partial role matches use a
+role-containment matrix (JD roles x resume role vocabulary) whose rows
+are computed once per distinct JD role and reused across queries.
+
+Scores are identical to keyword_score_from_features and
+role_score_from_roles applied resume by resume.
+"""
+import numpy as np
+from scipy import sparse
+
+FIELDS = ("keywords", "skills", "roles")
+
+
+def _csr_matrix(term_sets, vocabulary):
+    """Binary resumes x terms CSR matrix, growing `vocabulary` as terms are seen."""
+    indptr = [0]
+    indices = []
+    for terms in term_sets:
+        for term in terms:
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+        indptr.append(len(indices))
+    data = np.ones(len(indices))
+    return sparse.csr_matrix(
+        (data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(term_sets), len(vocabulary))
+    )
+
+
+class TermMatrix:
+    """Sparse keyword/skill/role matrices for a fixed batch of resumes."""
+
+    def __init__(self, resume_features):
+        resume_features = list(resume_features)
+        self.n_resumes = len(resume_features)
+        self.vocabularies = {}
+        self.matrices = {}
+        for position, field in enumerate(FIELDS):
+            vocabulary = {}
+            self.matrices[field] = _csr_matrix([features[position] for features in resume_features], vocabulary)
+            self.vocabularies[field] = vocabulary
+        self._role_terms = list(self.vocabularies["roles"])
+        # Role-containment rows: jd role -> indicator over the resume role vocabulary
+        self._containment = {}
+
+    def count_matches(self, field, terms):
+        """For every resume, how many of `terms` appear in its `field`."""
+        vocabulary = self.vocabularies[field]
+        query = np.zeros(len(vocabulary))
+        for term in terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                query[column] = 1.0
+        return self.matrices[field] @ query
+
+    def keyword_scores(self, profile):
+        """keyword_score_from_features(resume, profile) for every resume."""
+        if not profile.keywords and not profile.skills:
+            return np.zeros(self.n_resumes)
+
+        keyword_score = np.zeros(self.n_resumes)
+        if profile.keywords:
+            keyword_score = self.count_matches("keywords", profile.keywords) / len(profile.keywords)
+        skill_score = np.zeros(self.n_resumes)
+        if profile.skills:
+            skill_score = self.count_matches("skills", profile.skills) / len(profile.skills)
+
+        return np.minimum(0.3 * keyword_score + 0.7 * skill_score, 1.0)
+
+    def containment_matrix(self, jd_roles):
+        """Sparse (JD roles x resume role vocabulary) matrix of substring containment either way."""
+        rows = []
+        for jd_role in jd_roles:
+            row = self._containment.get(jd_role)
+            if row is None:
+                row = self._containment[jd_role] = np.fromiter(
+                    (jd_role in role or role in jd_role for role in self._role_terms),
+                    dtype=np.float64,
+                    count=len(self._role_terms)
+                )
+            rows.append(row)
+        if not rows:
+            return sparse.csr_matrix((0, len(self._role_terms)))
+        return sparse.csr_matrix(np.vstack(rows))
+
+    def role_scores(self, profile):
+        """role_score_from_roles(resume roles, profile.roles) for every resume."""
+        if not profile.roles:
+            return np.zeros(self.n_resumes)
+
+        jd_roles = list(profile.roles)
+        exact_matches = self.count_matches("roles", jd_roles)
+        # Number of (jd role, resume role) pairs related by containment, per resume
+        related_counts = np.asarray(self.containment_matrix(jd_roles).sum(axis=0)).ravel()
+        partial_matches = self.matrices["roles"] @ related_counts
+
+        exact_score = exact_matches / len(jd_roles)
+        partial_score = partial_matches / (2 * len(jd_roles))
+        return np.maximum(exact_score, partial_score)
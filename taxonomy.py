@@ -0,0 +1,132 @@
+"""Skill and role taxonomy compiled into a spaCy PhraseMatcher.
+
+The taxonomy is a JSON file mapping each canonical skill or role to its
+aliases:
+
+    {
+        "skills": {"powerbi": ["power bi", "microsoft power bi"], "sql": []},
+        "roles": {"data analyst": ["data analysts"], "developer": ["developers"]}
+    }
+
+Every canonical name and alias is tokenized once into a PhraseMatcher
+pattern matched on lowercase token text. The matcher looks tokens up in a
+hash table of pattern prefixes, so matching costs time linear in the
+length of the text however many entries the taxonomy has. Matches are
+reported under their canonical name, so "Power BI", "power-bi" and
+"PowerBI" all become "powerbi".
+"""
+import hashlib
+import json
+from typing import NamedTuple
+
+CATEGORIES = ("skills", "roles")
+
+
+class Taxonomy(NamedTuple):
+    """Canonical skills and roles, each with its aliases, and a content digest."""
+    skills: dict
+    roles: dict
+    digest: str
+
+    @classmethod
+    def load(cls, path):
+        """Read and validate a taxonomy JSON file.
+
+        Raises:
+            ValueError: If the file is not a {"skills": {...}, "roles": {...}}
+                mapping of names to alias lists, or an alias belongs to two
+                canonical names of the same category.
+        """
+        with open(path, "rb") as f:
+            content = f.read()
+        data = json.loads(content)
+        if not isinstance(data, dict) or set(data) - set(CATEGORIES):
+            raise ValueError(f"Taxonomy {path} must be an object with the keys {', '.join(CATEGORIES)}")
+
+        categories = {}
+        for category in CATEGORIES:
+            entries = data.get(category, {})
+            if not isinstance(entries, dict):
+                raise ValueError(f"Taxonomy {category} must map names to lists of aliases")
+            owners = {}
+            normalized = {}
+            for name, aliases in entries.items():
+                if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+                    raise ValueError(f"Aliases of {category} entry {name!r} must be a list of strings")
+                canonical = name.strip().lower()
+                normalized[canonical] = sorted({alias.strip().lower() for alias in aliases} - {canonical})
+                for term in [canonical] + normalized[canonical]:
+                    if owners.setdefault(term, canonical) != canonical:
+                        raise ValueError(f"{category} alias {term!r} belongs to both {owners[term]!r} and {canonical!r}")
+            categories[category] = normalized
+        return cls(categories["skills"], categories["roles"], hashlib.sha256(content).hexdigest()[:12])
+
+
+class TaxonomyMatches(NamedTuple):
+    """Canonical skills and roles found in a Doc, and the token indices of the role mentions."""
+    skills: set
+    roles: set
+    role_tokens: set
+
+
+class TaxonomyMatcher:
+    """PhraseMatcher over every name and alias of a Taxonomy.
+
+    Args:
+        nlp: spaCy pipeline whose tokenizer and vocab the matched Docs use
+        taxonomy (Taxonomy): The skills and roles to match
+    """
+
+    def __init__(self, nlp, taxonomy):
+        from spacy.matcher import PhraseMatcher
+
+        self.taxonomy = taxonomy
+        self._tokenizer = nlp.tokenizer
+        self._matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        # match_id (hash of "category:canonical") -> (category, canonical name)
+        self._labels = {}
+        entries = [
+            (category, canonical, [canonical] + aliases)
+            for category in CATEGORIES
+            for canonical, aliases in getattr(taxonomy, category).items()
+        ]
+        # Tokenizer only (patterns are matched on token text), in one pass
+        patterns = iter(nlp.tokenizer.pipe(term for _, _, terms in entries for term in terms))
+        for category, canonical, terms in entries:
+            key = f"{category}:{canonical}"
+            self._labels[nlp.vocab.strings.add(key)] = (category, canonical)
+            self._matcher.add(key, [next(patterns) for _ in terms])
+
+    def __len__(self):
+        return len(self._matcher)
+
+    def match(self, doc):
+        """Find every taxonomy term in a Doc (overlapping mentions included)."""
+        skills = set()
+        roles = set()
+        role_tokens = set()
+        for match_id, start, end in self._matcher(doc):
+            category, canonical = self._labels[match_id]
+            if category == "skills":
+                skills.add(canonical)
+            else:
+                roles.add(canonical)
+                role_tokens.update(range(start, end))
+        return TaxonomyMatches(skills, roles, role_tokens)
+
+    def normalize(self, terms):
+        """Map query terms to the form extracted features use.
+
+        A term that is exactly a taxonomy name or alias becomes its
+        canonical name (a skill in preference to a role), e.g. "Power BI"
+        -> "powerbi"; any other term is lowercased.
+        """
+        normalized = []
+        for doc in self._tokenizer.pipe(terms):
+            names = sorted(
+                self._labels[match_id] for match_id, start, end in self._matcher(doc)
+                if start == 0 and end == len(doc)
+            )
+            # ("skills", name) sorts after ("roles", name)
+            normalized.append(names[-1][1] if names else doc.text.strip().lower())
+        return normalized
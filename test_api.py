@@ -7,9 +7,9 @@ def test_api():
     test_data = {
         "jd": "Looking for a Python developer with experience in Flask and machine learning. Must have strong problem-solving skills and experience with REST APIs.",
         "resumes": [
-            "Python developer with 3 years of experience in Flask and machine learning. Strong problem-solving skills and REST API development.",
-            "Java developer with 5 years of experience in Spring Boot and microservices.",
-            "Full-stack developer with experience in Python, JavaScript, and cloud technologies."
+            {"id": "resume1", "text": "Python developer with 3 years of experience in Flask and machine learning. Strong problem-solving skills and REST API development."},
+            {"id": "resume2", "text": "Java developer with 5 years of experience in Spring Boot and microservices."},
+            {"id": "resume3", "text": "Full-stack developer with experience in Python, JavaScript, and cloud technologies."}
         ]
     }
 
@@ -19,7 +19,7 @@ def test_api():
     print("\nTest Resumes:")
     for i, resume in enumerate(test_data["resumes"]):
         print(f"\nResume {i+1}:")
-        print(resume)
+        print(resume["text"])
 
     # Make request to local API
     try:
@@ -34,9 +34,9 @@ def test_api():
             print("\n✅ API is working correctly!")
             results = response.json()
             print("\nTop Matches:")
-            for match in results["top_matches"]:
+            for match in results["matches"]:
                 print(f"\nSimilarity Score: {match['similarity']:.2f}")
-                print(f"Resume: {match['resume']}")
+                print(f"Resume: {test_data['resumes'][match['index']]['text']}")
         else:
             print(f"\n❌ API returned status code: {response.status_code}")
             print("Response:", response.text)
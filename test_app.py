@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+import zipfile
+import zlib
+
+import numpy as np
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+import app
+from feature_cache import FeatureCache
+from jobs import JobQueue
+from model_registry import ModelRegistry
+
+
+class TaggedNLP:
+    """spaCy stand-in for en_core_web_sm that needs no model download.
+
+    Capitalized words are tagged PROPN and other words NOUN, each the
+    object of the first word, which is enough for the extractors and
+    noun chunks to produce deterministic features.
+    """
+
+    def __init__(self):
+        self._blank = spacy.blank("en")
+        self.vocab = self._blank.vocab
+        self.tokenizer = self._blank.tokenizer
+        self.meta = self._blank.meta
+
+    def make_doc(self, text):
+        return self._blank.make_doc(text)
+
+    def __call__(self, text):
+        words = [token.text for token in self._blank.make_doc(text) if not token.is_space]
+        pos = [
+            "PROPN" if word.istitle() else "NOUN" if word.isalnum() else "PUNCT"
+            for word in words
+        ]
+        deps = ["ROOT"] + ["dobj"] * (len(words) - 1)
+        return Doc(self.vocab, words=words, pos=pos, heads=[0] * len(words), deps=deps)
+
+    def pipe(self, texts, batch_size=None, n_process=1):
+        return (self(text) for text in texts)
+
+
+class HashingEncoder:
+    """Sentence encoder stand-in: normalized bag of hashed lowercase words."""
+
+    max_seq_length = 256
+
+    def get_sentence_embedding_dimension(self):
+        return 32
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, normalize_embeddings=False):
+        embeddings = np.full((len(texts), 32), 0.01, dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[i, zlib.crc32(word.encode()) % 32] += 1
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Serve the app with TaggedNLP and HashingEncoder and an empty feature cache."""
+    registry = ModelRegistry()
+    registry.register("nlp", TaggedNLP)
+    registry.register("embedding", HashingEncoder)
+    registry.register("taxonomy", app._load_taxonomy_matcher)
+    monkeypatch.setattr(app, "models", registry)
+    monkeypatch.setattr(app, "feature_cache", FeatureCache(namespace="test", max_entries=1000))
+    return registry
+
+
+JD = "Data Analyst with SQL and Python experience"
+RESUMES = [
+    {"id": "r0", "text": "Java developer building Spring services"},
+    {"id": "r1", "text": "Data Analyst skilled in SQL and Python dashboards"},
+    {"id": "r2", "text": "Python engineer with some SQL"},
+    {"id": "r3", "text": "Graphic designer"},
+    {"id": "r4", "text": "Senior Data Analyst, SQL, Python, PowerBI"},
+]
+
+
+def read_ndjson(response):
+    assert response.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_match_stream_emits_one_line_per_resume_then_summary(fake_models, monkeypatch):
+    monkeypatch.setattr(app, "MATCH_STREAM_CHUNK_SIZE", 2)
+    client = app.app.test_client()
+    response = client.post("/match?stream=1", json={"jd": JD, "resumes": RESUMES, "top_k": 2})
+    assert response.status_code == 200
+    lines = read_ndjson(response)
+
+    matches, summary = lines[:-1], lines[-1]
+    assert [line["type"] for line in matches] == ["match"] * len(RESUMES)
+    assert sorted(line["id"] for line in matches) == [resume["id"] for resume in RESUMES]
+    assert summary["type"] == "summary" and summary["total_resumes"] == len(RESUMES)
+
+    # The summary holds the top_k best, the same ranking as the JSON response
+    best = sorted(matches, key=lambda line: line["similarity"], reverse=True)[:2]
+    assert [match["id"] for match in summary["matches"]] == [line["id"] for line in best]
+    ranked = client.post("/match", json={"jd": JD, "resumes": RESUMES, "top_k": 2}).get_json()
+    assert [match["id"] for match in summary["matches"]] == [match["id"] for match in ranked["matches"]]
+
+
+@pytest.mark.parametrize("accept, streamed", [
+    ("application/x-ndjson", True),
+    ("application/json", False),
+    (None, False),
+    ("application/json;q=0.5, application/x-ndjson", True),
+    ("application/x-ndjson;q=0.1, application/json", False),
+    ("application/x-ndjson;q=0, */*", False),
+])
+def test_match_negotiates_ndjson_by_accept_header(fake_models, accept, streamed):
+    headers = {"Accept": accept} if accept else {}
+    assert app.wants_stream(None, accept) == streamed
+    response = app.app.test_client().post("/match", json={"jd": JD, "resumes": RESUMES}, headers=headers)
+    assert response.status_code == 200
+    if streamed:
+        assert read_ndjson(response)[-1]["type"] == "summary"
+    else:
+        assert response.mimetype == "application/json" and len(response.get_json()["matches"]) == len(RESUMES)
+
+
+def test_archive_job_survives_an_expired_lease(fake_models, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "ARCHIVE_CHUNK_SIZE", 2)
+    archive_path = tmp_path / "upload.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        for resume in RESUMES:
+            archive.writestr(f"{resume['id']}.txt", resume["text"])
+
+    first_chunk = threading.Event()
+    resume_run = threading.Event()
+
+    def paused_runner(payload, set_total):
+        for i, chunk in enumerate(app.run_match_job(payload, set_total)):
+            yield chunk
+            if i == 0:
+                first_chunk.set()
+                resume_run.wait()
+
+    # Workers without a heartbeat, so the lease expires while the first run is paused
+    db_path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(db_path, paused_runner, lease_seconds=0.2, poll_interval=0.05, on_finish=app.finish_match_job)
+    job_id = queue.submit({"jd": JD, "archive_path": str(archive_path)})
+    threading.Thread(target=queue._work, daemon=True).start()
+    assert first_chunk.wait(5)
+    time.sleep(0.3)
+    assert JobQueue(db_path, paused_runner, lease_seconds=0.2).requeue_expired() == 1
+
+    # The abandoned run must leave the archive for the re-queued one
+    resume_run.set()
+    deadline = time.monotonic() + 5
+    while queue.get(job_id)["status"] not in ("done", "failed") and time.monotonic() < deadline:
+        time.sleep(0.02)
+    job = queue.get(job_id)
+    assert job["status"] == "done", job["error"]
+    assert job["processed"] == len(RESUMES)
+    assert sorted(result["id"] for result in queue.results(job_id)) == [f"{r['id']}.txt" for r in RESUMES]
+    assert not archive_path.exists()
+
+
+JDS = [JD, "Java developer for Spring services", "Graphic designer with a portfolio"]
+
+
+def test_score_matrix_matches_scoring_each_jd_alone(fake_models):
+    texts = [resume["text"] for resume in RESUMES]
+    profiles = app.build_job_profiles(JDS)
+    for profile, combined in zip(profiles, app.score_matrix(profiles, texts)):
+        alone = app.score_resume_arrays(profile, texts)
+        for key in ("final_score", "semantic_score", "keyword_score", "role_score"):
+            np.testing.assert_allclose(combined[key], alone[key], rtol=1e-5, atol=1e-6)
+        assert app.rank_indices(combined["final_score"]).tolist() == app.rank_indices(alone["final_score"]).tolist()
+
+
+def test_match_matrix_keeps_top_k_per_jd(fake_models):
+    jds = [{"id": f"jd{j}", "text": text} for j, text in enumerate(JDS)]
+    response = app.app.test_client().post("/match/matrix", json={"jds": jds, "resumes": RESUMES, "top_k": 2})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["total_jds"] == 3 and body["total_resumes"] == len(RESUMES)
+    for j, ranking in enumerate(body["rankings"]):
+        assert ranking["jd_id"] == f"jd{j}" and len(ranking["matches"]) == 2
+        single = app.app.test_client().post("/match", json={"jd": JDS[j], "resumes": RESUMES, "top_k": 2})
+        assert [m["id"] for m in ranking["matches"]] == [m["id"] for m in single.get_json()["matches"]]
+
+
+def test_role_extraction_matches_tokens_and_inflected_aliases(fake_models):
+    roles = app.extract_role_keywords("Engineering leadership and managerial experience in architecture")
+    assert {"engineer", "lead", "manager", "architect"} <= roles
+    assert "engineer" in app.extract_role_keywords("Senior Data Engineers")
+    # Role names inside unrelated words no longer count, as substring matching did
+    assert app.extract_role_keywords("misleading reports and pleaded cases") == set()
+
+
+@pytest.mark.parametrize("must_have", ["sql", ["sql", 1], {"sql": True}])
+def test_search_rejects_must_have_that_is_not_a_list_of_strings(must_have):
+    response = app.app.test_client().post("/search", json={"jd": JD, "must_have": must_have})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "must_have must be a list of strings"
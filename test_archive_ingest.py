@@ -0,0 +1,115 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from archive_ingest import count_archive_members, iter_archive_members, iter_archive_texts
+
+FILES = {
+    "resumes/alice.txt": b"Data analyst with SQL",
+    "resumes/bob.pdf": b"%PDF-not really",
+    "resumes/notes.docx": b"ignored",
+    "resumes/.hidden.txt": b"ignored",
+    "__MACOSX/resumes/._alice.txt": b"resource fork",
+}
+
+
+class Stream(io.RawIOBase):
+    """A forward-only upload stream."""
+
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def readinto(self, buffer):
+        data = self._buffer.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def make_zip(files, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        archive.writestr("resumes/", b"")
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar(files, mode="w"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        directory = tarfile.TarInfo("resumes")
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("fileobj", [
+    lambda: io.BytesIO(make_zip(FILES)),
+    lambda: Stream(make_tar(FILES)),
+    lambda: Stream(make_tar(FILES, "w:gz")),
+    lambda: io.BytesIO(make_tar(FILES, "w:gz")),
+], ids=["zip", "tar-stream", "tar.gz-stream", "tar.gz"])
+def test_only_resume_files_are_read(fileobj):
+    members = list(iter_archive_members(fileobj()))
+    assert [(member.name, member.data, member.error) for member in members] == [
+        ("resumes/alice.txt", b"Data analyst with SQL", None),
+        ("resumes/bob.pdf", b"%PDF-not really", None),
+    ]
+
+
+def test_oversized_members_are_reported_without_reading():
+    members = list(iter_archive_members(io.BytesIO(make_zip(FILES)), max_member_bytes=15))
+    assert members[0].data == b"" and members[0].error.startswith("File is")
+    assert members[1] == ("resumes/bob.pdf", b"%PDF-not really", None)
+
+
+def test_corrupt_zip_member_is_skipped():
+    data = make_zip({"a.txt": b"first resume", "b.txt": b"second resume"}, zipfile.ZIP_STORED)
+    # Breaks the CRC of a.txt only
+    data = data.replace(b"first resume", b"FIRST resume")
+    members = list(iter_archive_members(io.BytesIO(data)))
+    assert members[0].name == "a.txt" and members[0].error.startswith("Corrupt archive member")
+    assert members[1] == ("b.txt", b"second resume", None)
+
+
+def test_truncated_tar_reports_the_cut_member():
+    data = make_tar({"a.txt": b"first resume", "b.txt": b"x" * 2000})
+    members = list(iter_archive_members(Stream(data[:2048])))
+    assert members[0] == ("a.txt", b"first resume", None)
+    assert members[1].name == "b.txt" and members[1].error.startswith("Corrupt archive member")
+
+
+def test_unreadable_pdfs_are_reported_as_skipped():
+    [chunk] = iter_archive_texts(io.BytesIO(make_zip(FILES)), max_workers=1)
+    assert chunk[0].text == "Data analyst with SQL" and chunk[0].error is None
+    assert chunk[1].name == "resumes/bob.pdf" and chunk[1].error
+
+
+def test_non_archive_input_raises():
+    with pytest.raises(ValueError):
+        list(iter_archive_members(io.BytesIO(b"just some text, not an archive" * 40)))
+    with pytest.raises(ValueError):
+        list(iter_archive_members(Stream(b"")))
+
+
+def test_count_archive_members():
+    fileobj = io.BytesIO(make_zip(FILES))
+    fileobj.seek(10)
+    assert count_archive_members(fileobj) == 2
+    assert fileobj.tell() == 0
+
+    fileobj = io.BytesIO(make_tar(FILES, "w:gz"))
+    assert count_archive_members(fileobj) is None
+    assert fileobj.tell() == 0
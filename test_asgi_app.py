@@ -0,0 +1,70 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from starlette.requests import ClientDisconnect
+from starlette.testclient import TestClient
+
+import asgi_app
+from asgi_app import NDJSONResponse, NDJSONStream, limiter
+from test_app import JD, RESUMES, fake_models  # noqa: F401 (fixture)
+
+
+def test_full_server_answers_429_with_retry_after(fake_models, monkeypatch):
+    monkeypatch.setattr(limiter, "limit", 0)
+    response = TestClient(asgi_app.app).post("/match", json={"jd": JD, "resumes": RESUMES})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert limiter.in_flight == 0
+
+
+def test_streamed_response_releases_its_slot(fake_models):
+    response = TestClient(asgi_app.app).post("/match?stream=1", json={"jd": JD, "resumes": RESUMES})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == len(RESUMES) + 1 and lines[-1]["type"] == "summary"
+    assert limiter.in_flight == 0
+
+
+def test_slot_is_released_when_the_client_leaves_before_the_body():
+    async def gone(message):
+        raise OSError("client disconnected")
+
+    async def run():
+        assert limiter.try_acquire()
+        response = NDJSONResponse(NDJSONStream(line for line in ["line\n"]))
+        with pytest.raises(ClientDisconnect):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, None, gone)
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+
+
+def test_slot_is_held_until_the_chunk_being_scored_is_done():
+    scoring = threading.Event()
+    finish = threading.Event()
+
+    def lines():
+        scoring.set()
+        finish.wait(5)
+        yield "line\n"
+
+    async def run():
+        assert limiter.try_acquire()
+        stream = NDJSONStream(lines())
+        task = asyncio.ensure_future(stream.chunks().__anext__())
+        while not scoring.is_set():
+            await asyncio.sleep(0.01)
+        # The client goes away while the executor is still scoring
+        task.cancel()
+        stream.close()
+        assert limiter.in_flight == 1
+        finish.set()
+        for _ in range(100):
+            if limiter.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
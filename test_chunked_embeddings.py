@@ -0,0 +1,49 @@
+import numpy as np
+
+from chunked_embeddings import ChunkedEmbeddings, aggregate_chunk_scores, chunk_texts
+
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+
+def test_chunks_respect_the_token_limit_and_keep_all_words():
+    long_section = " ".join(f"word{i}" for i in range(50))
+    texts = [
+        "Summary line.\n\nExperience: built dashboards. Led a team.\n\n" + long_section,
+        "short resume",
+        ""
+    ]
+    chunks = chunk_texts(texts, count_words, max_tokens=8)
+
+    assert len(chunks) == 3
+    for text, text_chunks in zip(texts, chunks):
+        assert all(count <= 8 for count in count_words(text_chunks))
+        assert " ".join(text_chunks).split() == text.split()
+    assert chunks[1] == ["short resume"]
+    assert chunks[2] == [""]
+
+
+def test_small_sections_are_packed_together():
+    text = "\n\n".join(["one two", "three four", "five six", "seven eight"])
+    assert chunk_texts([text], count_words, max_tokens=4) == [["one two\nthree four", "five six\nseven eight"]]
+
+
+def test_aggregation_matches_per_text_reduction():
+    rng = np.random.default_rng(0)
+    counts = [1, 4, 2, 5]
+    matrices = [rng.normal(size=(count, 8)).astype(np.float32) for count in counts]
+    query = rng.normal(size=(8, 3)).astype(np.float32)
+
+    for aggregation in ("max", "mean"):
+        chunked = ChunkedEmbeddings.from_list(matrices, aggregation=aggregation, top_n=2)
+        scores = chunked @ query
+        assert scores.shape == (len(counts), 3)
+        for i, matrix in enumerate(matrices):
+            chunk_scores = np.sort(matrix @ query, axis=0)[::-1]
+            expected = chunk_scores[0] if aggregation == "max" else chunk_scores[:2].mean(axis=0)
+            assert np.allclose(scores[i], expected)
+        assert np.allclose(chunked @ query[:, 0], scores[:, 0])
+
+    offsets = np.array([0, 2, 3])
+    assert np.allclose(aggregate_chunk_scores(np.array([0.1, 0.5, 0.3]), offsets, "mean", 3), [0.3, 0.3])
@@ -0,0 +1,86 @@
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from embedding_backends import CONFIG_FILE, ONNX_DIR, OnnxEncoder
+
+DIM = 4
+
+
+class WordTokenizer:
+    """Tokenizer stand-in: one id per word (its length), padded with 0."""
+
+    def __call__(self, sentences, padding, truncation, max_length, return_tensors):
+        ids = [[len(word) for word in sentence.split()][:max_length] for sentence in sentences]
+        width = max(len(row) for row in ids)
+        return {
+            "input_ids": np.array([row + [0] * (width - len(row)) for row in ids]),
+            "attention_mask": np.array([[1] * len(row) + [0] * (width - len(row)) for row in ids]),
+            "token_type_ids": np.zeros((len(ids), width), dtype=np.int64),
+        }
+
+
+class TokenSession:
+    """InferenceSession stand-in whose token embedding is the token id in every dimension."""
+
+    def __init__(self, path, options, providers):
+        self.runs = []
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="input_ids"), types.SimpleNamespace(name="attention_mask")]
+
+    def run(self, output_names, inputs):
+        self.runs.append(inputs)
+        assert all(array.dtype == np.int64 for array in inputs.values())
+        ids = inputs["input_ids"].astype(np.float32)
+        return [np.repeat(ids[:, :, None], DIM, axis=2)]
+
+
+@pytest.fixture
+def make_encoder(tmp_path, monkeypatch):
+    onnxruntime = types.ModuleType("onnxruntime")
+    onnxruntime.SessionOptions = types.SimpleNamespace
+    onnxruntime.InferenceSession = TokenSession
+    transformers = types.ModuleType("transformers")
+    transformers.AutoTokenizer = types.SimpleNamespace(from_pretrained=lambda path: WordTokenizer())
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+
+    def make(pooling):
+        (tmp_path / ONNX_DIR).mkdir(exist_ok=True)
+        (tmp_path / ONNX_DIR / CONFIG_FILE).write_text(
+            json.dumps({"max_seq_length": 8, "pooling": pooling, "dimension": DIM})
+        )
+        return OnnxEncoder(str(tmp_path), threads=2)
+
+    return make
+
+
+SENTENCES = ["a bb ccc", "dddd", "ee ffffff"]
+
+
+def test_mean_pooling_ignores_padding(make_encoder):
+    encoder = make_encoder("mean")
+    assert encoder.get_sentence_embedding_dimension() == DIM and encoder.max_seq_length == 8
+    embeddings = encoder.encode(SENTENCES)
+    assert embeddings.dtype == np.float32 and embeddings.shape == (3, DIM)
+    np.testing.assert_allclose(embeddings[:, 0], [2.0, 4.0, 4.0])
+
+
+def test_cls_pooling_takes_the_first_token(make_encoder):
+    embeddings = make_encoder("cls").encode(SENTENCES)
+    np.testing.assert_allclose(embeddings[:, 0], [1.0, 4.0, 2.0])
+
+
+def test_batches_keep_input_order_and_normalize(make_encoder):
+    encoder = make_encoder("mean")
+    expected = encoder.encode(SENTENCES)
+    embeddings = encoder.encode(SENTENCES, batch_size=1, show_progress_bar=False, normalize_embeddings=True)
+    assert len(encoder.session.runs) == 1 + 3
+    np.testing.assert_allclose(embeddings, expected / np.linalg.norm(expected, axis=1, keepdims=True), rtol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-6)
+    # Only the inputs the exported graph declares are fed to it
+    assert set(encoder.session.runs[0]) == {"input_ids", "attention_mask"}
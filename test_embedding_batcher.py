@@ -0,0 +1,54 @@
+import threading
+
+import numpy as np
+
+from embedding_batcher import EmbeddingBatcher
+
+
+def fake_encode(texts):
+    return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+
+def test_concurrent_calls_are_coalesced():
+    calls = []
+
+    def encode(texts):
+        calls.append(len(texts))
+        return fake_encode(texts)
+
+    batcher = EmbeddingBatcher(encode, max_batch_size=64, max_wait=0.2)
+    requests = [["a" * (n + 1)] * (n % 3 + 1) for n in range(8)]
+    results = [None] * len(requests)
+    start = threading.Barrier(len(requests))
+
+    def call(i):
+        start.wait()
+        results[i] = batcher.encode(requests[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every caller gets exactly its own rows back
+    for texts, result in zip(requests, results):
+        assert result.shape == (len(texts), 2)
+        assert list(result[:, 0]) == [len(text) for text in texts]
+    assert len(calls) < len(requests)
+    stats = batcher.stats()
+    assert stats["requests"] == len(requests)
+    assert stats["texts"] == sum(len(texts) for texts in requests) == sum(calls)
+
+
+def test_encode_errors_reach_every_caller():
+    def encode(texts):
+        raise RuntimeError("model failed")
+
+    batcher = EmbeddingBatcher(encode, max_wait=0.001)
+    try:
+        batcher.encode(["text"])
+    except RuntimeError as e:
+        assert str(e) == "model failed"
+    else:
+        raise AssertionError("expected the encode error")
@@ -0,0 +1,69 @@
+import numpy as np
+
+from feature_cache import FeatureCache
+
+
+def entry(i):
+    return np.full(4, i, dtype=np.float32), ({f"keyword{i}"}, {f"skill{i}"}, set())
+
+
+def put(cache, i):
+    cache.put(f"resume {i}", *entry(i))
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = FeatureCache("ns", max_entries=2)
+    put(cache, 1)
+    put(cache, 2)
+    assert cache.get("resume 1") is not None  # 1 is now the most recently used
+    put(cache, 3)
+
+    assert cache.get("resume 2") is None
+    embedding, features = cache.get("resume 1")
+    assert embedding[0] == 1 and features == ({"keyword1"}, {"skill1"}, set())
+    assert cache.get("resume 3") is not None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (3, 0, 1)
+    assert stats["memory_entries"] == 2 and stats["disk_entries"] is None
+
+
+def test_evicted_entries_fall_back_to_sqlite(tmp_path):
+    db_path = str(tmp_path / "features.sqlite3")
+    cache = FeatureCache("ns", max_entries=1, db_path=db_path)
+    put(cache, 1)
+    put(cache, 2)
+
+    embedding, features = cache.get_many(["resume 1", "resume 2", "resume 9"])[0]
+    assert embedding.tolist() == [1.0] * 4 and features[1] == {"skill1"}
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["disk_entries"] == 2
+
+    # The disk tier survives a restart
+    reopened = FeatureCache("ns", max_entries=1, db_path=db_path)
+    assert reopened.get("resume 2")[1][0] == {"keyword2"}
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_evicts_least_recently_accessed(tmp_path):
+    cache = FeatureCache("ns", max_entries=0, db_path=str(tmp_path / "features.sqlite3"), max_disk_entries=2)
+    put(cache, 1)
+    put(cache, 2)
+    put(cache, 3)
+    assert cache.stats()["disk_entries"] == 2
+    assert cache.get("resume 1") is None
+
+
+def test_namespace_change_invalidates_entries(tmp_path):
+    db_path = str(tmp_path / "features.sqlite3")
+    put(FeatureCache("model-a", db_path=db_path), 1)
+
+    assert FeatureCache("model-a", db_path=db_path).get("resume 1") is not None
+    assert FeatureCache("model-b", db_path=db_path).get("resume 1") is None
+
+
+def test_disabled_cache_counts_misses():
+    cache = FeatureCache("ns", max_entries=0)
+    put(cache, 1)
+    assert cache.get("resume 1") is None
+    assert cache.stats()["misses"] == 1
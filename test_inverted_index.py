@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+
+from app import DocumentFeatures, JobProfile, keyword_score_from_features, role_score_from_roles
+from inverted_index import InvertedIndex
+from resume_corpus import ResumeCorpus
+from test_sparse_scoring import random_features, random_profile
+
+
+def test_index_scores_match_scalar_functions():
+    rng = random.Random(1)
+    resumes = [random_features(rng) for _ in range(200)]
+    index = InvertedIndex()
+    for row, features in enumerate(resumes):
+        index.add(row, features)
+
+    for _ in range(50):
+        profile = random_profile(rng)
+        keyword_scores = index.keyword_scores(profile, len(resumes))
+        role_scores = index.role_scores(profile, len(resumes))
+        for resume, keyword_score, role_score in zip(resumes, keyword_scores, role_scores):
+            assert keyword_score == keyword_score_from_features(resume, profile)
+            assert role_score == role_score_from_roles(resume.roles, profile.roles)
+
+
+def test_rows_with_all_finds_every_matching_row():
+    rng = random.Random(2)
+    resumes = [random_features(rng) for _ in range(300)]
+    index = InvertedIndex()
+    for row, features in enumerate(resumes):
+        index.add(row, features)
+
+    for terms in (["python"], ["sql", "python"], ["powerbi", "tableau"], ["kubernetes"], []):
+        expected = [
+            row for row, resume in enumerate(resumes)
+            if terms and all(term in resume.skills or term in resume.keywords for term in terms)
+        ]
+        assert index.rows_with_all(terms).tolist() == expected
+
+
+def test_new_roles_extend_postings_and_related_roles():
+    index = InvertedIndex()
+    index.add(0, DocumentFeatures({"python"}, {"sql"}, {"analyst"}))
+    profile = JobProfile(None, set(), set(), {"data analyst"}, True)
+    assert index.role_scores(profile, 1).tolist() == [role_score_from_roles({"analyst"}, profile.roles)]
+
+    # A new role term invalidates the cached related roles; postings stay sorted
+    index.add(1, DocumentFeatures({"python"}, set(), {"senior data analyst"}))
+    assert index.postings("keywords", "python").tolist() == [0, 1]
+    assert index.rows_with_all(["python", "sql"]).tolist() == [0]
+    assert index.role_scores(profile, 2).tolist() == [
+        role_score_from_roles({"analyst"}, profile.roles),
+        role_score_from_roles({"senior data analyst"}, profile.roles)
+    ]
+    assert index.postings("skills", "missing").tolist() == []
+
+
+def test_corpus_filters_deleted_rows_from_postings(tmp_path):
+    rng = random.Random(3)
+    resumes = [random_features(rng) for _ in range(40)]
+    corpus = ResumeCorpus(str(tmp_path), dim=2)
+    ids = [str(i) for i in range(len(resumes))]
+    corpus.add(ids, ids, ids, np.ones((len(ids), 2), dtype=np.float32), resumes)
+    for resume_id in ids[::3]:
+        corpus.delete(resume_id)
+    # Re-adding an id moves it to a new row with new features
+    corpus.add(["1"], ["1"], ["1"], np.ones((1, 2), dtype=np.float32), [resumes[0]])
+
+    live = {int(resume_id): resumes[int(resume_id)] for resume_id in ids if int(resume_id) % 3 and resume_id != "1"}
+    live[len(resumes)] = resumes[0]
+    for reopened in (False, True):
+        if reopened:
+            # Reopening rebuilds the postings from live rows only
+            corpus = ResumeCorpus(str(tmp_path), dim=2)
+            assert corpus.terms.postings("skills", "sql").tolist() == [
+                row for row, resume in sorted(live.items()) if "sql" in resume.skills
+            ]
+        assert corpus.live_rows().tolist() == sorted(live)
+        assert corpus.rows_with_terms(["python"]).tolist() == [
+            row for row, resume in sorted(live.items()) if "python" in resume.skills | resume.keywords
+        ]
+        profile = random_profile(rng)
+        rows = corpus.live_rows()
+        keyword_scores, role_scores = corpus.lexical_scores(profile, rows)
+        assert keyword_scores.tolist() == [keyword_score_from_features(live[row], profile) for row in rows]
+        if profile.has_role_requirement:
+            assert role_scores.tolist() == [role_score_from_roles(live[row].roles, profile.roles) for row in rows]
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from jobs import JobQueue, LeaseLost
+
+
+def fake_runner(payload, set_total):
+    set_total(len(payload["scores"]))
+    for start in range(0, len(payload["scores"]), 2):
+        chunk = payload["scores"][start:start + 2]
+        yield [{"similarity": score, "id": start + i} for i, score in enumerate(chunk)], []
+
+
+def wait_for(queue, job_id):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_results_are_ranked_and_paged(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), fake_runner, workers=2)
+    queue.start()
+    job_id = queue.submit({"scores": [0.2, 0.9, 0.5, 0.9, 0.1]})
+
+    job = wait_for(queue, job_id)
+    assert job["status"] == "done"
+    assert job["total"] == job["processed"] == 5
+    assert [r["id"] for r in queue.results(job_id)] == [1, 3, 2, 0, 4]
+    assert [r["id"] for r in queue.results(job_id, offset=1, limit=2)] == [3, 2]
+
+
+def test_failed_job_records_error(tmp_path):
+    def failing_runner(payload, set_total):
+        raise RuntimeError("boom")
+        yield
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), failing_runner)
+    queue.start()
+    job = wait_for(queue, queue.submit({"scores": [0.5]}))
+    assert job["status"] == "failed" and job["error"] == "boom"
+
+
+def test_on_finish_runs_for_done_and_failed_jobs(tmp_path):
+    finished = []
+
+    def runner(payload, set_total):
+        if payload["fail"]:
+            raise RuntimeError("boom")
+        yield from fake_runner({"scores": [0.5]}, set_total)
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), runner, on_finish=finished.append)
+    queue.start()
+    wait_for(queue, queue.submit({"fail": False}))
+    wait_for(queue, queue.submit({"fail": True}))
+    # Called just after the status is written
+    deadline = time.monotonic() + 5
+    while len(finished) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert finished == [{"fail": False}, {"fail": True}]
+
+
+def test_job_with_expired_lease_is_requeued(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    # A job left running by a stopped process is re-queued once its lease expires
+    stopped = JobQueue(db_path, fake_runner, lease_seconds=0.2)
+    job_id = stopped.submit({"scores": [0.3, 0.4]})
+    stopped._claim()
+    assert stopped.get(job_id)["status"] == "running"
+
+    restarted = JobQueue(db_path, fake_runner, lease_seconds=0.2)
+    assert restarted.requeue_expired() == 0
+    time.sleep(0.3)
+    assert restarted.requeue_expired() == 1
+    assert restarted.get(job_id)["status"] == "queued"
+    restarted.start()
+    assert wait_for(restarted, job_id)["processed"] == 2
+
+
+def test_running_job_is_not_taken_over_by_another_queue(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    started = []
+
+    def slow_runner(payload, set_total):
+        started.append(payload)
+        for result in fake_runner(payload, set_total):
+            time.sleep(0.2)
+            yield result
+
+    # Two processes sharing the database; the heartbeat keeps the first one's lease alive
+    first = JobQueue(db_path, slow_runner, lease_seconds=0.2, poll_interval=0.05)
+    second = JobQueue(db_path, slow_runner, lease_seconds=0.2, poll_interval=0.05)
+    first.start()
+    job_id = first.submit({"scores": [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]})
+    second.start()
+
+    job = wait_for(second, job_id)
+    assert job["status"] == "done" and job["processed"] == 6
+    assert len(started) == 1
+    assert len(second.results(job_id)) == 6
+
+
+def test_worker_that_lost_its_lease_stops_writing(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    stale = JobQueue(db_path, fake_runner, lease_seconds=0.1)
+    job_id = stale.submit({"scores": [0.3, 0.4, 0.5]})
+    stale._claim()
+    time.sleep(0.2)
+    other = JobQueue(db_path, fake_runner, lease_seconds=0.1)
+    other.start()
+    assert wait_for(other, job_id)["processed"] == 3
+
+    with pytest.raises(LeaseLost):
+        stale._run(job_id, {"scores": [0.3, 0.4, 0.5]})
+    assert len(other.results(job_id)) == 3
@@ -0,0 +1,36 @@
+from metrics import Metrics
+
+
+def test_render_prometheus_text():
+    metrics = Metrics("test")
+    requests = metrics.counter("requests_total", "Requests", ("status",))
+    sizes = metrics.histogram("batch_size", "Batch sizes", (1, 10))
+    requests.inc(status="200")
+    requests.inc(2, status="200")
+    sizes.observe(1)
+    sizes.observe_many([5, 50])
+    with metrics.stage("encode"):
+        pass
+
+    text = metrics.render()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{status="200"} 3' in text
+    assert 'test_batch_size_bucket{le="1"} 1' in text
+    assert 'test_batch_size_bucket{le="10"} 2' in text
+    assert 'test_batch_size_bucket{le="+Inf"} 3' in text
+    assert 'test_batch_size_sum 56' in text
+    assert 'test_stage_duration_seconds_count{stage="encode"} 1' in text
+
+
+def test_disabled_records_nothing_but_debug_timings():
+    metrics = Metrics("test", enabled=False)
+    with metrics.request_timings() as timings:
+        with metrics.stage("nlp"):
+            pass
+        with metrics.stage("nlp"):
+            pass
+    with metrics.stage("encode"):
+        pass
+
+    assert list(timings) == ["nlp"]
+    assert "stage_duration_seconds_count" not in metrics.render()
@@ -0,0 +1,44 @@
+import threading
+import time
+
+import app
+from model_registry import ModelRegistry
+
+
+def test_each_model_loads_once_under_concurrent_gets():
+    loads = []
+
+    def slow_loader():
+        loads.append(1)
+        time.sleep(0.1)
+        return object()
+
+    registry = ModelRegistry()
+    registry.register("model", slow_loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len(results) == 8 and all(model is results[0] for model in results)
+    assert registry.status()["model"]["loaded"]
+
+
+def test_ready_turns_200_after_warm_up(monkeypatch):
+    registry = ModelRegistry()
+    registry.register("nlp", object)
+    registry.register("embedding", object)
+    monkeypatch.setattr(app, "models", registry)
+    client = app.app.test_client()
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "loading"
+
+    registry.warm_up()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.get_json()["models"]["nlp"]["loaded"]
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import fitz
+import pytest
+
+import pdf_extraction
+from pdf_extraction import extract_texts
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1}")
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def in_thread(function, *args, **kwargs):
+    """Run function on a thread other than the main one, as request handlers and job workers do."""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function(*args, **kwargs)))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    pdf_extraction.shutdown_pool()
+    yield
+    pdf_extraction.shutdown_pool()
+
+
+def test_page_limit_reads_only_the_first_pages():
+    [result] = extract_texts([("long.pdf", make_pdf(5))], max_pages=2)
+    assert result.error is None and result.pages == 5
+    assert "Page 2" in result.text and "Page 3" not in result.text
+
+
+def test_files_over_the_size_limit_are_skipped():
+    small, large = make_pdf(1), make_pdf(30)
+    results = extract_texts([("small.pdf", small), ("large.pdf", large)], max_bytes=len(small) + 1)
+    assert results[0].error is None
+    assert results[1].error.startswith("File is") and results[1].text == ""
+
+
+def test_timeout_on_the_main_thread(monkeypatch):
+    def slow(pdf_bytes, max_pages=None):
+        time.sleep(2)
+
+    monkeypatch.setattr(pdf_extraction, "extract_text_from_pdf_bytes", slow)
+    started = time.monotonic()
+    [result] = extract_texts([("slow.pdf", b"")], timeout=0.2)
+    assert result.error == "Timed out after 0.2s"
+    assert time.monotonic() - started < 1
+
+
+def test_small_batches_off_the_main_thread_use_the_pool():
+    files = [("a.pdf", make_pdf(1)), ("b.pdf", make_pdf(2))]
+    results = in_thread(extract_texts, files, max_workers=2, timeout=10)
+    assert [result.pages for result in results] == [1, 2]
+    pool = pdf_extraction._pool
+    assert pool is not None
+
+    # The pool is reused by later calls
+    in_thread(extract_texts, files, max_workers=2, timeout=10)
+    assert pdf_extraction._pool is pool
+
+    # Without a timeout small batches stay in-process
+    pdf_extraction.shutdown_pool()
+    in_thread(extract_texts, files, max_workers=2)
+    assert pdf_extraction._pool is None
+
+
+def test_pool_is_replaced_after_its_deadline_passes():
+    files = [(f"{i}.pdf", make_pdf(1)) for i in range(4)]
+    results = in_thread(extract_texts, files, max_workers=2, timeout=1e-6)
+    assert all(result.error == "Timed out after 1e-06s" for result in results)
+
+    results = in_thread(extract_texts, files, max_workers=2, timeout=10)
+    assert all(result.error is None for result in results)
@@ -0,0 +1,25 @@
+import random
+
+import numpy as np
+
+from ranking import TopK, rank_indices
+
+
+def full_ranking(scores):
+    return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+
+
+def test_top_k_matches_full_sort():
+    rng = random.Random(0)
+    for _ in range(50):
+        # Few distinct values, so ties are common
+        scores = [rng.randint(0, 9) / 10 for _ in range(rng.randint(0, 60))]
+        expected = full_ranking(scores)
+        assert list(rank_indices(np.array(scores))) == expected
+        for k in (0, 1, 5, len(scores), len(scores) + 3):
+            assert list(rank_indices(np.array(scores), k)) == expected[:k]
+
+            best = TopK(k)
+            for i, score in enumerate(scores):
+                best.push(score, i)
+            assert best.items() == expected[:k]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from resume_corpus import ResumeCorpus, StaleFeaturesError, check_features_version
+
+
+def vectors(*values):
+    matrix = np.zeros((len(values), 4), dtype=np.float32)
+    for i, value in enumerate(values):
+        matrix[i, value % 4] = 1.0
+    return matrix
+
+
+def features(*skills):
+    return [(set(), {skill}, set()) for skill in skills]
+
+
+def test_processes_sharing_a_corpus_never_reuse_rows(tmp_path):
+    # Two instances on one directory stand in for two gunicorn workers
+    first = ResumeCorpus(str(tmp_path), dim=4, initial_capacity=2)
+    second = ResumeCorpus(str(tmp_path), dim=4, initial_capacity=2)
+
+    assert first.add(["a", "b"], ["A", "B"], ["a", "b"], vectors(0, 1), features("sql", "python")) == [0, 1]
+    assert second.add(["c", "d"], ["C", "D"], ["c", "d"], vectors(2, 3), features("sql", "java")) == [2, 3]
+    assert first.add(["e"], ["E"], ["e"], vectors(2), features("sql")) == [4]
+
+    # Each instance sees the other's resumes, with the embeddings written to their rows
+    for corpus in (first, second):
+        assert len(corpus) == 5
+        assert corpus.rows_with_terms(["sql"]).tolist() == [0, 2, 4]
+        rows, scores = corpus.search(vectors(3)[0], 1)
+        assert rows.tolist() == [3] and scores[0] == 1.0
+    assert {record["id"] for record in first.get_rows(range(5)).values()} == {"a", "b", "c", "d", "e"}
+
+    # Replacing and deleting in one instance tombstones the rows in the other
+    assert second.add(["a"], ["A2"], ["a2"], vectors(1), features("go")) == [5]
+    assert first.delete("c")
+    assert not first.delete("c")
+    assert second.live_rows().tolist() == [1, 3, 4, 5]
+    assert second.rows_with_terms(["sql"]).tolist() == [4]
+    assert first.rows_for_ids(["a", "c"]) == {"a": 5}
+
+    reopened = ResumeCorpus(str(tmp_path), dim=4)
+    assert reopened.live_rows().tolist() == [1, 3, 4, 5]
+    assert not reopened.embeddings()[[0, 2]].any()
+
+
+def test_features_from_another_version_must_be_reextracted(tmp_path):
+    corpus = ResumeCorpus(str(tmp_path), dim=4, features_version="v1")
+    corpus.add(["a", "b"], ["A", "B"], ["uses power bi", "uses sql"], vectors(0, 1), features("power bi", "sql"))
+    assert ResumeCorpus(str(tmp_path), dim=4, features_version="v1").rows_with_terms(["power bi"]).tolist() == [0]
+
+    with pytest.raises(StaleFeaturesError):
+        ResumeCorpus(str(tmp_path), dim=4, features_version="v2")
+    with pytest.raises(StaleFeaturesError):
+        check_features_version(str(tmp_path), "v2")
+    check_features_version(str(tmp_path), "v1")
+    check_features_version(str(tmp_path / "missing"), "v2")
+
+    def analyze(texts):
+        # Extractors that now report "power bi" under its canonical name
+        return [(set(), {"powerbi" if "power bi" in text else "sql"}, set()) for text in texts]
+
+    unchecked = ResumeCorpus(str(tmp_path), dim=4)
+    assert unchecked.reextract_features(analyze, "v2", batch_size=1) == 2
+    assert unchecked.rows_with_terms(["powerbi"]).tolist() == [0]
+    reopened = ResumeCorpus(str(tmp_path), dim=4, features_version="v2")
+    assert reopened.rows_with_terms(["powerbi"]).tolist() == [0]
+    assert reopened.rows_with_terms(["power bi"]).tolist() == []
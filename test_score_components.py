@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app import DEFAULT_WEIGHTS, combine_scores
+from score_components import ComponentStore, as_component_matrix, combine_weight_sets, resolve_weights
+
+
+def test_weight_sets_match_combine_scores():
+    rng = np.random.default_rng(0)
+    components = np.column_stack([rng.random((40, 3)), rng.random(40) > 0.5]).astype(np.float64)
+    weight_sets = [
+        DEFAULT_WEIGHTS,
+        resolve_weights({"semantic_weight_with_role": 0.5, "keyword_weight_no_role": 0.1}, DEFAULT_WEIGHTS)
+    ]
+    finals = combine_weight_sets(components, weight_sets)
+    assert finals.shape == (40, 2)
+    for i, (semantic, keyword, role, has_role) in enumerate(components):
+        for j, weights in enumerate(weight_sets):
+            expected = combine_scores(semantic, keyword, role, bool(has_role), weights)["final_score"]
+            assert finals[i, j] == pytest.approx(expected)
+
+
+def test_invalid_input_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_weights({"semantic": 1.0}, DEFAULT_WEIGHTS)
+    with pytest.raises(ValueError):
+        resolve_weights({"role_weight": "high"}, DEFAULT_WEIGHTS)
+    with pytest.raises(ValueError):
+        as_component_matrix([[0.1, 0.2, 0.3]])
+    assert as_component_matrix([]).shape == (0, 4)
+
+
+def test_store_evicts_least_recently_used():
+    store = ComponentStore(max_entries=2)
+    first = store.put(np.zeros((1, 4)), [{"id": "a", "name": None}])
+    second = store.put(np.zeros((1, 4)), [{"id": "b", "name": None}])
+    store.get(first)
+    store.put(np.zeros((1, 4)), [{"id": "c", "name": None}])
+    assert store.get(first) is not None
+    assert store.get(second) is None
@@ -0,0 +1,55 @@
+import random
+
+from app import DocumentFeatures, JobProfile, keyword_score_from_features, role_score_from_roles
+from sparse_scoring import TermMatrix
+
+KEYWORDS = ["python", "flask", "machine learning", "rest apis", "data analysis", "sql server", "tableau"]
+SKILLS = ["sql", "python", "r", "powerbi", "google analytics", "bi tools", "analytics"]
+ROLES = ["analyst", "data analyst", "senior data analyst", "engineer", "software engineer",
+         "lead", "team lead", "developer", "python developer"]
+
+
+def random_features(rng):
+    return DocumentFeatures(
+        keywords=set(rng.sample(KEYWORDS, rng.randint(0, 5))),
+        skills=set(rng.sample(SKILLS, rng.randint(0, 3))),
+        roles=set(rng.sample(ROLES, rng.randint(0, 3)))
+    )
+
+
+def random_profile(rng):
+    # JD terms include some that no resume in the batch uses
+    features = DocumentFeatures(
+        keywords=set(rng.sample(KEYWORDS + ["kubernetes"], rng.randint(0, 5))),
+        skills=set(rng.sample(SKILLS + ["firebase"], rng.randint(0, 3))),
+        roles=set(rng.sample(ROLES + ["data engineer", "architect"], rng.randint(0, 3)))
+    )
+    return JobProfile(
+        embedding=None,
+        keywords=features.keywords,
+        skills=features.skills,
+        roles=features.roles,
+        has_role_requirement=bool(features.roles)
+    )
+
+
+def test_sparse_scores_match_scalar_functions():
+    rng = random.Random(0)
+    resumes = [random_features(rng) for _ in range(200)]
+    terms = TermMatrix(resumes)
+
+    for _ in range(50):
+        profile = random_profile(rng)
+        keyword_scores = terms.keyword_scores(profile)
+        role_scores = terms.role_scores(profile)
+        for resume, keyword_score, role_score in zip(resumes, keyword_scores, role_scores):
+            assert keyword_score == keyword_score_from_features(resume, profile)
+            assert role_score == role_score_from_roles(resume.roles, profile.roles)
+
+
+def test_sparse_scores_with_empty_batch_terms():
+    resumes = [DocumentFeatures(set(), set(), set()) for _ in range(3)]
+    profile = JobProfile(None, {"python"}, {"sql"}, {"analyst"}, True)
+    terms = TermMatrix(resumes)
+    assert list(terms.keyword_scores(profile)) == [0.0, 0.0, 0.0]
+    assert list(terms.role_scores(profile)) == [0.0, 0.0, 0.0]
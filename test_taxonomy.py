@@ -0,0 +1,40 @@
+import json
+
+import pytest
+import spacy
+
+from taxonomy import Taxonomy, TaxonomyMatcher
+
+
+def write_taxonomy(tmp_path, data):
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_aliases_match_under_canonical_names(tmp_path):
+    taxonomy = Taxonomy.load(write_taxonomy(tmp_path, {
+        "skills": {"PowerBI": ["Power BI", "microsoft power bi"], "sql": [], "google analytics": []},
+        "roles": {"data analyst": ["data analysts"], "engineer": ["engineers"]}
+    }))
+    nlp = spacy.blank("en")
+    matcher = TaxonomyMatcher(nlp, taxonomy)
+
+    doc = nlp("Data Analysts and engineers using POWER BI, Microsoft Power BI, SQL and Google Analytics")
+    matches = matcher.match(doc)
+    assert matches.skills == {"powerbi", "sql", "google analytics"}
+    assert matches.roles == {"data analyst", "engineer"}
+    assert matches.role_tokens == {0, 1, 3}
+    assert matcher.match(nlp("PowerBI dashboards")).skills == {"powerbi"}
+    assert matcher.normalize(["Power BI", "Data Analysts", "SQL", "Power BI reports", "Kubernetes"]) == [
+        "powerbi", "data analyst", "sql", "power bi reports", "kubernetes"
+    ]
+
+
+def test_invalid_taxonomy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Taxonomy.load(write_taxonomy(tmp_path, {"skills": {"powerbi": ["power bi"], "bi": ["power bi"]}}))
+    with pytest.raises(ValueError):
+        Taxonomy.load(write_taxonomy(tmp_path, {"skills": ["sql"]}))
+    with pytest.raises(ValueError):
+        Taxonomy.load(write_taxonomy(tmp_path, {"tools": {}}))
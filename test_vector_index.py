@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+import vector_index
+from vector_index import BruteForceIndex, HNSWIndex, IVFIndex
+
+
+class ArrayStore:
+    """The parts of ResumeCorpus the indexes read, over an in-memory matrix."""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.dim = matrix.shape[1]
+        self.rows_used = 0
+        self._live = np.zeros(len(matrix), dtype=bool)
+
+    def embeddings(self):
+        return self.matrix[:self.rows_used]
+
+    def live_mask(self):
+        return self._live[:self.rows_used]
+
+    def append(self, index, count):
+        rows = np.arange(self.rows_used, self.rows_used + count)
+        self._live[rows] = True
+        self.rows_used += count
+        index.add(rows, self.matrix[rows])
+
+    def delete(self, index, rows):
+        self._live[rows] = False
+        index.remove(rows)
+
+
+def random_matrix(rows, dim=16, seed=0):
+    matrix = np.random.default_rng(seed).normal(size=(rows, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def assert_matches_brute_force(index, store, queries, k=5):
+    brute = BruteForceIndex(store)
+    for query in queries:
+        rows, scores = index.search(query, k)
+        expected_rows, expected_scores = brute.search(query, k)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+def test_ivf_trains_in_background_and_matches_brute_force(tmp_path):
+    matrix = random_matrix(400)
+    store = ArrayStore(matrix)
+    # Probing every cluster makes the index exact
+    index = IVFIndex(store, str(tmp_path), nlist=8, nprobe=8, min_train_size=100, save_interval=0)
+    store.append(index, 60)
+    assert not index.trained
+    assert_matches_brute_force(index, store, matrix[:3])
+
+    for _ in range(5):
+        store.append(index, 60)
+    index.wait_for_training()
+    assert index.trained and index.trained_size >= 100
+    store.delete(index, [0, 5, 250])
+    assert_matches_brute_force(index, store, matrix[:10])
+    assert 0 not in index.search(matrix[0], 5)[0]
+
+    # Reopening loads the saved centroids and assigns rows added since the save
+    index.save()
+    store.append(index, 40)
+    reopened = IVFIndex(store, str(tmp_path), nprobe=8, min_train_size=100)
+    assert reopened.trained and len(reopened.centroids) == 8
+    assert_matches_brute_force(reopened, store, matrix[350:360])
+
+
+def test_ivf_saves_at_most_every_save_interval(tmp_path):
+    store = ArrayStore(random_matrix(300))
+    index = IVFIndex(store, str(tmp_path), nlist=4, min_train_size=100, save_interval=3600)
+    store.append(index, 100)
+    index.wait_for_training()
+    saved_at = (tmp_path / "ivf.npz").stat().st_mtime_ns
+    store.append(index, 10)
+    assert (tmp_path / "ivf.npz").stat().st_mtime_ns == saved_at
+    index.save()
+    with np.load(tmp_path / "ivf.npz") as saved:
+        assert len(saved["assignments"]) == 110
+
+
+def test_ivf_assigns_rows_in_bounded_blocks(monkeypatch):
+    monkeypatch.setattr(vector_index, "ASSIGN_BLOCK_ROWS", 7)
+    matrix = random_matrix(50)
+    centroids = random_matrix(6, seed=1)
+    labels = IVFIndex._assign(matrix, centroids)
+    assert labels.tolist() == np.argmax(matrix @ centroids.T, axis=1).tolist()
+
+
+def test_hnsw_matches_brute_force_and_reopens(tmp_path):
+    pytest.importorskip("hnswlib")
+    matrix = random_matrix(300)
+    store = ArrayStore(matrix)
+    index = HNSWIndex(store, str(tmp_path), ef_search=300, save_interval=3600)
+    store.append(index, 200)
+    store.delete(index, [3, 7])
+    assert_matches_brute_force(index, store, matrix[:10])
+
+    # Rows added and deleted after the last save are replayed on open
+    index.save()
+    store.append(index, 100)
+    store.delete(index, [250])
+    reopened = HNSWIndex(store, str(tmp_path), ef_search=300)
+    assert_matches_brute_force(reopened, store, matrix[245:255])
@@ -0,0 +1,383 @@
+"""Vector index backends for the resume corpus.
+
+Every backend answers top-k inner-product queries over the corpus
+embedding matrix (normalized, so inner product is cosine similarity)
+and supports incremental add/remove keyed by matrix row:
+
+- ``brute``: exact scan of the memory-mapped matrix; no extra state.
+- ``ivf``: inverted-file index implemented here with NumPy. Rows are
+  clustered around spherical k-means centroids and a query only scans
+  the ``nprobe`` closest clusters.
+- ``hnsw``: HNSW graph from the optional ``hnswlib`` package.
+
+The store passed to each backend must provide ``dim``, ``rows_used``,
+``embeddings()`` and ``live_mask()`` (see ResumeCorpus). Backends with
+state persist it under ``path``; pass ``path=None`` to keep it in memory.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_BACKENDS = ("brute", "ivf", "hnsw")
+
+# Rows scored against the IVF centroids at a time; bounds the rows x nlist
+# score matrix (4096 x 4000 centroids is 64 MB of float32)
+ASSIGN_BLOCK_ROWS = 4096
+
+
+def _empty_result():
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+
+def _top_k(rows, scores, k):
+    """Return the k highest-scoring (rows, scores), best first."""
+    k = min(k, len(rows))
+    if k <= 0:
+        return _empty_result()
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return np.asarray(rows)[best], scores[best]
+
+
+def create_vector_index(backend, store, path, **options):
+    """Build the index backend named by VECTOR_INDEX_BACKEND."""
+    if backend == "brute":
+        return BruteForceIndex(store)
+    if backend == "ivf":
+        return IVFIndex(store, path, **options)
+    if backend == "hnsw":
+        return HNSWIndex(store, path, **options)
+    raise ValueError(f"Unknown vector index backend: {backend} (expected one of {VECTOR_INDEX_BACKENDS})")
+
+
+class BruteForceIndex:
+    """Exact search by scanning every live row of the embedding matrix."""
+
+    name = "brute"
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, rows, embeddings):
+        pass
+
+    def remove(self, rows):
+        pass
+
+    def save(self):
+        pass
+
+    def search(self, query, k):
+        live = self.store.live_mask()
+        k = min(k, int(live.sum()))
+        if k <= 0:
+            return _empty_result()
+        scores = self.store.embeddings() @ np.asarray(query, dtype=np.float32)
+        scores[~live] = -np.inf
+        return _top_k(np.arange(len(scores)), scores, k)
+
+
+class IVFIndex:
+    """Inverted-file index: rows are bucketed by nearest k-means centroid.
+
+    Until the corpus reaches ``min_train_size`` rows the index falls back
+    to an exact scan. New rows are assigned to the nearest existing
+    centroid, so adds never require a rebuild; the centroids are only
+    retrained once the corpus has grown ``retrain_factor`` times past the
+    size they were trained on. Training runs in a background thread and
+    the new centroids are swapped in when it finishes, so adds and
+    searches never wait for it.
+
+    Like HNSWIndex, the assignments are saved at most every
+    ``save_interval`` seconds and at interpreter exit; rows added after
+    the last save are reassigned on open.
+    """
+
+    name = "ivf"
+
+    def __init__(self, store, path, nprobe=8, nlist=None, min_train_size=10000,
+                 retrain_factor=8, sample_size=100000, iterations=10, seed=0, save_interval=60):
+        self.store = store
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.sample_size = sample_size
+        self.iterations = iterations
+        self.save_interval = save_interval
+        self._rng = np.random.default_rng(seed)
+        self._path = os.path.join(path, "ivf.npz") if path else None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._training = None
+
+        self.centroids = None
+        self.trained_size = 0
+        # Cluster of every row added so far (-1 for rows added before training)
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists = []
+
+        if self._path and os.path.exists(self._path):
+            with np.load(self._path) as saved:
+                self.centroids = saved["centroids"]
+                self._assignments = saved["assignments"]
+                self.trained_size = int(saved["trained_size"])
+            self._rebuild_lists()
+            # Catch up on rows added after the last save
+            start = len(self._assignments)
+            if start < store.rows_used:
+                self.add(np.arange(start, store.rows_used), store.embeddings()[start:])
+        elif store.rows_used >= min_train_size:
+            self._start_training()
+        atexit.register(self.save)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def train(self):
+        """Fit spherical k-means centroids on (a sample of) the live rows and assign every row.
+
+        Runs without holding the index lock; rows added meanwhile are
+        reassigned to the new centroids when they are swapped in.
+        """
+        rows_used = self.store.rows_used
+        matrix = self.store.embeddings()[:rows_used]
+        live_rows = np.flatnonzero(self.store.live_mask()[:rows_used])
+        if len(live_rows) == 0:
+            return
+        nlist = self.nlist or max(1, int(4 * np.sqrt(len(live_rows))))
+        nlist = min(nlist, len(live_rows))
+        sample_rows = live_rows
+        if len(sample_rows) > self.sample_size:
+            sample_rows = np.sort(self._rng.choice(live_rows, self.sample_size, replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty clusters with random sample points
+            sums[empty] = sample[self._rng.choice(len(sample), int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        centroids = centroids.astype(np.float32)
+        assignments = self._assign(matrix, centroids)
+        with self._lock:
+            # Rows added while training ran were assigned to the old centroids (or none)
+            added = len(self._assignments) - len(assignments)
+            if added > 0:
+                start = len(assignments)
+                assignments = np.concatenate([
+                    assignments, self._assign(self.store.embeddings()[start:start + added], centroids)
+                ])
+            self.centroids = centroids
+            self._assignments = assignments
+            self.trained_size = rows_used
+            self._rebuild_lists()
+            self._dirty = True
+        self.save()
+
+    def wait_for_training(self, timeout=None):
+        """Block until a background training run (if any) has finished."""
+        training = self._training
+        if training is not None:
+            training.join(timeout)
+
+    def add(self, rows, embeddings):
+        rows = np.asarray(rows)
+        if len(rows) == 0:
+            return
+        with self._lock:
+            needed = int(rows.max()) + 1
+            if len(self._assignments) < needed:
+                grown = np.full(needed, -1, dtype=np.int32)
+                grown[:len(self._assignments)] = self._assignments
+                self._assignments = grown
+            if self.trained:
+                # Skip rows a training run already assigned when it swapped in its centroids
+                new = self._assignments[rows] < 0
+                rows = rows[new]
+                labels = self._assign(np.asarray(embeddings)[new], self.centroids)
+                self._assignments[rows] = labels
+                for row, label in zip(rows, labels):
+                    self._lists[label].append(int(row))
+            self._dirty = True
+        if self._training_due():
+            self._start_training()
+        self._maybe_save()
+
+    def remove(self, rows):
+        # Removed rows stay in their cluster list and are filtered by the live mask
+        pass
+
+    def save(self):
+        """Persist centroids and row assignments (a few bytes per row)."""
+        with self._lock:
+            if self._dirty and self.trained and self._path:
+                # Written to a temporary file and renamed, so readers never see a partial file
+                with open(self._path + ".tmp", "wb") as f:
+                    np.savez(
+                        f,
+                        centroids=self.centroids,
+                        assignments=self._assignments,
+                        trained_size=self.trained_size
+                    )
+                os.replace(self._path + ".tmp", self._path)
+                self._dirty = False
+            self._last_save = time.monotonic()
+
+    def search(self, query, k):
+        with self._lock:
+            trained = self.trained
+            if trained:
+                query = np.asarray(query, dtype=np.float32)
+                nprobe = min(self.nprobe, len(self.centroids))
+                probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+                candidates = np.concatenate([np.asarray(self._lists[label], dtype=np.int64) for label in probe])
+        if not trained:
+            return BruteForceIndex(self.store).search(query, k)
+
+        candidates = np.sort(candidates[self.store.live_mask()[candidates]])
+        if len(candidates) == 0:
+            return _empty_result()
+        scores = np.asarray(self.store.embeddings()[candidates], dtype=np.float32) @ query
+        return _top_k(candidates, scores, k)
+
+    def _start_training(self):
+        with self._lock:
+            if self._training is not None and self._training.is_alive():
+                return
+            self._training = threading.Thread(target=self._train_in_background, name="ivf-training", daemon=True)
+            self._training.start()
+
+    def _training_due(self):
+        if not self.trained:
+            return self.store.rows_used >= self.min_train_size
+        return self.store.rows_used >= self.retrain_factor * self.trained_size
+
+    def _train_in_background(self):
+        try:
+            # The corpus may have grown past the next threshold while training ran
+            while self._training_due():
+                self.train()
+        except Exception:
+            logger.exception("IVF index training failed")
+
+    @staticmethod
+    def _assign(matrix, centroids):
+        """Nearest centroid of every row, computed in blocks to bound memory."""
+        labels = np.empty(len(matrix), dtype=np.int32)
+        for start in range(0, len(matrix), ASSIGN_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def _rebuild_lists(self):
+        self._lists = [[] for _ in range(len(self.centroids))]
+        for row in np.flatnonzero(self._assignments >= 0):
+            self._lists[self._assignments[row]].append(int(row))
+
+    def _maybe_save(self):
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+
+class HNSWIndex:
+    """Approximate search with an hnswlib HNSW graph labelled by matrix row.
+
+    The graph is saved to disk at most every ``save_interval`` seconds and
+    at interpreter exit; on open, rows added or deleted after the last
+    save are replayed from the corpus.
+    """
+
+    name = "hnsw"
+
+    def __init__(self, store, path, M=16, ef_construction=200, ef_search=64, save_interval=60):
+        if hnswlib is None:
+            raise RuntimeError(
+                "The hnsw vector index needs hnswlib: pip install hnswlib "
+                "(or set VECTOR_INDEX_BACKEND=brute or ivf)"
+            )
+        self.store = store
+        self.ef_search = ef_search
+        self.save_interval = save_interval
+        self._path = os.path.join(path, "hnsw.bin") if path else None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        self._index = hnswlib.Index(space="ip", dim=store.dim)
+        capacity = max(1024, 2 * store.rows_used)
+        if self._path and os.path.exists(self._path):
+            self._index.load_index(self._path, max_elements=capacity)
+        else:
+            self._index.init_index(max_elements=capacity, ef_construction=ef_construction, M=M)
+
+        # Replay rows added and deleted since the graph was last saved
+        start = self._index.get_current_count()
+        if start < store.rows_used:
+            self.add(np.arange(start, store.rows_used), store.embeddings()[start:])
+        self.remove(np.flatnonzero(~store.live_mask()))
+        atexit.register(self.save)
+
+    def add(self, rows, embeddings):
+        rows = np.asarray(rows)
+        if len(rows) == 0:
+            return
+        with self._lock:
+            needed = int(rows.max()) + 1
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+            self._index.add_items(np.asarray(embeddings, dtype=np.float32), rows)
+            self._dirty = True
+        self._maybe_save()
+
+    def remove(self, rows):
+        with self._lock:
+            for row in rows:
+                try:
+                    self._index.mark_deleted(int(row))
+                    self._dirty = True
+                except RuntimeError:
+                    # Never added or already deleted
+                    pass
+        self._maybe_save()
+
+    def search(self, query, k):
+        k = min(k, int(self.store.live_mask().sum()))
+        if k <= 0:
+            return _empty_result()
+        with self._lock:
+            self._index.set_ef(max(self.ef_search, k))
+            labels, distances = self._index.knn_query(np.asarray(query, dtype=np.float32), k=k)
+        # hnswlib's inner-product distance is 1 - dot
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self):
+        with self._lock:
+            if self._dirty and self._path:
+                self._index.save_index(self._path + ".tmp")
+                os.replace(self._path + ".tmp", self._path)
+                self._dirty = False
+            self._last_save = time.monotonic()
+
+    def _maybe_save(self):
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()